@@ -0,0 +1,41 @@
+import time
+from collections import OrderedDict
+from .git import get_commit_infos_async
+
+""" LRU cache of commit metadata (author, committer, message). Commits are immutable, so entries never go stale;
+commits that couldn't be found are remembered for `miss_ttl_seconds`, since they may show up after a fetch. """
+class CommitInfoCache:
+    def __init__(self, max_size: int = 4096, miss_ttl_seconds: float = 60):
+        self.max_size = max_size
+        self.miss_ttl_seconds = miss_ttl_seconds
+        self._infos: OrderedDict[str, dict] = OrderedDict()
+        # commit id -> when it was last found to be missing
+        self._misses: dict[str, float] = {}
+
+    async def get_many(self, commit_ids: list[str], repo_root) -> dict[str, dict]:
+        """ Returns commit id -> commit info for the commits that exist in the repository,
+        resolving every uncached commit in a single batch. """
+        now = time.monotonic()
+        infos = {}
+        uncached = []
+        for commit_id in commit_ids:
+            if commit_id in self._infos:
+                self._infos.move_to_end(commit_id)
+                infos[commit_id] = self._infos[commit_id]
+            elif now - self._misses.get(commit_id, float("-inf")) >= self.miss_ttl_seconds:
+                uncached.append(commit_id)
+
+        resolved = await get_commit_infos_async(uncached, path=repo_root)
+        for commit_id in uncached:
+            if commit_id in resolved:
+                self._misses.pop(commit_id, None)
+                infos[commit_id] = self._infos[commit_id] = resolved[commit_id]
+            else:
+                self._misses[commit_id] = now
+
+        while len(self._infos) > self.max_size:
+            self._infos.popitem(last=False)
+        # Expired misses would otherwise accumulate forever.
+        for commit_id in [commit_id for commit_id, missed_at in self._misses.items() if now - missed_at >= self.miss_ttl_seconds]:
+            del self._misses[commit_id]
+        return infos
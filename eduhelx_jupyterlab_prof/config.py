@@ -1,25 +1,72 @@
 import os
-from typing import get_type_hints, Union
+import json
+from collections import ChainMap
+from collections.abc import Mapping
+from typing import get_type_hints, Union, Any
 from jupyter_server.serverapp import ServerApp
 
-validators = []
-
 def _parse_bool(value: Union[str, bool]) -> bool:
     if type(value) == bool: return value
     return True if value.lower() in ["true", "yes", "1"] else False
 
+def _constant_case_to_camel_case(field: str) -> str:
+    [first, *rest] = field.lower().split("_")
+    return first + "".join(part.capitalize() for part in rest)
+
+""" Does the per-class work of a config class once, when the class is created:
+- Annotated CONSTANT_CASE fields become slots. Their defaults move into `_defaults`, since a slot can't share its name with a class attribute.
+- Type hints, validators, and the camelCase name of each field are resolved up front rather than on every load.
+"""
+class ConfigMeta(type):
+    def __new__(mcs, name, bases, namespace):
+        base_fields = set()
+        defaults = {}
+        for base in reversed(bases):
+            base_fields.update(getattr(base, "_field_types", {}))
+            defaults.update(getattr(base, "_defaults", {}))
+        fields = [field for field in namespace.get("__annotations__", {}) if field.isupper()]
+        for field in fields:
+            if field in namespace: defaults[field] = namespace.pop(field)
+        namespace["_defaults"] = defaults
+        namespace["__slots__"] = tuple(field for field in fields if field not in base_fields)
+
+        cls = super().__new__(mcs, name, bases, namespace)
+        cls._field_types = { field: hint for field, hint in get_type_hints(cls).items() if field.isupper() }
+        cls._camel_case_fields = { _constant_case_to_camel_case(field): field for field in cls._field_types }
+        cls._validators = [
+            method for base in reversed(cls.__mro__) for method in vars(base).values()
+            if hasattr(method, "__validation_description__")
+        ]
+        return cls
+
 """ Adapted boilerplate from https://www.doppler.com/blog/environment-variables-in-python
 - Specify default values in config, and it will override them if present in env.
 - If a value does not have default value (only a type hint) and is not specified in env, it will raise an exception.
 - Methods names of the template `process_{CONFIG_FIELD}` are reserved and may be used to post-process the value of the variable.
+- A loaded config is an immutable snapshot. To change values (e.g. `tunable_fields` at runtime), create a new one with `replace`.
 """
-class Config:
+class Config(metaclass=ConfigMeta):
+    # Fields that can safely change while the server is running, since they're read whenever they're needed.
+    tunable_fields = frozenset({
+        "UPSTREAM_SYNC_INTERVAL",
+        "UPSTREAM_SYNC_MAX_INTERVAL",
+        "LONG_POLLING_TIMEOUT_SECONDS",
+        "LONG_POLLING_SLEEP_INTERVAL_SECONDS",
+        "GIT_NETWORK_TIMEOUT_SECONDS",
+        "API_REQUEST_TIMEOUT_SECONDS",
+        "EVENTS_KEEPALIVE_SECONDS",
+        "SUBMISSIONS_PAGE_SIZE",
+        "SUBMISSIONS_MAX_PAGE_SIZE",
+    })
+
     GRADER_API_URL: str
     USER_NAME: str
     ACCESS_TOKEN: str = ""
     USER_AUTOGEN_PASSWORD: str = ""
     LOCAL: bool = False
+    # How often to check upstream for changes. While upstream is idle, this backs off up to UPSTREAM_SYNC_MAX_INTERVAL.
     UPSTREAM_SYNC_INTERVAL: int = 60
+    UPSTREAM_SYNC_MAX_INTERVAL: int = 600
     # Which credential helper to use in Git
     CREDENTIAL_HELPER: str = "store"
     # How far ahead of time the API should refresh the access token
@@ -29,6 +76,42 @@ class Config:
     LONG_POLLING_TIMEOUT_SECONDS: int = 60
     # For polling that depends on unobservable data, how long to sleep in between data fetches.
     LONG_POLLING_SLEEP_INTERVAL_SECONDS: int = 5
+    # How long a network-bound git operation (fetch, push) may run before it is killed.
+    GIT_NETWORK_TIMEOUT_SECONDS: int = 300
+    # How long a single grader API call may take before the request depending on it gives up.
+    API_REQUEST_TIMEOUT_SECONDS: int = 30
+    # How long course, assignment and settings metadata from the grader API is cached for.
+    COURSE_CACHE_TTL_SECONDS: int = 300
+    ASSIGNMENTS_CACHE_TTL_SECONDS: int = 10
+    SETTINGS_CACHE_TTL_SECONDS: int = 300
+    SUBMISSIONS_CACHE_TTL_SECONDS: int = 5
+    # How many assignments' submissions to keep cached (and indexed) at once, least recently requested first out.
+    SUBMISSIONS_MAX_CACHED_ASSIGNMENTS: int = 32
+    # Number of students per page of submissions (clients may ask for fewer, or up to the max).
+    SUBMISSIONS_PAGE_SIZE: int = 100
+    SUBMISSIONS_MAX_PAGE_SIZE: int = 500
+    # How many student notebooks may be generated (with otter assign) at once, each in its own worker process.
+    NOTEBOOK_GENERATION_WORKERS: int = 1
+    # While clients are subscribed to change events, how often to check the repository and the grader API for changes.
+    CHANGE_MONITOR_INTERVAL_SECONDS: int = 2
+    CHANGE_MONITOR_API_INTERVAL_SECONDS: int = 15
+    # How often to send a keepalive on idle event streams.
+    EVENTS_KEEPALIVE_SECONDS: int = 30
+    # Partial clone filter for the instructor repository, e.g. "blob:none" to only download file contents as they're needed.
+    CLONE_FILTER: str = ""
+    # Only clone this many commits of history (0 clones everything). More history is fetched as merges need it.
+    CLONE_DEPTH: int = 0
+    # Only check out assignment directories (and top-level files), leaving out everything else in the repository.
+    # Turning this off restores the full working tree of a repository that was checked out sparsely (on the next upstream sync).
+    SPARSE_CHECKOUT: bool = False
+    # JSON file of tunable fields (see `tunable_fields`) to override while the server is running. Checked for changes periodically.
+    TUNABLES_FILE: str = ""
+    TUNABLES_RELOAD_INTERVAL_SECONDS: int = 5
+    # How long to wait before retrying a failed setup of the instructor's repository. Doubles with every failure, up to the max.
+    BOOTSTRAP_RETRY_INTERVAL_SECONDS: int = 5
+    BOOTSTRAP_RETRY_MAX_INTERVAL_SECONDS: int = 300
+    # How many upstream syncs (that actually did something) to keep a record of.
+    SYNC_HISTORY_MAX_RUNS: int = 50
 
 
     """
@@ -37,19 +120,15 @@ class Config:
       - Field will be skipped if not in all caps
       - Class field and environment variable name are the same
     """
-    def __init__(self, env):
-        for field in self.__annotations__:
-            if not field.isupper():
-                continue
-
+    def __init__(self, env: Mapping):
+        for (field, var_type) in self._field_types.items():
             # Raise AppConfigError if required field not supplied
-            default_value = getattr(self, field, None)
+            default_value = self._defaults.get(field)
             if default_value is None and env.get(field) is None:
                 raise ValueError('The {} field is required'.format(field))
 
             # Cast env var value to expected type and raise AppConfigError on failure
             try:
-                var_type = get_type_hints(self.__class__)[field]
                 if var_type == bool:
                     value = _parse_bool(env.get(field, default_value))
                 else:
@@ -59,7 +138,7 @@ class Config:
                 if postprocessing_method is not None:
                     value = postprocessing_method(value)
 
-                self.__setattr__(field, value)
+                object.__setattr__(self, field, value)
             except ValueError:
                 raise ValueError('Unable to cast value of "{}" to type "{}" for "{}" field'.format(
                     env[field],
@@ -68,14 +147,25 @@ class Config:
                 )
             )
 
-        for validator in validators:
+        for validator in self._validators:
             if not validator(self):
                 raise ValueError(f"Config misconfiguration: { validator.__validation_description__ }")
 
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f"Config is immutable, use replace() to change { name }")
+
+    def to_dict(self) -> dict:
+        return { field: getattr(self, field) for field in self._field_types }
+
+    def replace(self, **changes) -> "Config":
+        """ Returns a new (validated) config with the given fields changed. """
+        config = object.__new__(type(self))
+        Config.__init__(config, ChainMap(changes, self.to_dict()))
+        return config
+
     def validator(validation_description: str):
         def decorator(method):
             method.__validation_description__ = validation_description
-            if method not in validators: validators.append(method)
             return method
         return decorator
     
@@ -93,7 +183,7 @@ class Config:
         return value
 
     def __repr__(self):
-        return str(self.__dict__)
+        return str(self.to_dict())
 
 """
 By default, use environment variables to instantiate the config.
@@ -110,12 +200,25 @@ class ExtensionConfig(Config):
         self,
         server_app: ServerApp = None
     ):
-        data_source = os.environ.copy()
+        extension_config = {}
         if server_app is not None:
             for key in server_app.config["EduhelxSubmission"].keys():
                 # Jupyter doesn't allow config variables to start with capitals, so they are passed
-                # as camelCase and converted into their actual CONSTANT_CASE form.
-                key_constant_case = ''.join(['_' + c if c.isupper() else c for c in key]).lstrip('_').upper()
-                data_source[key_constant_case] = server_app.config["EduhelxSubmission"][key].get_value(None)
+                # as camelCase and mapped to their actual CONSTANT_CASE form.
+                field = self._camel_case_fields.get(key)
+                if field is not None:
+                    extension_config[field] = server_app.config["EduhelxSubmission"][key].get_value(None)
+
+        super().__init__(ChainMap(extension_config, os.environ))
+
+    def with_tunables(self, tunables: dict) -> "ExtensionConfig":
+        """ Returns a new config with the given tunable fields changed. Fields that aren't tunable are ignored. """
+        changes = {}
+        for (field, value) in tunables.items():
+            if field in self.tunable_fields: changes[field] = value
+            else: print(f"Warning: { field } can't be changed while the server is running, ignoring...")
+        return self.replace(**changes)
 
-        super().__init__(data_source)
\ No newline at end of file
+    def read_tunables_file(self) -> dict:
+        with open(self.TUNABLES_FILE, "r") as f:
+            return json.load(f)
@@ -0,0 +1,88 @@
+import time
+import asyncio
+import traceback
+from typing import Any, Awaitable, Callable
+
+class Event:
+    def __init__(self, topic: str, data: Any = None):
+        self.topic = topic
+        self.data = data
+
+""" Fans out change notifications to every connected client (each subscriber gets its own queue).
+Topics name the resource that changed, so that clients know what to refetch. """
+class EventBus:
+    def __init__(self):
+        self._subscribers: set[asyncio.Queue] = set()
+        self._on_first_subscriber: list[Callable[[], None]] = []
+
+    @property
+    def has_subscribers(self) -> bool:
+        return len(self._subscribers) > 0
+
+    def on_first_subscriber(self, callback: Callable[[], None]) -> None:
+        self._on_first_subscriber.append(callback)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue()
+        self._subscribers.add(queue)
+        if len(self._subscribers) == 1:
+            for callback in self._on_first_subscriber: callback()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def publish(self, topic: str, data: Any = None) -> None:
+        event = Event(topic, data)
+        for queue in self._subscribers:
+            queue.put_nowait(event)
+
+
+class ChangeSource:
+    def __init__(self, topic: str, fingerprint: Callable[[], Awaitable[Any]], interval_seconds: float):
+        self.topic = topic
+        self.fingerprint = fingerprint
+        self.interval_seconds = interval_seconds
+        self.last_fingerprint = None
+        self.last_checked = float("-inf")
+
+""" Watches resources that can't notify on their own (e.g. the working tree, or the grader API) on the server,
+once for every client, and publishes an event whenever a resource's fingerprint changes.
+The monitor only runs while there are clients subscribed to the event bus. """
+class ChangeMonitor:
+    # How often to wake up and check whether any source is due.
+    TICK_SECONDS = 1
+
+    def __init__(self, events: EventBus):
+        self.events = events
+        self.sources: list[ChangeSource] = []
+        self._task: asyncio.Task | None = None
+        events.on_first_subscriber(self.start)
+
+    def add_source(self, topic: str, fingerprint: Callable[[], Awaitable[Any]], interval_seconds: float) -> None:
+        self.sources.append(ChangeSource(topic, fingerprint, interval_seconds))
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def _check(self, source: ChangeSource) -> None:
+        source.last_checked = time.monotonic()
+        try:
+            fingerprint = await source.fingerprint()
+        except Exception:
+            print(f"Failed to check { source.topic } for changes:", traceback.format_exc())
+            return
+        # The first check only establishes a baseline.
+        if source.last_fingerprint is not None and fingerprint != source.last_fingerprint:
+            self.events.publish(source.topic)
+        source.last_fingerprint = fingerprint
+
+    async def _run(self) -> None:
+        while self.events.has_subscribers:
+            now = time.monotonic()
+            due = [source for source in self.sources if now - source.last_checked >= source.interval_seconds]
+            await asyncio.gather(*(self._check(source) for source in due))
+            await asyncio.sleep(self.TICK_SECONDS)
+        # Nobody is listening, so baselines will be stale by the time someone subscribes again.
+        for source in self.sources: source.last_fingerprint = None
@@ -0,0 +1,33 @@
+import asyncio
+from typing import Any, Awaitable
+
+class FanOutTimeoutException(asyncio.TimeoutError):
+    def __init__(self, name: str, timeout: float):
+        super().__init__(f'"{ name }" did not complete within { timeout } seconds')
+        self.name = name
+        self.timeout = timeout
+
+""" Runs independent awaitables concurrently, so a group of calls takes as long as the slowest call
+rather than the sum of them. Calls are named by keyword and results are returned under the same names.
+- Each call is individually bound by `timeout` (in seconds).
+- If any call fails, every call still in flight is cancelled and the original exception is raised.
+"""
+async def fan_out(timeout: float | None = None, **calls: Awaitable) -> dict[str, Any]:
+    async def run(name: str, call: Awaitable):
+        try:
+            return await asyncio.wait_for(call, timeout=timeout)
+        except asyncio.TimeoutError:
+            raise FanOutTimeoutException(name, timeout)
+
+    tasks = { name : asyncio.ensure_future(run(name, call)) for (name, call) in calls.items() }
+    try:
+        pending = set(tasks.values())
+        while len(pending) > 0:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if task.exception() is not None: raise task.exception()
+        return { name : task.result() for (name, task) in tasks.items() }
+    finally:
+        # If a call failed (or the caller was cancelled), don't leave the others running.
+        for task in tasks.values():
+            if not task.done(): task.cancel()
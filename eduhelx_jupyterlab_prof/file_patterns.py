@@ -0,0 +1,114 @@
+import re
+from pathlib import PurePosixPath
+
+def _translate_segment(segment: str) -> str:
+    """ Regex for a single path segment of a glob (`*`, `?` and `[...]` never match a slash). """
+    regex = ""
+    i, n = 0, len(segment)
+    while i < n:
+        c = segment[i]
+        i += 1
+        if c == "*":
+            regex += "[^/]*"
+        elif c == "?":
+            regex += "[^/]"
+        elif c == "[":
+            j = i
+            if j < n and segment[j] == "!": j += 1
+            if j < n and segment[j] == "]": j += 1
+            j = segment.find("]", j)
+            if j == -1:
+                # Unterminated, so it's a literal bracket.
+                regex += "\\["
+                continue
+            body, i = segment[i:j], j + 1
+            negate = body.startswith("!")
+            if negate: body = body[1:]
+            # Escape what `re` would otherwise read as nested sets or set operations.
+            body = re.sub(r"([\\\[&~|])", r"\\\1", body)
+            if negate: regex += f"[^/{ body }]"
+            elif body.startswith("^"): regex += f"[\\{ body }]"
+            else: regex += f"[{ body }]"
+        else:
+            regex += re.escape(c)
+    return regex
+
+def translate_glob(pattern: str) -> str:
+    """ Regex for the relative paths that `Path.glob(pattern)` yields, except that a trailing `**`
+    matches everything beneath it (rather than just the directories, which can't be told apart without disk). """
+    segments = [segment for segment in pattern.split("/") if segment not in ("", ".")]
+    regex = ""
+    for i, segment in enumerate(segments):
+        is_last = i == len(segments) - 1
+        if segment == "**":
+            # Zero or more directories.
+            regex += ".*" if is_last else "(?:[^/]+/)*"
+        else:
+            regex += _translate_segment(segment) + ("" if is_last else "/")
+    return regex
+
+
+class CompiledAssignmentPatterns:
+    def __init__(self, directory_path: str, overwritable_files: list[str], protected_files: list[str]):
+        # Relative to the repo root, without a trailing slash ("" for the repo root itself).
+        directory_path = PurePosixPath(directory_path).as_posix().strip("/")
+        self.directory_path = "" if directory_path == "." else directory_path
+        # Each list of globs is compiled into a single alternation, so a path is matched in one pass.
+        self.overwritable = self._compile(overwritable_files)
+        self.protected = self._compile(protected_files)
+
+    @staticmethod
+    def _compile(patterns: list[str]) -> re.Pattern | None:
+        patterns = [pattern for pattern in patterns if pattern != ""]
+        if len(patterns) == 0: return None
+        return re.compile("|".join(f"(?:{ translate_glob(pattern) })" for pattern in patterns))
+
+    def relative_path(self, path: str) -> str | None:
+        """ `path` relative to the assignment's directory, or None if it's not inside of it. """
+        if self.directory_path == "": return path
+        if path.startswith(self.directory_path + "/"): return path[len(self.directory_path) + 1:]
+        return None
+
+
+""" Classifies repo-relative paths as overwritable or protected, according to the globs of the assignment containing them
+(matched relative to its directory, like `Path.glob`), in time proportional to the number of globs and without touching disk.
+Use `get_file_patterns` to reuse the compiled patterns for as long as the assignments' globs don't change. """
+class AssignmentFilePatterns:
+    def __init__(self, assignments):
+        self.key = self.compute_key(assignments)
+        self._assignments = [
+            CompiledAssignmentPatterns(assignment["directory_path"], assignment["overwritable_files"], assignment["protected_files"])
+            for assignment in assignments
+        ]
+
+    @staticmethod
+    def compute_key(assignments) -> tuple:
+        return tuple(
+            (assignment["directory_path"], tuple(assignment["overwritable_files"]), tuple(assignment["protected_files"]))
+            for assignment in assignments
+        )
+
+    def _matches(self, path, kind: str) -> bool:
+        path = PurePosixPath(path).as_posix()
+        for assignment in self._assignments:
+            pattern = getattr(assignment, kind)
+            if pattern is None: continue
+            relative_path = assignment.relative_path(path)
+            if relative_path is not None and pattern.fullmatch(relative_path): return True
+        return False
+
+    def is_overwritable(self, path) -> bool:
+        return self._matches(path, "overwritable")
+
+    def is_protected(self, path) -> bool:
+        return self._matches(path, "protected")
+
+
+_file_patterns: AssignmentFilePatterns | None = None
+
+def get_file_patterns(assignments) -> AssignmentFilePatterns:
+    """ The compiled file patterns of `assignments`, only recompiled when their directories or globs change. """
+    global _file_patterns
+    if _file_patterns is None or _file_patterns.key != AssignmentFilePatterns.compute_key(assignments):
+        _file_patterns = AssignmentFilePatterns(assignments)
+    return _file_patterns
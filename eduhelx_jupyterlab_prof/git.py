@@ -1,6 +1,7 @@
+import os
 import re
 from typing import List, Tuple
-from .process import execute
+from .process import execute, execute_async
 
 class GitException(Exception):
     pass
@@ -106,4 +107,411 @@ def commit(summary: str, description: str | None = None, path="./") -> str:
 def push(remote_name: str, branch_name: str, path="./"):
     (out, err, exit_code) = execute(["git", "push", remote_name, branch_name], cwd=path)
     if exit_code != 0:
-        raise InvalidGitRepositoryException()
\ No newline at end of file
+        raise InvalidGitRepositoryException()
+
+""" Awaitable variants of the git helpers. These run git through `execute_async`, so they never block the
+server's event loop, and are what the handlers and the background upstream sync use.
+Network-bound operations accept a `timeout` (in seconds), after which git is killed. """
+
+async def get_repo_root_async(path="./") -> str:
+    (root, err, exit_code) = await execute_async(["git", "rev-parse", "--show-toplevel"], cwd=path)
+    if err != "":
+        raise InvalidGitRepositoryException()
+    return root
+
+async def init_repository_async(path="./"):
+    (out, err, exit_code) = await execute_async(["git", "init"], cwd=path)
+    if exit_code != 0:
+        raise GitException(err)
+
+async def add_remote_async(remote_name: str, remote_url: str, path="./"):
+    (out, err, exit_code) = await execute_async(["git", "remote", "add", remote_name, remote_url], cwd=path)
+    if err != "":
+        raise InvalidGitRepositoryException()
+
+async def fetch_repository_async(
+    remote_name: str,
+    path="./",
+    timeout: float | None = None,
+    depth: int | None = None,
+    filter: str | None = None,
+    deepen: int | None = None,
+    unshallow=False
+):
+    """ - depth: only fetch this many commits of history (a shallow fetch).
+    - filter: partial clone filter, e.g. "blob:none" to fetch file contents on demand. Later fetches reuse it.
+    - deepen/unshallow: fetch this many more commits of history / the rest of the history of a shallow repository. """
+    args = []
+    if depth is not None: args.append(f"--depth={ depth }")
+    if filter is not None: args.append(f"--filter={ filter }")
+    if deepen is not None: args.append(f"--deepen={ deepen }")
+    if unshallow: args.append("--unshallow")
+    (out, err, exit_code) = await execute_async(["git", "fetch", *args, remote_name], cwd=path, timeout=timeout)
+    if exit_code != 0:
+        raise GitException(err)
+
+async def is_shallow_repository_async(path="./") -> bool:
+    (out, err, exit_code) = await execute_async(["git", "rev-parse", "--is-shallow-repository"], cwd=path)
+    if exit_code != 0:
+        raise InvalidGitRepositoryException(err)
+    return out == "true"
+
+async def get_merge_base_async(commit_a: str, commit_b: str, path="./") -> str | None:
+    """ Returns the best common ancestor of two commits, or None if they have none (in the history available locally). """
+    (out, err, exit_code) = await execute_async(["git", "merge-base", commit_a, commit_b], cwd=path)
+    # Exit code 1 means that there's no merge base.
+    if exit_code > 1:
+        raise GitException(err)
+    return out if exit_code == 0 else None
+
+# How many commits to deepen a shallow repository by at first, doubling every round.
+DEEPEN_INITIAL_COMMITS = 64
+# After this many rounds, just fetch the rest of the history.
+DEEPEN_MAX_ROUNDS = 6
+
+async def deepen_until_merge_base_async(commit_a: str, commit_b: str, remote_name: str, path="./", timeout: float | None = None) -> str | None:
+    """ In a shallow repository, the common history of two commits may be cut off, in which case fetch more
+    history from the remote until they have a merge base (or there's no more history to fetch). Returns the merge base. """
+    deepen_by = DEEPEN_INITIAL_COMMITS
+    for attempt in range(DEEPEN_MAX_ROUNDS + 1):
+        merge_base = await get_merge_base_async(commit_a, commit_b, path=path)
+        if merge_base is not None or not await is_shallow_repository_async(path=path):
+            return merge_base
+        if attempt < DEEPEN_MAX_ROUNDS:
+            await fetch_repository_async(remote_name, path=path, timeout=timeout, deepen=deepen_by)
+            deepen_by *= 2
+        else:
+            await fetch_repository_async(remote_name, path=path, timeout=timeout, unshallow=True)
+    return await get_merge_base_async(commit_a, commit_b, path=path)
+
+async def get_changed_paths_async(base: str, head: str, merge_base=False, path="./") -> List[str]:
+    """ Paths that differ between `base` and `head` (a rename counts as a deletion and an addition).
+    With `merge_base`, diffs from the merge base of the two instead, i.e. only the changes made on `head`'s side. """
+    range_arg = f"{ base }...{ head }" if merge_base else f"{ base }..{ head }"
+    (out, err, exit_code) = await execute_async(["git", "diff", "--name-only", "--no-renames", "-z", range_arg], cwd=path)
+    if exit_code != 0:
+        raise GitException(err)
+    return [file for file in out.split("\0") if file != ""]
+
+async def hash_files_async(files: List[str], path="./") -> List[str]:
+    """ Blob ids of files on disk (relative to `path`), in the same order. The files are hashed as-is (no clean filters),
+    streamed through a single git process, so comparing two files' ids compares their content without loading it into memory. """
+    if len(files) == 0: return []
+    (out, err, exit_code) = await execute_async(
+        ["git", "hash-object", "--no-filters", "--stdin-paths"],
+        stdin_input="\n".join(str(file) for file in files) + "\n",
+        cwd=path
+    )
+    if exit_code != 0:
+        raise GitException(err)
+    return out.splitlines()
+
+async def checkout_async(branch_name: str, new_branch=False, force=False, path="./"):
+    new_branch_args = ["-b"] if new_branch else []
+    force_args = ["--force"] if force else []
+    (out, err, exit_code) = await execute_async(["git", "checkout", *force_args, *new_branch_args, branch_name], cwd=path)
+    if exit_code != 0:
+        raise GitException(err)
+
+async def get_head_commit_id_async(commit="HEAD", path="./") -> str:
+    (out, err, exit_code) = await execute_async(["git", "rev-parse", commit], cwd=path)
+    if err != "":
+        raise InvalidGitRepositoryException()
+    return out
+
+async def is_ancestor_commit_async(
+    descendant: str,
+    ancestor: str,
+    path="./",
+    remote_name: str | None = None,
+    timeout: float | None = None
+) -> bool:
+    """ If `remote_name` is given and the repository is shallow, a negative answer is double-checked
+    by deepening the history from the remote (see `deepen_until_merge_base_async`), since the path between
+    the two commits may just be cut off. Otherwise, shallow history can produce false negatives. """
+    (out, err, exit_code) = await execute_async(["git", "merge-base", "--is-ancestor", ancestor, descendant], cwd=path)
+    # Exit code 1 means that it isn't an ancestor; anything else is an actual error.
+    if exit_code > 1:
+        raise GitException(err)
+    if exit_code == 0 or remote_name is None or not await is_shallow_repository_async(path=path):
+        return exit_code == 0
+    merge_base = await deepen_until_merge_base_async(descendant, ancestor, remote_name, path=path, timeout=timeout)
+    return merge_base is not None and merge_base == await get_head_commit_id_async(ancestor, path=path)
+
+async def get_modified_paths_async(untracked=False, path="./") -> List[dict]:
+    untracked_args = ["--untracked-files=all"] if untracked else []
+    (out, err, exit_code) = await execute_async(["git", "status", "--porcelain", *untracked_args], cwd=path)
+    if exit_code != 0:
+        raise InvalidGitRepositoryException()
+    modified_paths = []
+    for line in out.splitlines():
+        if line == "": continue
+        modification_type, modified_path = line[:2], line[3:]
+        # Renames and copies are reported as "<old path> -> <new path>".
+        if modification_type[0] in ("R", "C"): modified_path = modified_path.split(" -> ", 1)[1]
+        # Untracked directories are reported with a trailing slash, and only exist on disk if not deleted.
+        is_dir = modified_path.endswith("/") or os.path.isdir(os.path.join(path, modified_path))
+        modified_paths.append({
+            "path": modified_path,
+            "modification_type": modification_type,
+            "type": "directory" if is_dir else "file"
+        })
+    return modified_paths
+
+async def diff_status_async(diff_filter: str | None = None, path="./") -> List[str]:
+    diff_filter_args = [f"--diff-filter={ diff_filter }"] if diff_filter is not None else []
+    (out, err, exit_code) = await execute_async(["git", "diff", "--name-only", *diff_filter_args], cwd=path)
+    if exit_code != 0:
+        raise GitException(err)
+    return [line for line in out.splitlines() if line != ""]
+
+async def stage_files_async(files: str | List[str], path="./") -> List[Tuple[str,]]:
+    if isinstance(files, str): files = [files]
+
+    (out, err, exit_code) = await execute_async(["git", "add", "--verbose", *files], cwd=path)
+    if exit_code != 0:
+        raise InvalidGitRepositoryException()
+
+    return [line.split(" ", 1) for line in out.splitlines()]
+
+async def commit_async(summary: str | None, description: str | None = None, no_edit=False, path="./") -> str:
+    message_args = ["-m", summary] if summary is not None else []
+    description_args = ["-m", description] if description is not None else []
+    no_edit_args = ["--no-edit"] if no_edit else []
+    (out, err, exit_code) = await execute_async(
+        ["git", "commit", "--allow-empty", *no_edit_args, *message_args, *description_args],
+        cwd=path
+    )
+    if exit_code != 0:
+        raise GitException(out or err)
+
+    # `git commit` does return the short version of the generated commit, but we want to return the full version.
+    return await get_head_commit_id_async(path=path)
+
+async def push_async(remote_name: str, branch_name: str, path="./", timeout: float | None = None):
+    (out, err, exit_code) = await execute_async(["git", "push", remote_name, branch_name], cwd=path, timeout=timeout)
+    if exit_code != 0:
+        # Git push outputs remote (hook) messages to stderr.
+        raise GitException(err)
+
+async def reset_async(target: str, path="./"):
+    (out, err, exit_code) = await execute_async(["git", "reset", target], cwd=path)
+    if exit_code > 1:
+        raise GitException(err)
+
+async def restore_async(file: str, source: str | None = None, staged=False, worktree=False, path="./"):
+    source_args = [f"--source={ source }"] if source is not None else []
+    staged_args = ["--staged"] if staged else []
+    worktree_args = ["--worktree"] if worktree else []
+    (out, err, exit_code) = await execute_async(
+        ["git", "restore", *source_args, *staged_args, *worktree_args, "--", file],
+        cwd=path
+    )
+    if exit_code != 0:
+        raise GitException(err)
+
+async def rm_async(file: str, cached=False, path="./"):
+    cached_args = ["--cached"] if cached else []
+    (out, err, exit_code) = await execute_async(["git", "rm", *cached_args, "--", file], cwd=path)
+    if exit_code != 0:
+        raise GitException(err)
+
+async def merge_async(branch_name: str, ff_only=False, commit=True, path="./") -> List[str]:
+    """ Returns the conflicting paths of the merge, if any. """
+    if ff_only:
+        merge_args = ["--ff-only"]
+    elif not commit:
+        # A fast-forward never leaves anything to commit, so force a merge commit to be staged.
+        merge_args = ["--no-commit", "--no-ff"]
+    else:
+        merge_args = []
+    (out, err, exit_code) = await execute_async(["git", "merge", *merge_args, branch_name], cwd=path)
+    if exit_code != 0:
+        conflicts = await diff_status_async(diff_filter="U", path=path)
+        if len(conflicts) == 0:
+            raise GitException(err or out)
+        return conflicts
+    return []
+
+async def abort_merge_async(path="./"):
+    (out, err, exit_code) = await execute_async(["git", "merge", "--abort"], cwd=path)
+    if exit_code != 0:
+        raise GitException(err)
+
+async def delete_local_branch_async(branch_name: str, force=False, path="./"):
+    (out, err, exit_code) = await execute_async(["git", "branch", "-D" if force else "-d", branch_name], cwd=path)
+    if exit_code != 0:
+        raise GitException(err)
+
+async def stash_changes_async(path="./"):
+    (out, err, exit_code) = await execute_async(["git", "stash", "push"], cwd=path)
+    if exit_code != 0:
+        raise GitException(err)
+
+async def pop_stash_async(path="./"):
+    (out, err, exit_code) = await execute_async(["git", "stash", "pop"], cwd=path)
+    # Popping a stash that conflicts with the worktree exits non-zero, but the stash is still applied.
+    if exit_code != 0 and "CONFLICT" not in out:
+        raise GitException(err)
+
+async def drop_stash_async(path="./"):
+    (out, err, exit_code) = await execute_async(["git", "stash", "drop"], cwd=path)
+    if exit_code != 0:
+        raise GitException(err)
+
+async def credential_approve_async(credentials: str, path="./"):
+    (out, err, exit_code) = await execute_async(["git", "credential", "approve"], stdin_input=credentials, cwd=path)
+    if exit_code != 0:
+        raise GitException(err)
+
+async def set_config_async(key: str, value: str, add=False, path="./"):
+    add_args = ["--add"] if add else []
+    (out, err, exit_code) = await execute_async(["git", "config", "--local", *add_args, key, value], cwd=path)
+    if exit_code != 0:
+        raise GitException(err)
+
+async def unset_config_async(key: str, path="./"):
+    # Exit code 5 means that the key was already unset.
+    (out, err, exit_code) = await execute_async(["git", "config", "--local", "--unset-all", key], cwd=path)
+    if exit_code not in (0, 5):
+        raise GitException(err)
+
+async def get_ref_commit_id_async(ref: str, path="./") -> str | None:
+    """ Returns the commit a ref points to, or None if the ref doesn't exist. """
+    (out, err, exit_code) = await execute_async(["git", "rev-parse", "--quiet", "--verify", f"{ ref }^{{commit}}"], cwd=path)
+    if exit_code != 0:
+        return None
+    return out
+
+async def write_blob_to_file_async(revision: str, file: str, destination, path="./"):
+    """ Streams the content of `file` at `revision` to `destination`, without loading it into memory. """
+    try:
+        with open(destination, "wb") as f:
+            (out, err, exit_code) = await execute_async(["git", "cat-file", "blob", f"{ revision }:{ file }"], stdout=f, cwd=path)
+    except BaseException:
+        os.remove(destination)
+        raise
+    if exit_code != 0:
+        os.remove(destination)
+        raise GitException(err)
+
+async def ls_remote_async(remote_name: str, ref: str, path="./", timeout: float | None = None) -> str | None:
+    """ Returns the commit that `ref` points to on the remote (without fetching anything), or None if it doesn't exist. """
+    (out, err, exit_code) = await execute_async(["git", "ls-remote", remote_name, ref], cwd=path, timeout=timeout)
+    if exit_code != 0:
+        raise GitException(err)
+    for line in out.splitlines():
+        (commit_id, remote_ref) = line.split("\t", 1)
+        if remote_ref == ref: return commit_id
+    return None
+
+async def get_commit_infos_async(commit_ids: List[str], path="./") -> dict:
+    """ Resolves the author, committer and message of many commits using two git processes in total,
+    rather than two per commit (see `get_commit_info`). Commits that don't exist in the repository are left out. """
+    commit_ids = list(dict.fromkeys(commit_ids))
+    if len(commit_ids) == 0: return {}
+
+    # Filter out unknown commits first, since `git log` fails outright if any revision is bad.
+    (out, err, exit_code) = await execute_async(
+        ["git", "cat-file", "--batch-check=%(objectname) %(objecttype)"],
+        stdin_input="\n".join(commit_ids) + "\n",
+        cwd=path
+    )
+    if exit_code != 0:
+        raise InvalidGitRepositoryException(err)
+    # full commit id -> requested commit id. Output lines are in the same order as the input.
+    requested = {}
+    for commit_id, line in zip(commit_ids, out.split("\n")):
+        (object_name, object_type) = line.rsplit(" ", 1)
+        if object_type == "commit": requested[object_name] = commit_id
+    if len(requested) == 0: return {}
+
+    # Fields are NUL-separated, and -z terminates each commit with a NUL, since messages can contain anything but NULs.
+    fmt = "%H%x00%an%x00%ae%x00%cn%x00%ce%x00%B"
+    (out, err, exit_code) = await execute_async(
+        ["git", "log", "--no-walk=unsorted", "--stdin", "-z", f"--format={ fmt }"],
+        stdin_input="\n".join(requested.keys()) + "\n",
+        cwd=path
+    )
+    if exit_code != 0:
+        raise GitException(err)
+    fields = out.split("\0")
+    commit_infos = {}
+    for i in range(0, len(fields) - 5, 6):
+        [full_commit_id, author_name, author_email, committer_name, committer_email, message] = fields[i:i + 6]
+        commit_id = requested[full_commit_id]
+        commit_infos[commit_id] = {
+            "id": commit_id,
+            "message": message.rstrip("\n"),
+            "author_name": author_name,
+            "author_email": author_email,
+            "committer_name": committer_name,
+            "committer_email": committer_email
+        }
+    return commit_infos
+
+async def read_config_file_async(config_path) -> List[Tuple[str, str | None]]:
+    """ Returns the (key, value) entries of a config file in order. Keys are normalized by git
+    (section and variable names lowercased), and valueless (implicitly true) keys have a value of None. """
+    if not os.path.exists(config_path):
+        return []
+    (out, err, exit_code) = await execute_async(["git", "config", "--file", config_path, "--list", "-z"])
+    if exit_code != 0:
+        raise GitException(err)
+    entries = []
+    for entry in out.split("\0"):
+        if entry == "": continue
+        (key, newline, value) = entry.partition("\n")
+        entries.append((key, value if newline else None))
+    return entries
+
+async def _config_file_async(config_path, *args: str):
+    (out, err, exit_code) = await execute_async(["git", "config", "--file", config_path, *args])
+    if exit_code != 0:
+        raise GitException(err)
+
+async def apply_config_async(config_path, desired: dict[str, List[str]]) -> bool:
+    """ Makes the given keys of a config file hold exactly the given values (an empty list unsets a key).
+    The file is read once, and only the keys that differ are written, through `git config` (which writes under git's
+    own lock file), so every other entry, comment and bit of formatting is left as it was. Returns whether the file changed.
+    Keys must be given in git's normalized form (e.g. "core.sshcommand"). """
+    entries = await read_config_file_async(config_path)
+    current = {}
+    for (key, value) in entries:
+        if key in desired: current.setdefault(key, []).append(value)
+    changed = [key for key, values in desired.items() if current.get(key, []) != values]
+    if len(changed) == 0:
+        return False
+
+    os.makedirs(os.path.dirname(config_path), exist_ok=True)
+    for key in changed:
+        values = desired[key]
+        if len(values) == 0:
+            await _config_file_async(config_path, "--unset-all", key)
+            continue
+        await _config_file_async(config_path, "--replace-all", key, values[0])
+        for value in values[1:]:
+            await _config_file_async(config_path, "--add", key, value)
+    return True
+
+async def get_sparse_checkout_async(path="./") -> List[str] | None:
+    """ Returns the directories included by a (cone mode) sparse checkout, or None if the checkout isn't sparse. """
+    (out, err, exit_code) = await execute_async(["git", "config", "--bool", "core.sparseCheckout"], cwd=path)
+    if out != "true":
+        return None
+    (out, err, exit_code) = await execute_async(["git", "sparse-checkout", "list"], cwd=path)
+    if exit_code != 0:
+        raise GitException(err)
+    return [directory for directory in out.split("\n") if directory != ""]
+
+async def set_sparse_checkout_async(directories: List[str], path="./"):
+    """ Limit the working tree to the given directories (plus any files at the top level). """
+    (out, err, exit_code) = await execute_async(["git", "sparse-checkout", "set", "--cone", "--stdin"], stdin_input="\n".join(directories) + "\n", cwd=path)
+    if exit_code != 0:
+        raise GitException(err)
+
+async def disable_sparse_checkout_async(path="./"):
+    """ Restore the full working tree of a sparse checkout. """
+    (out, err, exit_code) = await execute_async(["git", "sparse-checkout", "disable"], cwd=path)
+    if exit_code != 0:
+        raise GitException(err)
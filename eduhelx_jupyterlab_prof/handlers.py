@@ -1,6 +1,9 @@
 import json
 import os
+import time
+import hashlib
 import shutil
+import multiprocessing
 import tornado
 import asyncio
 import traceback
@@ -9,29 +12,64 @@ from jupyter_server.base.handlers import APIHandler
 from jupyter_server.utils import url_path_join
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from enum import Enum
+from collections import OrderedDict
 from collections.abc import Iterable
+from typing import Any, Callable
 from gitignore_parser import parse_gitignore
 from .config import ExtensionConfig
-from eduhelx_utils.git import (
-    InvalidGitRepositoryException,
-    clone_repository, init_repository, fetch_repository,
-    get_tail_commit_id, get_repo_name, add_remote,
-    stage_files, commit, push, get_commit_info,
-    get_modified_paths, checkout, get_repo_root as get_git_repo_root,
-    get_head_commit_id, reset as git_reset, merge as git_merge,
-    abort_merge, delete_local_branch, is_ancestor_commit,
-    stash_changes, pop_stash, diff_status as git_diff_status,
-    restore as git_restore, rm as git_rm
+from .git import (
+    GitException, InvalidGitRepositoryException,
+    init_repository_async as init_repository, fetch_repository_async as fetch_repository,
+    add_remote_async as add_remote, stage_files_async as stage_files, commit_async as commit, push_async as push,
+    get_modified_paths_async as get_modified_paths, checkout_async as checkout,
+    get_repo_root_async as get_git_repo_root, get_head_commit_id_async as get_head_commit_id,
+    reset_async as git_reset, merge_async as git_merge, abort_merge_async as abort_merge,
+    delete_local_branch_async as delete_local_branch, is_ancestor_commit_async as is_ancestor_commit,
+    stash_changes_async as stash_changes, pop_stash_async as pop_stash, drop_stash_async as drop_stash, diff_status_async as git_diff_status,
+    restore_async as git_restore, rm_async as git_rm, credential_approve_async as credential_approve,
+    apply_config_async as apply_config, read_config_file_async as read_config_file,
+    get_ref_commit_id_async as get_ref_commit_id, write_blob_to_file_async as write_blob_to_file,
+    ls_remote_async as ls_remote, get_changed_paths_async as get_changed_paths, hash_files_async as hash_files, get_sparse_checkout_async as get_sparse_checkout,
+    set_sparse_checkout_async as set_sparse_checkout, disable_sparse_checkout_async as disable_sparse_checkout
 )
 from eduhelx_utils.api import Api, AuthType, APIException
-from eduhelx_utils.process import execute
-from .instructor_repo import InstructorClassRepo, NotInstructorClassRepositoryException
+from .process import execute_async
+from .instructor_repo import InstructorClassRepo, NotInstructorClassRepositoryException, generate_student_notebook
+from .repo_status import RepoStatusSnapshot
+from .notebook_index import NotebookIndex
+from .submissions import SubmissionsIndex
+from .commit_info import CommitInfoCache
+from .repo_lock import RepoLockRegistry, RepoLock
+from .sync_history import SyncHistory, SyncRun, SyncOutcome, ConflictResolution
+from .file_patterns import get_file_patterns
+from .ignored_files import IgnoredFilesIndex
+from .upstream_sync import UpstreamSyncScheduler, UpstreamSyncKind, IncomingPaths, classify_upstream_sync
+from .jobs import JobRegistry, JobState, Job
+from .events import EventBus, ChangeMonitor
+from .fanout import fan_out
+from .metadata_cache import MetadataCache
 from ._version import __version__
 
+class BootstrapStage(str, Enum):
+    STARTING = "starting"
+    CONFIGURING = "configuring"
+    CLONING = "cloning"
+    READY = "ready"
+    # Setup failed, but may succeed if tried again (e.g. the grader API timed out), which it will be.
+    RETRYING = "retrying"
+    # Setup failed in a way that trying again won't fix (e.g. the grader API refused the instructor's credentials).
+    FAILED = "failed"
+
 class AppContext:
     def __init__(self, serverapp):
         self.serverapp = serverapp
         self.config = ExtensionConfig(self.serverapp)
+        # The config as loaded at startup, which tunables are applied on top of.
+        self._base_config = self.config
+        self._tunables_mtime: int | None = None
         api_config = dict(
             api_url=self.config.GRADER_API_URL,
             user_onyen=self.config.USER_NAME,
@@ -50,11 +88,216 @@ class AppContext:
                 appstore_access_token=self.config.ACCESS_TOKEN,
                 auth_type=AuthType.APPSTORE_INSTRUCTOR
             )
+        self.notebook_index = NotebookIndex()
+        self.submissions_index = SubmissionsIndex()
+        # assignment id -> version of its cached submissions that the index is up to date with (None if it may not be),
+        # least recently requested first.
+        self._indexed_submissions: OrderedDict[int, int | None] = OrderedDict()
+        self.commit_infos = CommitInfoCache()
+        self.repo_locks = RepoLockRegistry()
+        # Opened once the repository's location is known (see get_sync_history).
+        self._sync_history: SyncHistory | None = None
+        self.ignored_files_index = IgnoredFilesIndex()
+        # Set up once the backend has finished bootstrapping the repository.
+        self.upstream_sync: UpstreamSyncScheduler | None = None
+        self.bootstrap_stage = BootstrapStage.STARTING
+        self.bootstrap_error: str | None = None
+        # Whether the instructor's repository has been cloned, even if the rest of setup isn't done (yet).
+        self.repository_cloned = False
+
+        self.jobs = JobRegistry()
+        self._notebook_generation_pool: ProcessPoolExecutor | None = None
+        self._notebook_generation_slots = asyncio.Semaphore(self.config.NOTEBOOK_GENERATION_WORKERS)
+
+        # Clients subscribe to change events instead of polling every resource themselves.
+        self.events = EventBus()
+        self.change_monitor = ChangeMonitor(self.events)
+        self.change_monitor.add_source("assignments", self._fingerprint_assignments, self.config.CHANGE_MONITOR_INTERVAL_SECONDS)
+        self.change_monitor.add_source("notebook_files", self._fingerprint_notebook_files, self.config.CHANGE_MONITOR_INTERVAL_SECONDS)
+        self.change_monitor.add_source("course", self._fingerprint_course, self.config.CHANGE_MONITOR_API_INTERVAL_SECONDS)
+
+        self.metadata = MetadataCache()
+        self.metadata.register("course", self.api.get_course, self.config.COURSE_CACHE_TTL_SECONDS)
+        self.metadata.register("assignments", self.api.get_my_assignments, self.config.ASSIGNMENTS_CACHE_TTL_SECONDS)
+        self.metadata.register("settings", self.api.get_settings, self.config.SETTINGS_CACHE_TTL_SECONDS)
+
+    def repo_lock(self, repo_root) -> RepoLock:
+        """ The lock that every operation on the repository's working tree/index should hold (see RepoLock). """
+        return self.repo_locks.get(repo_root)
+
+    def get_sync_history(self, repo_root: Path) -> SyncHistory:
+        if self._sync_history is None:
+            self._sync_history = SyncHistory(Path(repo_root) / InstructorClassRepo.SYNC_HISTORY_PATH, self.config.SYNC_HISTORY_MAX_RUNS)
+        return self._sync_history
+
+    def reload_tunables(self) -> None:
+        """ If the tunables file changed, swap in a new config with its values applied on top of the startup config. """
+        try:
+            mtime = os.stat(self._base_config.TUNABLES_FILE).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._tunables_mtime: return
+        self._tunables_mtime = mtime
+        try:
+            tunables = self._base_config.read_tunables_file() if mtime is not None else {}
+            config = self._base_config.with_tunables(tunables)
+        except Exception as e:
+            print("Failed to reload tunables, keeping the current config:", e)
+            return
+        self.config = config
+        if self.upstream_sync is not None:
+            self.upstream_sync.set_intervals(config.UPSTREAM_SYNC_INTERVAL, config.UPSTREAM_SYNC_MAX_INTERVAL)
+        print("Reloaded tunables:", tunables)
+
+    async def watch_tunables(self) -> None:
+        while True:
+            self.reload_tunables()
+            await asyncio.sleep(self._base_config.TUNABLES_RELOAD_INTERVAL_SECONDS)
+
+    def set_bootstrap_stage(self, stage: BootstrapStage, error: str | None = None) -> None:
+        self.bootstrap_stage = stage
+        self.bootstrap_error = error
+        self.events.publish("readiness", self.get_readiness())
+
+    def get_readiness(self) -> dict:
+        return {
+            "stage": self.bootstrap_stage.value,
+            "ready": self.bootstrap_stage == BootstrapStage.READY,
+            "cloned": self.repository_cloned,
+            "error": self.bootstrap_error
+        }
+
+    async def get_course(self):
+        return await self.metadata.get("course")
+
+    async def get_assignments(self):
+        return await self.metadata.get("assignments")
+
+    async def get_settings(self):
+        return await self.metadata.get("settings")
+
+    async def refresh_submissions(self, assignment_id: int) -> None:
+        """ Bring the submissions index up to date with the grader API (at most every SUBMISSIONS_CACHE_TTL_SECONDS).
+        Only the most recently requested SUBMISSIONS_MAX_CACHED_ASSIGNMENTS assignments are kept. """
+        name = f"submissions/{ assignment_id }"
+        if assignment_id not in self._indexed_submissions:
+            self.metadata.register(name, lambda: self.api.get_submissions(assignment_id), self.config.SUBMISSIONS_CACHE_TTL_SECONDS)
+            self._indexed_submissions[assignment_id] = None
+            while len(self._indexed_submissions) > self.config.SUBMISSIONS_MAX_CACHED_ASSIGNMENTS:
+                (evicted_id, _) = self._indexed_submissions.popitem(last=False)
+                self.metadata.unregister(f"submissions/{ evicted_id }")
+                self.submissions_index.remove(evicted_id)
+        self._indexed_submissions.move_to_end(assignment_id)
+
+        # Nothing to do unless the grader API was asked again since the index was last brought up to date.
+        (version, submissions) = await self.metadata.get_if_changed(name, self._indexed_submissions[assignment_id])
+        if submissions is None: return
+
+        commit_ids = [
+            submission["commit_id"]
+            for student_submissions in submissions.values()
+            for submission in student_submissions
+        ]
+        try:
+            commit_infos = await self.commit_infos.get_many(commit_ids, await self.get_repo_root())
+        except GitException:
+            # e.g. the repository hasn't been cloned yet. Submissions are still listed, just without commit details.
+            print("Failed to resolve submission commits:", traceback.format_exc())
+            commit_infos = {}
+        # Evicted by other requests in the meantime.
+        if assignment_id not in self._indexed_submissions: return
+        self.submissions_index.update(assignment_id, submissions, commit_infos)
+        # Commits that couldn't be resolved may be resolvable later (e.g. after a fetch), so keep checking until they are.
+        self._indexed_submissions[assignment_id] = version if all(commit_id in commit_infos for commit_id in commit_ids) else None
 
     async def get_repo_root(self):
-        course = await self.api.get_course()
+        course = await self.get_course()
         return InstructorClassRepo._compute_repo_root(course["name"])
 
+    @staticmethod
+    def _digest(value) -> str:
+        return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    async def _fingerprint_assignments(self) -> str:
+        values = await fan_out(
+            repo_root=self.get_repo_root(),
+            assignments=self.get_assignments(),
+            timeout=self.config.API_REQUEST_TIMEOUT_SECONDS
+        )
+        async with self.repo_lock(values["repo_root"]).read("change_monitor"):
+            modified_paths = await get_modified_paths(path=values["repo_root"])
+        return self._digest([modified_paths, values["assignments"]])
+
+    async def _fingerprint_notebook_files(self) -> str:
+        values = await fan_out(
+            repo_root=self.get_repo_root(),
+            assignments=self.get_assignments(),
+            timeout=self.config.API_REQUEST_TIMEOUT_SECONDS
+        )
+        _, etag = self.notebook_index.get_notebooks(values["repo_root"].resolve(), values["assignments"])
+        return etag
+
+    async def _fingerprint_course(self) -> str:
+        values = await fan_out(
+            instructor=self.api.get_my_user(),
+            students=self.api.list_students(),
+            course=self.get_course(),
+            timeout=self.config.API_REQUEST_TIMEOUT_SECONDS
+        )
+        return self._digest(values)
+
+    @property
+    def notebook_generation_pool(self) -> ProcessPoolExecutor:
+        if self._notebook_generation_pool is None:
+            # Spawn rather than fork, since forking the (multithreaded) server process isn't safe.
+            self._notebook_generation_pool = ProcessPoolExecutor(
+                max_workers=self.config.NOTEBOOK_GENERATION_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._notebook_generation_pool
+
+    def submit_student_notebook_job(self, course, assignments, assignment_id: int, inputs_read_after: float | None = None) -> Job:
+        """ Generate an assignment's student notebook in a worker process. If generation is already
+        in flight for the assignment, the in-flight job is returned instead of starting another.
+        Unless `inputs_read_after` is given: then the in-flight job is only returned if it hadn't started
+        (and read the master notebook) before that time. Otherwise, a fresh job is queued behind it.
+        Otter runs against a staging directory, so the repository's write lock is only held to move its output into place. """
+        repo_root = InstructorClassRepo._compute_repo_root(course["name"])
+        async def run(job: Job):
+            loop = asyncio.get_event_loop()
+            staging_path = InstructorClassRepo.make_staging_directory(repo_root)
+            try:
+                job.update(progress="Waiting for a worker")
+                async with self._notebook_generation_slots:
+                    job.update(state=JobState.RUNNING, started_at=time.time(), progress="Generating student notebook")
+                    try:
+                        generated = await loop.run_in_executor(
+                            self.notebook_generation_pool,
+                            generate_student_notebook,
+                            course, assignments, assignment_id, staging_path
+                        )
+                    except BrokenProcessPool:
+                        # A worker died (e.g. OOM), so the pool can't be used anymore.
+                        self._notebook_generation_pool = None
+                        raise
+                if generated is not None:
+                    job.update(progress="Waiting for the repository")
+                    async with self.repo_lock(repo_root).write("install_student_notebook"):
+                        instructor_repo = InstructorClassRepo.from_assignment_no_path(course, assignments, assignment_id)
+                        await loop.run_in_executor(None, instructor_repo.install_student_notebook, generated)
+            finally:
+                # The staged assignment is all links, but there may be a lot of them.
+                await loop.run_in_executor(None, shutil.rmtree, staging_path, True)
+            return { "generated": generated is not None }
+
+        def reuse(job: Job) -> bool:
+            return inputs_read_after is None or job.started_at is None or job.started_at >= inputs_read_after
+
+        return self.jobs.submit("student_notebook", str(assignment_id), run, reuse=reuse)
+
+# Default for BaseHandler.get_int_argument, for arguments that the request must include.
+REQUIRED_ARGUMENT = object()
+
 class BaseHandler(APIHandler):
     context: AppContext = None
 
@@ -65,7 +308,46 @@ class BaseHandler(APIHandler):
     @property
     def api(self) -> Api:
         return self.context.api
+
+    async def fan_out(self, **calls):
+        """ Run independent calls concurrently, bounded by the API request timeout. """
+        return await fan_out(timeout=self.config.API_REQUEST_TIMEOUT_SECONDS, **calls)
     
+    def get_int_argument(self, name: str, default: Any = REQUIRED_ARGUMENT) -> Any:
+        """ Like get_argument, but parses the argument as an integer, responding 400 if it isn't one. """
+        value = self.get_argument(name) if default is REQUIRED_ARGUMENT else self.get_argument(name, None)
+        if value is None: return default
+        try:
+            return int(value)
+        except ValueError:
+            raise tornado.web.HTTPError(400, f"Argument { name } must be an integer")
+
+    async def finish_job(self, job: Job):
+        """ Respond with the status of a job. If the client passes the `since_version` of the job it last saw,
+        long-poll until the job changes (or LONG_POLLING_TIMEOUT_SECONDS elapse) before responding. """
+        since_version = self.get_int_argument("since_version", None)
+        if since_version is not None:
+            deadline = time.monotonic() + self.config.LONG_POLLING_TIMEOUT_SECONDS
+            while time.monotonic() < deadline:
+                # Wake up periodically to drop the wait if the client has gone away.
+                timeout = min(self.config.LONG_POLLING_SLEEP_INTERVAL_SECONDS, deadline - time.monotonic())
+                if await job.wait_for_change(since_version, timeout): break
+                if self.request.connection.stream.closed(): return
+        self.finish(json.dumps(job.to_dict()))
+
+    def finish_with_etag(self, etag: str, build_body: Callable[[], str | Any]) -> None:
+        """ Respond with the body built by `build_body`, unless the client's copy (If-None-Match) is already
+        the version identified by `etag`, in which case respond 304 without building the body at all.
+        Only worth it where `etag` is cheaper to come by than the body. Otherwise, Tornado already
+        answers GETs with 304 by hashing the body when it's finished (see RequestHandler.compute_etag). """
+        self.set_header("Etag", f'"{ etag }"')
+        if self.check_etag_header():
+            self.set_status(304)
+            self.finish()
+            return
+        body = build_body()
+        self.finish(body if isinstance(body, str) else json.dumps(body))
+
     # Default error handling
     def write_error(self, status_code, **kwargs):
         # If exc_info is present, the error is unhandled.
@@ -75,17 +357,23 @@ class BaseHandler(APIHandler):
         if isinstance(exc, APIException):
             self.set_status(status_code)
             self.finish(exc.response.text)
+        elif isinstance(exc, tornado.web.HTTPError) and exc.log_message:
+            self.finish(json.dumps({
+                "message": exc.log_message
+            }))
 
 
 class CourseAndInstructorAndStudentsHandler(BaseHandler):
     async def get_value(self):
-        instructor = await self.api.get_my_user()
-        students = await self.api.list_students()
-        course = await self.api.get_course()
+        values = await self.fan_out(
+            instructor=self.api.get_my_user(),
+            students=self.api.list_students(),
+            course=self.context.get_course()
+        )
         return json.dumps({
-            "instructor": instructor,
-            "students": students,
-            "course": course
+            "instructor": values["instructor"],
+            "students": values["students"],
+            "course": values["course"]
         })
     
     @tornado.web.authenticated
@@ -96,8 +384,11 @@ class AssignmentsHandler(BaseHandler):
     async def get_value(self, current_path: str):
         current_path_abs = os.path.realpath(current_path)
 
-        assignments = await self.api.get_my_assignments()
-        course = await self.api.get_course()
+        values = await self.fan_out(
+            assignments=self.context.get_assignments(),
+            course=self.context.get_course()
+        )
+        assignments, course = values["assignments"], values["course"]
 
         value = {
             "current_assignment": None,
@@ -109,6 +400,14 @@ class AssignmentsHandler(BaseHandler):
         except Exception:
             return json.dumps(value)
 
+        current_assignment = instructor_repo.current_assignment
+
+        # Take a single status snapshot of the repository and bucket it by assignment,
+        # rather than running `git status` over the whole repository for every assignment.
+        async with self.context.repo_lock(instructor_repo.repo_root).read("assignments"):
+            status = await RepoStatusSnapshot.take(instructor_repo.repo_root)
+        staged_changes = status.bucket_by_assignment(assignments)
+
         # Add absolute path to assignment so that the frontend
         # extension knows how to open the assignment without having
         # to know the repository root.
@@ -123,42 +422,15 @@ class AssignmentsHandler(BaseHandler):
             # The cwd is the root in the frontend, so treat the path as such.
             # NOTE: IMPORTANT: this field is NOT absolute on the server. It's only the absolute path for the webapp.
             assignment["absolute_directory_path"] = os.path.join("/", rel_assignment_path)
-            assignment["staged_changes"] = []
-            for modified_path in get_modified_paths(path=instructor_repo.repo_root):
-                full_modified_path = instructor_repo.repo_root / modified_path["path"]
-                abs_assn_path = instructor_repo.repo_root / assignment["directory_path"]
-                try:
-                    path_relative_to_assn = full_modified_path.relative_to(abs_assn_path)
-                    modified_path["path_from_repo"] = modified_path["path"]
-                    modified_path["path_from_assn"] = str(path_relative_to_assn)
-                    assignment["staged_changes"].append(modified_path)
-                except ValueError:
-                    # This path is not part of the assignment directory
-                    pass
+            assignment["staged_changes"] = staged_changes[assignment["id"]]
 
         value["assignments"] = assignments
         
-        current_assignment = instructor_repo.current_assignment
         if current_assignment:
-            matches_gitignore = parse_gitignore(instructor_repo.current_assignment_path / ".gitignore")
-            current_assignment["ignored_files"] = [
-                str(file.relative_to(instructor_repo.current_assignment_path))
-                for file in instructor_repo.current_assignment_path.rglob("*")
-                if matches_gitignore(file)
-            ]
-            
-            current_assignment["student_submissions"] = await self.api.get_submissions(current_assignment["id"])
-            for student in current_assignment["student_submissions"]:
-                for i, submission in enumerate(current_assignment["student_submissions"][student]):
-                    if i == 0: submission["active"] = True
-                    submission["commit"] = {
-                        "id": submission["commit_id"],
-                        "message": "",
-                        "author_name": "",
-                        "author_email": "",
-                        "committer_name": "",
-                        "committer_email": ""
-                    }
+            current_assignment["ignored_files"] = self.context.ignored_files_index.get_ignored_files(
+                instructor_repo.current_assignment_path
+            )
+            # Submissions are served separately (see StudentSubmissionsHandler), so that this stays small.
 
         value["current_assignment"] = current_assignment
         return json.dumps(value)
@@ -173,15 +445,17 @@ class AssignmentsHandler(BaseHandler):
         name = self.get_argument("name")
         data = self.get_json_body()
         
-        assignments = await self.api.get_my_assignments()
+        assignments = await self.context.get_assignments()
         assignment = [assignment for assignment in assignments if assignment["name"] == name][0]
 
         await self.api.update_assignment(name, **data)
+        self.context.metadata.invalidate("assignments")
+        self.context.events.publish("assignments")
         if "master_notebook_path" in data:
             await self.update_gitignore_master_notebook(assignment, data["master_notebook_path"])
 
     async def update_gitignore_master_notebook(self, assignment, master_notebook_path):
-        course = await self.api.get_course()
+        course = await self.context.get_course()
         
         repo_root = InstructorClassRepo._compute_repo_root(course["name"])
         assignment_gitignore_path: Path = repo_root / assignment["directory_path"] / ".gitignore"
@@ -210,14 +484,18 @@ class AssignmentsHandler(BaseHandler):
 class SubmissionHandler(BaseHandler):
     @tornado.web.authenticated
     async def post(self):
+        # Anything the instructor saved before submitting has to make it into the student notebook.
+        requested_at = time.time()
         data = json.loads(self.request.body)
         submission_summary: str = data["summary"]
         current_path: str = data["current_path"]
         current_path_abs = os.path.realpath(current_path)
 
-        instructor = await self.api.get_my_user()
-        assignments = await self.api.get_my_assignments()
-        course = await self.api.get_course()
+        values = await self.fan_out(
+            assignments=self.context.get_assignments(),
+            course=self.context.get_course()
+        )
+        assignments, course = values["assignments"], values["course"]
 
         try:
             instructor_repo = InstructorClassRepo(course, assignments, current_path_abs)
@@ -245,9 +523,15 @@ class SubmissionHandler(BaseHandler):
         current_assignment = instructor_repo.current_assignment
 
         try:
-            instructor_repo = InstructorClassRepo(course, assignments, current_assignment_path)
             # We only create a student version for autograded assignments.
-            if not current_assignment["manual_grading"]: instructor_repo.create_student_notebook()
+            # If generation is already in flight for the assignment (e.g. started from the assignment panel), reuse it,
+            # unless it read the master notebook before this request arrived.
+            # Generation takes the repository's write lock itself to put the notebook in place, so it has to finish before we take it below.
+            if not current_assignment["manual_grading"]:
+                await self.context.submit_student_notebook_job(
+                    course, assignments, current_assignment["id"],
+                    inputs_read_after=requested_at
+                ).wait()
         except Exception as e:
             self.set_status(400)
             self.finish(json.dumps({
@@ -257,88 +541,138 @@ class SubmissionHandler(BaseHandler):
             }))
             return
 
-        rollback_id = get_head_commit_id(path=instructor_repo.repo_root)
-        stage_files(".", path=current_assignment_path)
+        # Stage, commit and push (or roll back) without anything else touching the repository in between.
+        async with self.context.repo_lock(instructor_repo.repo_root).write("submit_assignment"):
+            rollback_id = await get_head_commit_id(path=instructor_repo.repo_root)
+            await stage_files(".", path=current_assignment_path)
 
-        # Instead of annoying professors by constantly asking them to update their gitignore,
-        # we can reset protected files before hitting the pre-receive hook.
-        # for file in instructor_repo.get_protected_file_paths(instructor_repo.current_assignment):
-        #     git_reset(file, path=current_assignment_path)
+            # Instead of annoying professors by constantly asking them to update their gitignore,
+            # we can reset protected files before hitting the pre-receive hook.
+            # staged_paths = [f["path"] for f in await get_modified_paths(path=instructor_repo.repo_root)]
+            # for file in instructor_repo.get_protected_file_paths(instructor_repo.current_assignment, staged_paths):
+            #     git_reset(file, path=instructor_repo.repo_root)
             
         
-        try:
-            commit_id = commit(
-                submission_summary,
-                None,
-                path=current_assignment_path
-            )
-        except Exception as e:
-            # If the commit fails, reset and abort.
-            git_reset(".", path=current_assignment_path)
-            self.set_status(500)
-            self.finish(str(e))
-            return
-        
-        try:
-            push(InstructorClassRepo.ORIGIN_REMOTE_NAME, InstructorClassRepo.MAIN_BRANCH_NAME, path=current_assignment_path)
-            self.finish()
-        except Exception as e:
-            # If the push fails, but we've already committed,
-            # rollback the commit and abort.
-            git_reset(rollback_id, path=instructor_repo.repo_root)
-
-            remote_echos = [line.partition("remote:")[2].strip() for line in str(e).splitlines() if line.strip().startswith("remote:")]
-            if len(remote_echos) > 0:
-                # Rejected by a Git hook
-                self.set_status(409)
-                self.finish(json.dumps(remote_echos))
-            else:
+            try:
+                commit_id = await commit(
+                    submission_summary,
+                    None,
+                    path=current_assignment_path
+                )
+            except Exception as e:
+                # If the commit fails, reset and abort.
+                await git_reset(".", path=current_assignment_path)
                 self.set_status(500)
                 self.finish(str(e))
+                return
+        
+            try:
+                await push(
+                    InstructorClassRepo.ORIGIN_REMOTE_NAME,
+                    InstructorClassRepo.MAIN_BRANCH_NAME,
+                    path=current_assignment_path,
+                    timeout=self.config.GIT_NETWORK_TIMEOUT_SECONDS
+                )
+                self.context.events.publish("assignments")
+                self.finish()
+            except Exception as e:
+                # If the push fails, but we've already committed,
+                # rollback the commit and abort.
+                await git_reset(rollback_id, path=instructor_repo.repo_root)
+
+                remote_echos = [line.partition("remote:")[2].strip() for line in str(e).splitlines() if line.strip().startswith("remote:")]
+                if len(remote_echos) > 0:
+                    # Rejected by a Git hook
+                    self.set_status(409)
+                    self.finish(json.dumps(remote_echos))
+                else:
+                    self.set_status(500)
+                    self.finish(str(e))
 
 class StudentNotebookHandler(BaseHandler):
     @tornado.web.authenticated
     async def post(self):
+        requested_at = time.time()
         data = self.get_json_body()
         assignment_id = data["assignment_id"]
         
-        course = await self.api.get_course()
-        assignments = await self.api.get_my_assignments()
-        
-        try:
-            instructor_repo = InstructorClassRepo.from_assignment_no_path(course, assignments, assignment_id)
-            instructor_repo.create_student_notebook()
-        except Exception as e:
+        values = await self.fan_out(
+            course=self.context.get_course(),
+            assignments=self.context.get_assignments()
+        )
+        course, assignments = values["course"], values["assignments"]
+
+        if not any(assignment["id"] == assignment_id for assignment in assignments):
             self.set_status(400)
             self.finish(json.dumps({
                 "message": "Failed to generate student version of assignment notebook",
-                "error": str(e),
+                "error": f"Assignment { assignment_id } does not exist",
                 "error_code": "NOTEBOOK_GENERATION"
             }))
             return
 
+        # Generation runs in the background, the client follows it through the job status endpoint.
+        job = self.context.submit_student_notebook_job(course, assignments, assignment_id, inputs_read_after=requested_at)
+        self.set_status(202)
+        self.finish(json.dumps(job.to_dict()))
+
+class JobStatusHandler(BaseHandler):
+    @tornado.web.authenticated
+    async def get(self):
+        job_id = self.get_argument("job_id")
+        job = self.context.jobs.get(job_id)
+        if job is None:
+            self.set_status(404)
+            self.finish(json.dumps({
+                "message": f"Job { job_id } does not exist"
+            }))
+            return
+        await self.finish_job(job)
+
 """ This is used for selecting the graded notebook. """
 class NotebookFilesHandler(BaseHandler):
     @tornado.web.authenticated
     async def get(self):
-        course = await self.api.get_course()
-        assignments = await self.api.get_my_assignments()
-
-        assignment_notebooks = {}
-        for assignment in assignments:
-            repo_root = InstructorClassRepo._compute_repo_root(course["name"]).resolve()
-            assignment_path = repo_root / assignment["directory_path"]
-
-            notebooks = [path.relative_to(assignment_path) for path in assignment_path.rglob("*.ipynb")]
-            notebooks = [path for path in notebooks if ".ipynb_checkpoints" not in path.parts and not path.name.endswith("-student.ipynb") ]
-            # Sort by nestedness, then alphabetically
-            notebooks.sort(key=lambda path: (len(path.parents), str(path)))
+        values = await self.fan_out(
+            course=self.context.get_course(),
+            assignments=self.context.get_assignments()
+        )
+        course, assignments = values["course"], values["assignments"]
 
-            assignment_notebooks[assignment["id"]] = [str(path) for path in notebooks]
+        repo_root = InstructorClassRepo._compute_repo_root(course["name"]).resolve()
+        assignment_notebooks, etag = self.context.notebook_index.get_notebooks(repo_root, assignments)
 
-        self.finish(json.dumps({
+        # The index's version already identifies the listing, so there's no need to hash it.
+        self.finish_with_etag(etag, lambda: {
             "notebooks": assignment_notebooks
-        }))
+        })
+
+""" Student submissions of an assignment, paginated by student (see SubmissionsIndex.get_page).
+Pass the `since_version` of a previous listing to only get the students whose submissions changed. """
+class StudentSubmissionsHandler(BaseHandler):
+    @tornado.web.authenticated
+    async def get(self):
+        assignment_id = self.get_int_argument("assignment_id")
+        since_version = self.get_argument("since_version", None)
+        student = self.get_argument("student", None)
+        cursor = self.get_argument("cursor", None)
+        limit = self.get_int_argument("limit", self.config.SUBMISSIONS_PAGE_SIZE)
+        if limit <= 0:
+            raise tornado.web.HTTPError(400, "Argument limit must be positive")
+        limit = min(limit, self.config.SUBMISSIONS_MAX_PAGE_SIZE)
+
+        await self.context.refresh_submissions(assignment_id)
+        # A page only depends on the index's version and the arguments, so it isn't built if the client already has it.
+        etag = hashlib.sha1(json.dumps([
+            self.context.submissions_index.get_version(assignment_id), since_version, student, cursor, limit
+        ]).encode("utf-8")).hexdigest()
+        self.finish_with_etag(etag, lambda: self.context.submissions_index.get_page(
+            assignment_id,
+            since_version=since_version,
+            student=student,
+            cursor=cursor,
+            limit=limit
+        ))
 
 class RestoreFileHandler(BaseHandler):
     @tornado.web.authenticated
@@ -346,22 +680,84 @@ class RestoreFileHandler(BaseHandler):
         data = self.get_json_body()
         path_from_repo_root: str = data["path_from_repo_root"]
 
-        course = await self.api.get_course()
+        course = await self.context.get_course()
         repo_root = InstructorClassRepo._compute_repo_root(course["name"])
         
-        git_restore(path_from_repo_root, source="HEAD", staged=True, worktree=True, path=repo_root)
+        async with self.context.repo_lock(repo_root).write("restore_file"):
+            await git_restore(path_from_repo_root, source="HEAD", staged=True, worktree=True, path=repo_root)
+        self.context.events.publish("assignments")
         self.finish()
 
 class SyncToLMSHandler(BaseHandler):
     @tornado.web.authenticated
     async def post(self):
         await self.api.lms_downsync()
+        # The downsync pulls course and assignment data from the LMS.
+        self.context.metadata.invalidate("course", "assignments")
+        self.context.events.publish("course")
+        self.context.events.publish("assignments")
         self.finish()
 
-class GradeAssignmentHandler(BaseHandler):
-    # assignment_id -> job id
-    GRADING_JOBS = {}
+""" Server-sent event stream of change notifications. Each event is named after the resource that changed
+("assignments", "course", "notebook_files", "upstream_sync"), so that the client knows what to refetch. """
+class EventsHandler(BaseHandler):
+    @tornado.web.authenticated
+    async def get(self):
+        self.set_header("Content-Type", "text/event-stream")
+        self.set_header("Cache-Control", "no-cache")
+        queue = self.context.events.subscribe()
+        try:
+            # Let the client know that it's connected (and should refetch anything it may have missed).
+            self.write("event: connected\ndata: null\n\n")
+            await self.flush()
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=self.config.EVENTS_KEEPALIVE_SECONDS)
+                    self.write(f"event: { event.topic }\ndata: { json.dumps(event.data) }\n\n")
+                except asyncio.TimeoutError:
+                    # Comment lines keep proxies from dropping an idle connection.
+                    self.write(": keepalive\n\n")
+                await self.flush()
+        except tornado.iostream.StreamClosedError:
+            pass
+        finally:
+            self.context.events.unsubscribe(queue)
+
+""" Where the backend is in bootstrapping the instructor's repository (see BootstrapStage). """
+class ReadinessHandler(BaseHandler):
+    @tornado.web.authenticated
+    async def get(self):
+        self.finish(json.dumps(self.context.get_readiness()))
+
+""" Lock state and lock wait times of each repository (see RepoLock). """
+class RepoLockMetricsHandler(BaseHandler):
+    @tornado.web.authenticated
+    async def get(self):
+        self.finish(json.dumps(self.context.repo_locks.to_dict()))
 
+""" Recent upstream syncs, most recent first: their phases and timings, and how merge conflicts were resolved (see SyncRun). """
+class SyncHistoryHandler(BaseHandler):
+    @tornado.web.authenticated
+    async def get(self):
+        course = await self.context.get_course()
+        repo_root = InstructorClassRepo._compute_repo_root(course["name"])
+        self.finish(json.dumps(self.context.get_sync_history(repo_root).to_list()))
+
+class SyncUpstreamHandler(BaseHandler):
+    @tornado.web.authenticated
+    async def post(self):
+        if self.context.upstream_sync is None:
+            self.set_status(503)
+            self.finish(json.dumps({
+                "message": "Repository is still being set up"
+            }))
+            return
+        upstream_moved = await self.context.upstream_sync.sync_now()
+        self.finish(json.dumps({
+            "upstream_moved": upstream_moved
+        }))
+
+class GradeAssignmentHandler(BaseHandler):
     @tornado.web.authenticated
     async def post(self):
         data = self.get_json_body()
@@ -369,8 +765,11 @@ class GradeAssignmentHandler(BaseHandler):
         current_path_abs = os.path.realpath(current_path)
 
         try:
-            course = await self.api.get_course()
-            assignments = await self.api.get_my_assignments()
+            values = await self.fan_out(
+                course=self.context.get_course(),
+                assignments=self.context.get_assignments()
+            )
+            course, assignments = values["course"], values["assignments"]
             repo = InstructorClassRepo(course, assignments, current_path_abs)
             if repo.current_assignment is None: raise Exception()
         except Exception:
@@ -380,33 +779,55 @@ class GradeAssignmentHandler(BaseHandler):
             })
             return
         
-        master_notebook_path = repo.current_assignment["master_notebook_path"]
-        try:
-            with open(repo.current_assignment_path / master_notebook_path, "r") as f:
-                master_notebook_content = f.read()
-        except FileNotFoundError:
+        master_notebook_path = repo.current_assignment_path / repo.current_assignment["master_notebook_path"]
+        otter_config_path = repo.current_assignment_path / "otter_grading_config.json"
+        if not master_notebook_path.exists():
             self.set_status(404)
             self.finish({
-                'message': f'Master notebook "{ master_notebook_path }" does not exist in assignment directory'
+                'message': f'Master notebook "{ repo.current_assignment["master_notebook_path"] }" does not exist in assignment directory'
             })
-        try: 
-            with open(repo.current_assignment_path / "otter_grading_config.json", "r") as f:
-                otter_config_content = f.read()
-        except FileNotFoundError:
+            return
+        if not otter_config_path.exists():
             self.set_status(404)
             self.finish({
                 'message': 'Grading config "otter_grading_config.json" does not exist in assignment directory'
             })
+            return
+
+        assignment_name = repo.current_assignment["name"]
+        async def run(job: Job):
+            job.update(state=JobState.RUNNING, started_at=time.time(), progress="Dispatching grading run")
+            with open(master_notebook_path, "r") as f:
+                master_notebook_content = f.read()
+            with open(otter_config_path, "r") as f:
+                otter_config_content = f.read()
+            await self.api.grade_assignment(assignment_name, master_notebook_content, otter_config_content)
+
+        # If grading is already being dispatched for the assignment, this returns the in-flight job.
+        job = self.context.jobs.submit("grading", str(repo.current_assignment["id"]), run)
+        self.set_status(202)
+        self.finish(json.dumps(job.to_dict()))
 
-        await self.api.grade_assignment(repo.current_assignment["name"], master_notebook_content, otter_config_content)
+    """ Get the most recent grading job of an assignment. """
+    @tornado.web.authenticated
+    async def get(self):
+        assignment_id = self.get_argument("assignment_id")
+        job = self.context.jobs.get_latest("grading", assignment_id)
+        if job is None:
+            self.finish(json.dumps(None))
+            return
+        await self.finish_job(job)
 
 
 class SettingsHandler(BaseHandler):
     @tornado.web.authenticated
     async def get(self):
         server_version = str(__version__)
-        settings = await self.api.get_settings()
-        repo_root = await self.context.get_repo_root()
+        values = await self.fan_out(
+            settings=self.context.get_settings(),
+            repo_root=self.context.get_repo_root()
+        )
+        settings, repo_root = values["settings"], values["repo_root"]
 
         self.finish(json.dumps({
             "serverVersion": server_version,
@@ -420,15 +841,35 @@ async def create_repo_root_if_not_exists(context: AppContext) -> None:
     if not repo_root.exists():
         repo_root.mkdir(parents=True)
 
+async def create_ssh_identity_if_not_exists(ssh_config_dir: Path) -> None:
+    ssh_identity_file = ssh_config_dir / "id_gitea"
+    ssh_public_key_file = ssh_config_dir / "id_gitea.pub"
+    if ssh_identity_file.exists(): return
+
+    ssh_config_dir.mkdir(parents=True, exist_ok=True)
+    os.chmod(ssh_config_dir, 0o700)
+    # Ed25519 keys generate near-instantly, compared to RSA.
+    (out, err, exit_code) = await execute_async(["ssh-keygen", "-t", "ed25519", "-f", ssh_identity_file, "-N", ""])
+    if exit_code != 0:
+        raise Exception(f"Failed to generate SSH key: { err }")
+    os.chmod(ssh_public_key_file, 0o444)
+    os.chmod(ssh_identity_file, 0o600)
+
 async def create_ssh_config_if_not_exists(context: AppContext, course) -> None:
-    course = await context.api.get_course()
-    settings = await context.api.get_settings()
     repo_root = InstructorClassRepo._compute_repo_root(course["name"]).resolve()
     ssh_config_dir = repo_root / ".ssh"
     ssh_config_file = ssh_config_dir / "config"
     ssh_identity_file = ssh_config_dir / "id_gitea"
     ssh_public_key_file = ssh_config_dir / "id_gitea.pub"
 
+    # Generate the key while the settings are being fetched, since it doesn't depend on them.
+    values = await fan_out(
+        settings=context.get_settings(),
+        identity=create_ssh_identity_if_not_exists(ssh_config_dir),
+        timeout=context.config.API_REQUEST_TIMEOUT_SECONDS
+    )
+    settings = values["settings"]
+
     ssh_public_url = course["master_remote_url"]
     if not urlparse(ssh_public_url).scheme:
         ssh_public_url = "ssh://" + ssh_public_url
@@ -445,12 +886,6 @@ async def create_ssh_config_if_not_exists(context: AppContext, course) -> None:
     ssh_port = ssh_private_url_parsed.port or 2222
     ssh_user = ssh_private_url_parsed.username or "git"
     
-    if not ssh_identity_file.exists():
-        ssh_config_dir.mkdir(parents=True, exist_ok=True)
-        execute(["chmod", "700", ssh_config_dir])
-        execute(["ssh-keygen", "-t", "rsa", "-f", ssh_identity_file, "-N", ""])
-        execute(["chmod", "444", ssh_public_key_file])
-        execute(["chmod", "600", ssh_identity_file])
     with open(ssh_config_file, "w+") as f:
         # Host (public Gitea URL) is rewritten as an alias to HostName (private ssh URL)
         f.write( 
@@ -467,22 +902,51 @@ async def create_ssh_config_if_not_exists(context: AppContext, course) -> None:
         public_key = f.read()
         await context.api.set_ssh_key("jlp-client", public_key)
 
-async def clone_repo_if_not_exists(context: AppContext, course, instructor) -> None:
-    repo_root = InstructorClassRepo._compute_repo_root(course["name"])
+async def is_repo_cloned(repo_root: Path) -> bool:
+    """ Whether the repository was cloned all the way through (i.e. its main branch was checked out). """
     try:
-        get_git_repo_root(path=repo_root)
+        await get_git_repo_root(path=repo_root)
     except InvalidGitRepositoryException:
-        """ This could just be an outright clone, but to stay consistent with how JLS fetches,
-        we will also fetch here.
-        """
-        master_repository_url = course["master_remote_url"]
-        init_repository(repo_root)
-        await set_git_authentication(context, course, instructor)
-        add_remote(InstructorClassRepo.ORIGIN_REMOTE_NAME, master_repository_url, path=repo_root)
-        fetch_repository(InstructorClassRepo.ORIGIN_REMOTE_NAME, path=repo_root)
-        checkout(f"{ InstructorClassRepo.MAIN_BRANCH_NAME }", path=repo_root)
-        
-        
+        return False
+    return await get_ref_commit_id(InstructorClassRepo.MAIN_BRANCH_NAME, path=repo_root) is not None
+
+async def clone_repo_if_not_exists(context: AppContext, course, instructor) -> None:
+    repo_root = InstructorClassRepo._compute_repo_root(course["name"])
+    if await is_repo_cloned(repo_root): return
+    # This could just be an outright clone, but to stay consistent with how JLS fetches, we will also fetch here.
+    async with context.repo_lock(repo_root).write("clone"):
+        await clone_repo(context, course, instructor, repo_root)
+
+async def clone_repo(context: AppContext, course, instructor, repo_root: Path) -> None:
+    """ Safe to rerun if a previous attempt didn't get all the way through (e.g. the fetch timed out). """
+    master_repository_url = course["master_remote_url"]
+    await init_repository(repo_root)
+    await set_git_authentication(context, course, instructor)
+    remote_url_key = f"remote.{ InstructorClassRepo.ORIGIN_REMOTE_NAME }.url"
+    if not any(key == remote_url_key for (key, _) in await read_config_file(repo_root / ".git" / "config")):
+        await add_remote(InstructorClassRepo.ORIGIN_REMOTE_NAME, master_repository_url, path=repo_root)
+    await fetch_repository(
+        InstructorClassRepo.ORIGIN_REMOTE_NAME,
+        path=repo_root,
+        timeout=context.config.GIT_NETWORK_TIMEOUT_SECONDS,
+        depth=context.config.CLONE_DEPTH or None,
+        filter=context.config.CLONE_FILTER or None
+    )
+    # Set up before checking out, so that files outside of it are never downloaded (with a partial clone) or written.
+    await update_sparse_checkout(context, repo_root)
+    await checkout(f"{ InstructorClassRepo.MAIN_BRANCH_NAME }", path=repo_root)
+
+async def update_sparse_checkout(context: AppContext, repo_root: Path) -> None:
+    """ If sparse checkouts are enabled, limit the working tree to the assignment directories.
+    Otherwise, restore the full working tree of a repository that was checked out sparsely before. """
+    current_directories = await get_sparse_checkout(path=repo_root)
+    if not context.config.SPARSE_CHECKOUT:
+        if current_directories is not None: await disable_sparse_checkout(path=repo_root)
+        return
+    assignments = await context.get_assignments()
+    directories = sorted({ assignment["directory_path"] for assignment in assignments })
+    if current_directories != directories:
+        await set_sparse_checkout(directories, path=repo_root)
 
 async def set_git_authentication(context: AppContext, course, instructor) -> None:
     repo_root = InstructorClassRepo._compute_repo_root(course["name"]).resolve()
@@ -494,50 +958,20 @@ async def set_git_authentication(context: AppContext, course, instructor) -> Non
     protocol, host = parsed_remote.scheme, parsed_remote.netloc
     use_password_auth = protocol == "http" or protocol == "https"
 
-    try:
-        get_git_repo_root(path=repo_root)
-        execute(["git", "config", "--local", "--unset-all", "credential.helper"], cwd=repo_root)
-        execute(["git", "config", "--local", "--unset-all", "core.sshCommand"], cwd=repo_root)
-
-        execute(["git", "config", "--local", "user.name", context.config.USER_NAME], cwd=repo_root)
-        execute(["git", "config", "--local", "user.email", instructor["email"]], cwd=repo_root)
-        execute(["git", "config", "--local", "author.name", context.config.USER_NAME], cwd=repo_root)
-        execute(["git", "config", "--local", "author.email", instructor["email"]], cwd=repo_root)
-        execute(["git", "config", "--local", "committer.name", context.config.USER_NAME], cwd=repo_root)
-        execute(["git", "config", "--local", "committer.email", instructor["email"]], cwd=repo_root)
-
-        if use_password_auth:
-            execute(["git", "config", "--local", "credential.helper", ""], cwd=repo_root)
-            execute(["git", "config", "--local", "--add", "credential.helper", context.config.CREDENTIAL_HELPER], cwd=repo_root)
-        else:
-            execute(["git", "config", "--local", "core.sshCommand", f'ssh -F { ssh_config_file } -i { ssh_identity_file }'], cwd=repo_root)
-    except InvalidGitRepositoryException:
-        config_path = repo_root / ".git" / "config"
-        config_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(config_path, "w+") as f:
-            ssh_credential_config = (
-                "[core]\n"
-                f'    sshCommand = ssh -F { ssh_config_file } -i { ssh_identity_file }\n'
-            )
-            password_credential_config = (
-                f"[credential]\n"
-                f"    helper = ''\n"
-                f"    helper = { context.config.CREDENTIAL_HELPER }\n"
-            )
-            credential_config = (
-                f"{ ssh_credential_config }"
-                "[user]\n"
-                f"    name = { context.config.USER_NAME }\n"
-                f"    email = { instructor['email'] }\n"
-                "[author]\n"
-                f"    name = { context.config.USER_NAME }\n"
-                f"    email = { instructor['email'] }\n"
-                "[committer]\n"
-                f"    name = { context.config.USER_NAME }\n"
-                f"    email = { instructor['email'] }\n"
-                f"{ password_credential_config }" if use_password_auth else ""
-            )
-            f.write(credential_config)
+    # Read the current config once, and only write the keys that actually differ.
+    # This also covers a repository that hasn't been initialized yet, whose config gets picked up by `git init`.
+    user_name, user_email = context.config.USER_NAME, instructor["email"]
+    await apply_config(repo_root / ".git" / "config", {
+        "user.name": [user_name],
+        "user.email": [user_email],
+        "author.name": [user_name],
+        "author.email": [user_email],
+        "committer.name": [user_name],
+        "committer.email": [user_email],
+        # An empty helper clears any helpers configured at the system/global level.
+        "credential.helper": ["", context.config.CREDENTIAL_HELPER] if use_password_auth else [],
+        "core.sshcommand": [] if use_password_auth else [f"ssh -F { ssh_config_file } -i { ssh_identity_file }"]
+    })
     
     if use_password_auth:
         credentials = \
@@ -545,7 +979,7 @@ async def set_git_authentication(context: AppContext, course, instructor) -> Non
             f"host={ host }\n" \
             f"username={ context.config.USER_NAME }\n" \
             f"password={ context.config.USER_AUTOGEN_PASSWORD }"
-        execute(["git", "credential", "approve"], stdin_input=credentials, cwd=repo_root)
+        await credential_approve(credentials, path=repo_root)
             
 async def set_root_folder_permissions(context: AppContext) -> None:
     # repo_root = await context.get_repo_root()
@@ -554,186 +988,374 @@ async def set_root_folder_permissions(context: AppContext) -> None:
     # execute(["chmod", "a-w", repo_root.parent])
     ...
 
-async def sync_upstream_repository(context: AppContext, course) -> None:
-    assignments = await context.api.get_my_assignments()
+""" Merges upstream changes into the instructor's repository. Returns whether upstream had moved since the last sync.
+Each sync that did something is recorded in the sync history. """
+async def sync_upstream_repository(context: AppContext, course) -> bool:
     repo_root = InstructorClassRepo._compute_repo_root(course["name"])
-
+    run = SyncRun()
     try:
-        fetch_repository(InstructorClassRepo.ORIGIN_REMOTE_NAME, path=repo_root)
-    except:
-        print("Fatal: Couldn't fetch remote tracking branch, aborting sync...")
-        return
+        return await run_upstream_sync(context, repo_root, run)
+    except Exception as e:
+        run.finish(SyncOutcome.FAILED, str(e))
+        raise
+    finally:
+        if run.outcome is None: run.finish(SyncOutcome.FAILED, "Interrupted")
+        if context.get_sync_history(repo_root).record(run):
+            context.events.publish("sync_history")
 
-    checkout(InstructorClassRepo.MAIN_BRANCH_NAME, path=repo_root)
-    local_head = get_head_commit_id(path=repo_root)
-    tracking_head = get_head_commit_id(InstructorClassRepo.ORIGIN_TRACKING_BRANCH, path=repo_root)
+async def run_upstream_sync(context: AppContext, repo_root: Path, run: SyncRun) -> bool:
+    # Cheaply check whether upstream has moved before doing any actual work.
+    with run.phase("check_upstream"):
+        try:
+            remote_head = await ls_remote(
+                InstructorClassRepo.ORIGIN_REMOTE_NAME,
+                f"refs/heads/{ InstructorClassRepo.MAIN_BRANCH_NAME }",
+                path=repo_root,
+                timeout=context.config.GIT_NETWORK_TIMEOUT_SECONDS
+            )
+        except Exception as e:
+            print("Fatal: Couldn't reach remote, aborting sync...")
+            run.finish(SyncOutcome.UNREACHABLE, f"Couldn't reach remote: { e }")
+            return False
+        cached_tracking_head = await get_ref_commit_id(InstructorClassRepo.ORIGIN_TRACKING_BRANCH, path=repo_root)
+        upstream_moved = remote_head != cached_tracking_head
+        if not upstream_moved:
+            # Upstream hasn't moved, but a previous sync of it may not have been merged (e.g. if it failed).
+            local_branch_head = await get_ref_commit_id(InstructorClassRepo.MAIN_BRANCH_NAME, path=repo_root)
+            if remote_head is None or (
+                local_branch_head is not None and
+                await is_ancestor_commit(
+                    descendant=local_branch_head,
+                    ancestor=remote_head,
+                    path=repo_root,
+                    remote_name=InstructorClassRepo.ORIGIN_REMOTE_NAME,
+                    timeout=context.config.GIT_NETWORK_TIMEOUT_SECONDS
+                )
+            ):
+                print("Upstream hasn't changed, nothing to sync...")
+                run.finish(SyncOutcome.UP_TO_DATE)
+                return False
+
+    assignments = await context.get_assignments()
+
+    if upstream_moved:
+        with run.phase("fetch"):
+            try:
+                await fetch_repository(InstructorClassRepo.ORIGIN_REMOTE_NAME, path=repo_root, timeout=context.config.GIT_NETWORK_TIMEOUT_SECONDS)
+            except Exception as e:
+                print("Fatal: Couldn't fetch remote tracking branch, aborting sync...")
+                run.finish(SyncOutcome.FAILED, f"Couldn't fetch remote tracking branch: { e }")
+                return False
+
+    # Everything up to here only touches refs. Merging modifies the working tree, so nothing else may touch it meanwhile.
+    lock_requested_at = time.monotonic()
+    async with context.repo_lock(repo_root).write("sync_upstream"):
+        run.add_phase("wait_for_lock", time.monotonic() - lock_requested_at)
+        await merge_upstream_repository(context, repo_root, assignments, run)
+        # Upstream may have added assignment directories.
+        with run.phase("sparse_checkout"):
+            try: await update_sparse_checkout(context, repo_root)
+            except Exception as e: print("Failed to update sparse checkout", e)
+    return upstream_moved
+
+""" Merges the upstream tracking branch into the instructor's branch, without losing any of their local changes.
+If the instructor's branch can be fast-forwarded without touching their local changes, it just is. Otherwise
+(the histories have diverged, or the local changes overlap upstream's), upstream is merged on a staging branch first.
+Must be called while holding the repository's write lock. """
+async def merge_upstream_repository(context: AppContext, repo_root: Path, assignments, run: SyncRun) -> None:
+    await checkout(InstructorClassRepo.MAIN_BRANCH_NAME, path=repo_root)
+    local_head = await get_head_commit_id(path=repo_root)
+    tracking_head = await get_head_commit_id(InstructorClassRepo.ORIGIN_TRACKING_BRANCH, path=repo_root)
+    run.local_head, run.tracking_head = local_head, tracking_head
     merge_branch_name = InstructorClassRepo.MERGE_STAGING_BRANCH_NAME.format(local_head[:8], tracking_head[:8])
-    if is_ancestor_commit(descendant=local_head, ancestor=tracking_head, path=repo_root):
+    # With shallow history, this also fetches enough history for the two heads to have a merge base to merge from.
+    with run.phase("check_merged"):
+        already_merged = await is_ancestor_commit(
+            descendant=local_head,
+            ancestor=tracking_head,
+            path=repo_root,
+            remote_name=InstructorClassRepo.ORIGIN_REMOTE_NAME,
+            timeout=context.config.GIT_NETWORK_TIMEOUT_SECONDS
+        )
+    if already_merged:
         # If the local head is a descendant of the local head,
         # then any upstream changes have already been merged in.
         print(f"Tracking and local heads are the merged, nothing to sync...")
+        run.finish(SyncOutcome.UP_TO_DATE)
         return
-    
+
+    with run.phase("classify"):
+        # Relative to the repo root, including untracked files.
+        local_changes = await get_modified_paths(untracked=True, path=repo_root)
+        try:
+            incoming = IncomingPaths(await get_changed_paths(local_head, tracking_head, merge_base=True, path=repo_root))
+        except GitException:
+            # Without a merge base to diff from, assume that upstream touched everything.
+            incoming = IncomingPaths(None)
+        is_fast_forward = await is_ancestor_commit(descendant=tracking_head, ancestor=local_head, path=repo_root)
+
+    sync_kind = classify_upstream_sync(is_fast_forward, local_changes, incoming)
+    run.kind = sync_kind.value
+
+    if sync_kind != UpstreamSyncKind.DIVERGED:
+        # Git carries uncommitted changes across a fast-forward as long as it doesn't touch them,
+        # so there's nothing to stash, move aside or back up.
+        try:
+            print(f"Fast-forwarding { InstructorClassRepo.MAIN_BRANCH_NAME } ({ local_head[:8] }) --> { InstructorClassRepo.ORIGIN_TRACKING_BRANCH } ({ tracking_head[:8] }) ({ sync_kind.value })")
+            with run.phase("fast_forward"):
+                await git_merge(InstructorClassRepo.ORIGIN_TRACKING_BRANCH, ff_only=True, path=repo_root)
+            run.finish(SyncOutcome.FAST_FORWARDED)
+            return
+        except GitException as e:
+            # Git found a collision that the status didn't show (e.g. the old path of a staged rename),
+            # in which case it refuses before touching anything.
+            print("Failed to fast-forward, falling back to a staged merge", e)
+
     # Make certain the merge branch is empty before we start.
-    try: delete_local_branch(merge_branch_name, force=True, path=repo_root)
+    try: await delete_local_branch(merge_branch_name, force=True, path=repo_root)
     except: pass
     # Branch onto the merge branch off the user's head
-    checkout(merge_branch_name, new_branch=True, path=repo_root)
+    await checkout(merge_branch_name, new_branch=True, path=repo_root)
 
     isonow = datetime.now().isoformat()
-    file_contents = { path: path.read_bytes() for path in repo_root.rglob("*") if path.is_file() and ".git" not in path.parts }
-    def backup_file(conflict_path: Path):
+    # The instructor's version of a file is never read up front. Tracked files are backed up
+    # on demand from the git object store (the stash commit, which snapshots the worktree, or the local head),
+    # and untracked files from where they were moved to. Memory stays proportional to the conflicting files.
+    stash_commit = None
+    async def backup_file(conflict_path: str, cause: str):
         print("BACKING UP FILE", conflict_path)
-        full_conflict_path = repo_root / conflict_path
-        if full_conflict_path in file_contents:
-            # Backup the student's changes to a new file.
-            backup_path = repo_root / Path(f"{ conflict_path }~{ isonow }~backup")
-            with open(backup_path, "wb+") as f:
-                f.write(file_contents[full_conflict_path])
-        else:
+        # Backup the instructor's changes to a new file.
+        backup_file_path = f"{ conflict_path }~{ isonow }~backup"
+        backup_path = repo_root / Path(backup_file_path)
+        if conflict_path in preserved_digests:
+            (untracked_files_dir / conflict_path).rename(backup_path)
+            run.record_conflict(conflict_path, cause, ConflictResolution.BACKED_UP, backup_file_path)
+            return
+        try:
+            await write_blob_to_file(stash_commit or local_head, conflict_path, backup_path, path=repo_root)
+            run.record_conflict(conflict_path, cause, ConflictResolution.BACKED_UP, backup_file_path)
+        except GitException:
             print(str(conflict_path), "deleted locally, cannot create a backup.")
+            run.record_conflict(conflict_path, cause, ConflictResolution.DELETED_LOCALLY)
+
+    async def stash_is_pending() -> bool:
+        """ Whether the stash we made is still on top of the stack, i.e. hasn't been (fully) popped yet. """
+        return stash_commit is not None and await get_ref_commit_id("refs/stash", path=repo_root) == stash_commit
+
+    # Only untracked files in the way of the merge need to be moved out of it.
+    preserved_files = [f["path"] for f in local_changes if f["modification_type"] == "??" and incoming.in_the_way(f["path"])]
+    # Fingerprinted before they're moved, to compare against whatever the merge puts at their paths.
+    with run.phase("fingerprint_untracked"):
+        preserved_digests = dict(zip(preserved_files, await hash_files(preserved_files, path=repo_root)))
 
-    # These are relative to the repo root.
-    untracked_files = {
-        f["path"] for f in get_modified_paths(untracked=True, path=repo_root)
-        if f["modification_type"] == "??"
-    }
     untracked_files_dir = repo_root / f".untracked-{ isonow }"
     def move_untracked_files():
-        # In case there are no files, we still want to make the dir so no error when deleting later.
-        untracked_files_dir.mkdir(parents=True, exist_ok=True)
-        for file in untracked_files:
+        for file in preserved_files:
             untracked_path = untracked_files_dir / file
             untracked_path.parent.mkdir(parents=True, exist_ok=True)
             (repo_root / file).rename(untracked_path)
     
-    def restore_untracked_files():
+    async def restore_untracked_files():
         # Git refuses to allow you to apply a stash if any untracked changes within the stash exist locally.
         # Thus, we have to manually move and then backup untracked files after merging.
-        for original_file in untracked_files:
+        merged_files = [file for file in preserved_files if (repo_root / file).is_file()]
+        merged_digests = dict(zip(merged_files, await hash_files(merged_files, path=repo_root)))
+        unrestored_files = []
+        for original_file in preserved_files:
             full_original_file_path = repo_root / original_file
             untracked_path = untracked_files_dir / original_file
 
             if not full_original_file_path.exists():
                 # If the file doesn't exist post-merge, it hasn't been changed at all, and we can just
                 # move the file back to its original path in the repo.
-                untracked_path.rename(full_original_file_path)
-            elif full_original_file_path.read_bytes() != untracked_path.read_bytes():
+                try:
+                    full_original_file_path.parent.mkdir(parents=True, exist_ok=True)
+                    untracked_path.rename(full_original_file_path)
+                except OSError as e:
+                    # e.g. one of its parent directories is a file now.
+                    print(f"Couldn't restore untracked file '{ original_file }'", e)
+                    unrestored_files.append(original_file)
+                    run.record_conflict(
+                        original_file,
+                        "untracked",
+                        ConflictResolution.UNRESTORED,
+                        str(untracked_path.relative_to(repo_root))
+                    )
+            elif merged_digests.get(original_file) != preserved_digests[original_file]:
                 # If the file exists post merge, but its content is the exact same, we woudn't need to take any actions.
                 # The file exists but its content has changed, so backup the old version.
                 print(f"Couldn't restore untracked file '{ original_file }' as it already exists on HEAD, backing up instead...")
-                backup_file(original_file)
-
-    # Grab every overwritable path inside the repository.
-    # Note: we need to do again after the merge, since we can only pick up paths that exist on disk.
-    # If the local head deleted a file, it won't be picked up in the first pass.
-    # Vice-versa, if the merge head deleted a file, it won't be picked up in the second pass.
-    overwritable_paths = set()
-    def gather_overwritable_paths():
-        for assignment in assignments:
-            for glob_pattern in assignment["overwritable_files"]:
-                overwritable_paths.update((repo_root / assignment["directory_path"]).glob(glob_pattern))
-    gather_overwritable_paths() # pick up paths introduced by the local head
+                await backup_file(original_file, "untracked")
+        if len(unrestored_files) > 0:
+            print(f"Leaving { len(unrestored_files) } untracked file(s) that couldn't be restored in { untracked_files_dir }")
+        else:
+            shutil.rmtree(untracked_files_dir, ignore_errors=True)
+
+    # Conflicting paths are matched against the overwritable globs directly, so it doesn't matter
+    # which side of the merge (if any) the path currently exists on.
+    file_patterns = get_file_patterns(assignments)
 
-    def rename_merge_conflicts(merge_conflicts, source):
+    async def rename_merge_conflicts(merge_conflicts, source, cause):
         conflict_types = {
-            conflict["path"] : conflict["modification_type"] for conflict in get_modified_paths(path=repo_root)
+            conflict["path"] : conflict["modification_type"] for conflict in await get_modified_paths(path=repo_root)
             if conflict["path"] in merge_conflicts
         }
         for conflict in merge_conflicts:
-            if repo_root / conflict not in overwritable_paths:
+            if not file_patterns.is_overwritable(conflict):
                 # If the file isn't overwritable, make a backup of it (as long as it's not deleted locally).
                 print("Encountered non-overwriteable merge conflict", conflict, ". Creating backup...")
-                backup_file(conflict)
+                await backup_file(conflict, cause)
             else:
                 print(f"Detected overwritable merge conflict: '{ conflict }'")
+                run.record_conflict(conflict, cause, ConflictResolution.OVERWRITTEN)
             
             # Overwrite the file with its incoming version -- resolve the conflict.
             if conflict_types[conflict][1] != "D":
-                git_restore(conflict, source=source, staged=True, worktree=True, path=repo_root)
+                await git_restore(conflict, source=source, staged=True, worktree=True, path=repo_root)
             else:
                 # If the conflict was deleted on the merge head, git restore won't be able to restore it.
                 # Instead, just update the index/worktree to also delete the file.
-                git_rm(conflict, cached=False, path=repo_root)
+                await git_rm(conflict, cached=False, path=repo_root)
 
     # Merge the upstream tracking branch into the temp merge branch
     try:
         print(f"Merging { InstructorClassRepo.ORIGIN_TRACKING_BRANCH } ({ tracking_head[:8] }) --> { InstructorClassRepo.MAIN_BRANCH_NAME } ({ local_head[:8] }) on branch { merge_branch_name }")
 
         # We have to stash because git refuses to merge if the merge would overwrite local changes.
-        move_untracked_files()
-        stash_changes(path=repo_root)
+        with run.phase("preserve_untracked"):
+            move_untracked_files()
+        with run.phase("stash"):
+            stash_before = await get_ref_commit_id("refs/stash", path=repo_root)
+            await stash_changes(path=repo_root)
+            # `git stash` doesn't create a stash if there are no local changes. In that case,
+            # there's nothing to pop (and we mustn't pop an unrelated, older stash).
+            stash_after = await get_ref_commit_id("refs/stash", path=repo_root)
+            if stash_after != stash_before: stash_commit = stash_after
 
         # Merge the upstream tracking branch into the merge branch
-        merge_conflicts = git_merge(InstructorClassRepo.ORIGIN_TRACKING_BRANCH, commit=False, path=repo_root)
-        gather_overwritable_paths() # pick up paths introduced by the merge head
-        rename_merge_conflicts(merge_conflicts, source="MERGE_HEAD") # restore conflicts using their incoming version from the MERGE_HEAD
+        with run.phase("merge"):
+            merge_conflicts = await git_merge(InstructorClassRepo.ORIGIN_TRACKING_BRANCH, commit=False, path=repo_root)
+        with run.phase("resolve_conflicts"):
+            await rename_merge_conflicts(merge_conflicts, source="MERGE_HEAD", cause="merge") # restore conflicts using their incoming version from the MERGE_HEAD
         
-        commit(None, no_edit=True, path=repo_root)
+        with run.phase("commit"):
+            await commit(None, no_edit=True, path=repo_root)
 
         # After popping, we could have further conflicts between the student's local changes and the merge head
-        pop_stash(path=repo_root)
-        stash_conflicts = git_diff_status(diff_filter="U", path=repo_root)
-        gather_overwritable_paths() # technically, not really necessary since we gather before stashing.
-        rename_merge_conflicts(stash_conflicts, source="HEAD")
+        with run.phase("pop"):
+            if stash_commit is not None: await pop_stash(path=repo_root)
+            stash_conflicts = await git_diff_status(diff_filter="U", path=repo_root)
+        with run.phase("resolve_stash_conflicts"):
+            await rename_merge_conflicts(stash_conflicts, source="HEAD", cause="stash")
+            # A pop that conflicts leaves the stash in place. By now, its conflicts are resolved (and backed up).
+            if await stash_is_pending(): await drop_stash(path=repo_root)
 
     except Exception as e:
         # Cleanup the merge branch and return to main
         print("Fatal: Can't merge remote changes into professor repository", e)
         # If an error occurs, we're going to force checkout and delete so the merge head will delete regardless.
-        try: abort_merge(path=repo_root)
+        try: await abort_merge(path=repo_root)
         except:
             print("(failed to abort merge)")
-        # if an error occurs after we've already popped, there won't be anything to pop on the stack.
-        try: pop_stash(path=repo_root)
+        # If an error occurs after we've already popped, our stash isn't on the stack anymore
+        # (and whatever is, isn't ours to pop).
+        try:
+            if await stash_is_pending(): await pop_stash(path=repo_root)
         except:
             print("(failed to pop stash, already popped)")
-        checkout(InstructorClassRepo.MAIN_BRANCH_NAME, force=True, path=repo_root)
-        delete_local_branch(merge_branch_name, force=True, path=repo_root)
+        await checkout(InstructorClassRepo.MAIN_BRANCH_NAME, force=True, path=repo_root)
+        await delete_local_branch(merge_branch_name, force=True, path=repo_root)
+        run.finish(SyncOutcome.FAILED, f"Can't merge remote changes: { e }")
         return
     
     finally:
         # It doesn't really matter when we restore these, as long as it happens post-merge.
-        restore_untracked_files()
-        shutil.rmtree(untracked_files_dir)
+        with run.phase("restore_untracked"):
+            await restore_untracked_files()
 
-    checkout(InstructorClassRepo.MAIN_BRANCH_NAME, path=repo_root)
+    await checkout(InstructorClassRepo.MAIN_BRANCH_NAME, path=repo_root)
 
     # If we successfully merged it, we can go ahead and merge the temp branch into our actual branch
     try:
         print(f"Merging { merge_branch_name } --> { InstructorClassRepo.MAIN_BRANCH_NAME }")
         # Merge the merge staging branch into the actual branch, don't need to commit since fast forward
         # We don't need to check for conflicts here since the actual branch can now be fast forwarded.
-        git_merge(merge_branch_name, ff_only=True, commit=False, path=repo_root)
+        with run.phase("fast_forward"):
+            await git_merge(merge_branch_name, ff_only=True, commit=False, path=repo_root)
+        run.finish(SyncOutcome.MERGED)
 
     except Exception as e:
         # Merging from temp to actual branch failed.
         print(f"Fatal: Failed to merge the merge staging branch into actual branch", e)
+        run.finish(SyncOutcome.FAILED, f"Failed to merge the merge staging branch into actual branch: { e }")
         # Try to abort the merge, if started and unconcluded.
-        try: abort_merge(path=repo_root)
+        try: await abort_merge(path=repo_root)
         except: print("(failed to abort)")
     
     finally:
-        delete_local_branch(merge_branch_name, force=True, path=repo_root)
-        
-    # TODO: when websockets added, ping the client if anything was changed.
+        await delete_local_branch(merge_branch_name, force=True, path=repo_root)
+
+""" Bootstraps the instructor's repository in stages, reporting progress through the context's readiness.
+Steps that don't depend on each other (SSH setup and git config) run concurrently.
+Every step skips whatever is already done, so bootstrapping can be retried after a failure. Returns the course. """
+async def bootstrap_repository(context: AppContext):
+    values = await fan_out(
+        course=context.get_course(),
+        instructor=context.api.get_my_user(),
+        timeout=context.config.API_REQUEST_TIMEOUT_SECONDS
+    )
+    course, instructor = values["course"], values["instructor"]
+    repo_root = InstructorClassRepo._compute_repo_root(course["name"])
+    # e.g. cloned before the server restarted, in which case it's usable while the rest of setup catches up.
+    context.repository_cloned = await is_repo_cloned(repo_root)
+    context.set_bootstrap_stage(BootstrapStage.CONFIGURING)
+    await create_repo_root_if_not_exists(context)
+    await fan_out(
+        ssh=create_ssh_config_if_not_exists(context, course),
+        git_authentication=set_git_authentication(context, course, instructor)
+    )
+    context.set_bootstrap_stage(BootstrapStage.CLONING)
+    await clone_repo_if_not_exists(context, course, instructor)
+    context.repository_cloned = True
+    await set_root_folder_permissions(context)
+    return course
+
+def is_recoverable_bootstrap_error(e: Exception) -> bool:
+    """ Whether bootstrapping might get past `e` if it's retried. The grader API failing to respond (or timing out)
+    is worth retrying, but it refusing a request (e.g. because of bad credentials) will keep on refusing it. """
+    if isinstance(e, APIException):
+        status_code = e.response.status_code
+        return status_code >= 500 or status_code in (408, 429)
+    return True
 
 async def setup_backend(context: AppContext):
-    try:
-        course = await context.api.get_course()
-        instructor = await context.api.get_my_user()
-        await create_repo_root_if_not_exists(context)
-        await create_ssh_config_if_not_exists(context, course)
-        await set_git_authentication(context, course, instructor)
-        await clone_repo_if_not_exists(context, course, instructor)
-        await set_root_folder_permissions(context)
-        while True:
-            print("Pulling in upstream changes...")
-            await sync_upstream_repository(context, course)
-            print(f"Sleeping for { context.config.UPSTREAM_SYNC_INTERVAL }...")
-            await asyncio.sleep(context.config.UPSTREAM_SYNC_INTERVAL)
-    except:
-        print(traceback.format_exc())
+    retry_interval = context.config.BOOTSTRAP_RETRY_INTERVAL_SECONDS
+    while True:
+        try:
+            course = await bootstrap_repository(context)
+            break
+        except Exception as e:
+            print(traceback.format_exc())
+            if not is_recoverable_bootstrap_error(e):
+                context.set_bootstrap_stage(BootstrapStage.FAILED, str(e))
+                return
+            context.set_bootstrap_stage(BootstrapStage.RETRYING, str(e))
+            print(f"Retrying setup in { retry_interval }...")
+            await asyncio.sleep(retry_interval)
+            retry_interval = min(retry_interval * 2, context.config.BOOTSTRAP_RETRY_MAX_INTERVAL_SECONDS)
+
+    context.set_bootstrap_stage(BootstrapStage.READY)
+    async def sync():
+        upstream_moved = await sync_upstream_repository(context, course)
+        if upstream_moved:
+            context.events.publish("upstream_sync")
+        return upstream_moved
+    context.upstream_sync = UpstreamSyncScheduler(
+        sync,
+        min_interval=context.config.UPSTREAM_SYNC_INTERVAL,
+        max_interval=context.config.UPSTREAM_SYNC_MAX_INTERVAL
+    )
+    await context.upstream_sync.run()
 
 def setup_handlers(server_app):
     web_app = server_app.web_app
@@ -741,6 +1363,8 @@ def setup_handlers(server_app):
     
     loop = asyncio.get_event_loop()
     asyncio.run_coroutine_threadsafe(setup_backend(BaseHandler.context), loop)
+    if BaseHandler.context.config.TUNABLES_FILE:
+        asyncio.run_coroutine_threadsafe(BaseHandler.context.watch_tunables(), loop)
     
     host_pattern = ".*$"
 
@@ -749,10 +1373,17 @@ def setup_handlers(server_app):
         ("assignments", AssignmentsHandler),
         ("course_instructor_students", CourseAndInstructorAndStudentsHandler),
         ("notebook_files", NotebookFilesHandler),
+        ("student_submissions", StudentSubmissionsHandler),
         ("restore_file", RestoreFileHandler),
         ("submit_assignment", SubmissionHandler),
         ("create_student_notebook", StudentNotebookHandler),
+        ("jobs", JobStatusHandler),
         ("sync_to_lms", SyncToLMSHandler),
+        ("sync_upstream", SyncUpstreamHandler),
+        ("sync_history", SyncHistoryHandler),
+        ("events", EventsHandler),
+        ("readiness", ReadinessHandler),
+        ("repo_lock_metrics", RepoLockMetricsHandler),
         ("grade_assignment", GradeAssignmentHandler),
         ("settings", SettingsHandler)
     ]
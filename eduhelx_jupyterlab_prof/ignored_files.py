@@ -0,0 +1,73 @@
+import os
+from pathlib import Path
+from gitignore_parser import parse_gitignore
+
+class IgnoredFilesListing:
+    def __init__(self, gitignore_mtime: int | None, directory_mtimes: dict[str, int], ignored_files: list[str]):
+        self.gitignore_mtime = gitignore_mtime
+        # directory path -> mtime (ns) at the time it was walked
+        self.directory_mtimes = directory_mtimes
+        self.ignored_files = ignored_files
+
+
+""" Lists the files inside of an assignment that match its .gitignore.
+The walk stops descending as soon as a directory is ignored (the directory is listed once, with a trailing slash),
+so ignored subtrees like virtualenvs or datasets cost a single entry. Listings are cached per assignment and are
+only rebuilt when the .gitignore or one of the walked (non-ignored) directories has a new mtime. """
+class IgnoredFilesIndex:
+    def __init__(self):
+        self._listings: dict[Path, IgnoredFilesListing] = {}
+
+    @staticmethod
+    def _get_mtime(path) -> int | None:
+        try:
+            return os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _is_stale(self, listing: IgnoredFilesListing, gitignore_path: Path) -> bool:
+        if self._get_mtime(gitignore_path) != listing.gitignore_mtime: return True
+        for directory, mtime in listing.directory_mtimes.items():
+            if self._get_mtime(directory) != mtime: return True
+        return False
+
+    def _build_listing(self, assignment_path: Path, gitignore_path: Path) -> IgnoredFilesListing:
+        gitignore_mtime = self._get_mtime(gitignore_path)
+        directory_mtimes = {}
+        ignored_files = []
+        if gitignore_mtime is None:
+            # No gitignore, nothing can be ignored.
+            return IgnoredFilesListing(gitignore_mtime, directory_mtimes, ignored_files)
+
+        # Compiled once per listing, rather than per file.
+        matches_gitignore = parse_gitignore(gitignore_path)
+        directories = [str(assignment_path)]
+        while len(directories) > 0:
+            directory = directories.pop()
+            try:
+                directory_mtimes[directory] = os.stat(directory).st_mtime_ns
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        if entry.name == ".git" and is_dir:
+                            continue
+                        if matches_gitignore(entry.path):
+                            rel_path = os.path.relpath(entry.path, assignment_path)
+                            ignored_files.append(rel_path + "/" if is_dir else rel_path)
+                        elif is_dir:
+                            directories.append(entry.path)
+            except (FileNotFoundError, NotADirectoryError):
+                pass
+
+        ignored_files.sort()
+        return IgnoredFilesListing(gitignore_mtime, directory_mtimes, ignored_files)
+
+    def get_ignored_files(self, assignment_path: Path) -> list[str]:
+        """ Returns the paths (relative to the assignment) that are ignored. Ignored directories end with a slash. """
+        assignment_path = Path(assignment_path).resolve()
+        gitignore_path = assignment_path / ".gitignore"
+
+        listing = self._listings.get(assignment_path)
+        if listing is None or self._is_stale(listing, gitignore_path):
+            listing = self._listings[assignment_path] = self._build_listing(assignment_path, gitignore_path)
+        return listing.ignored_files
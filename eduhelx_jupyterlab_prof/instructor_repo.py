@@ -1,10 +1,10 @@
 import os
 import shutil
 import json
+import hashlib
 import tempfile
-from .otter_util import OtterAssignUtil
-from otter.assign import main as otter_assign
-from pathlib import Path
+from pathlib import Path, PurePosixPath
+from .file_patterns import get_file_patterns
 
 class NotInstructorClassRepositoryException(Exception):
     pass
@@ -24,6 +24,12 @@ class InstructorClassRepo:
     # to proactively guard against a merge conflict.
     MERGE_STAGING_BRANCH_NAME = "__temp__/merge_{}-from-{}" # Formatted with the local head and tracking head commit hashes
     ORIGIN_TRACKING_BRANCH = f"{ ORIGIN_REMOTE_NAME }/{ MAIN_BRANCH_NAME }"
+    # Records the inputs that each assignment's student notebook was last generated from (relative to the repo root).
+    STUDENT_NOTEBOOK_CACHE_PATH = ".git/eduhelx/student_notebooks.json"
+    # Record of recent upstream syncs (relative to the repo root), see SyncHistory.
+    SYNC_HISTORY_PATH = ".git/eduhelx/sync_history.json"
+    # Bump whenever the way student notebooks are generated changes, so that cached notebooks are regenerated.
+    STUDENT_NOTEBOOK_GENERATOR_VERSION = 1
 
     def __init__(self, course, assignments, current_path):
         self.course = course
@@ -41,49 +47,152 @@ class InstructorClassRepo:
     def get_assignment_path(self, assignment):
         return self.repo_root / assignment["directory_path"]
     
-    def create_student_notebook(self):
+    @staticmethod
+    def _hash_path(hasher, path: Path) -> None:
+        """ Feed a file, or every file under a directory, into `hasher` without reading whole files into memory. """
+        if path.is_dir():
+            for child in sorted(path.rglob("*")):
+                if child.is_file():
+                    hasher.update(str(child.relative_to(path)).encode("utf-8"))
+                    InstructorClassRepo._hash_path(hasher, child)
+        elif path.exists():
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    hasher.update(chunk)
+        else:
+            hasher.update(b"\0missing")
+
+    def _hash_student_notebook_inputs(self, master_notebook_path: Path, otter_config_path: Path, assign_config: dict, otter_config_source: Path | None = None) -> str:
+        """ `otter_config_source` is where to read the otter config from, if not from `otter_config_path` (e.g. one that's about to be put there). """
+        hasher = hashlib.sha256()
+        hasher.update(str(self.STUDENT_NOTEBOOK_GENERATOR_VERSION).encode("utf-8"))
+        hasher.update(json.dumps(self.current_assignment["student_notebook_path"]).encode("utf-8"))
+        # Support files referenced by the assign config are copied into the autograder, so they are inputs too.
+        support_files = [*assign_config.get("files", [])]
+        for key in ("requirements", "environment"):
+            if isinstance(assign_config.get(key), str): support_files.append(assign_config[key])
+        for path in [master_notebook_path, otter_config_path, *(master_notebook_path.parent / f for f in support_files)]:
+            hasher.update(str(path).encode("utf-8"))
+            self._hash_path(hasher, otter_config_source if path == otter_config_path and otter_config_source is not None else path)
+        return hasher.hexdigest()
+
+    def _hash_file(self, path: Path) -> str | None:
+        if not path.exists(): return None
+        hasher = hashlib.sha256()
+        self._hash_path(hasher, path)
+        return hasher.hexdigest()
+
+    def _read_student_notebook_cache(self) -> dict:
+        try:
+            with open(self.repo_root / self.STUDENT_NOTEBOOK_CACHE_PATH, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write_student_notebook_cache(self, cache: dict) -> None:
+        cache_path = self.repo_root / self.STUDENT_NOTEBOOK_CACHE_PATH
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(cache_path, "w") as f:
+            json.dump(cache, f)
+
+    @staticmethod
+    def _link_or_copy(src, dst) -> str:
+        """ Stage a file by hardlinking it, falling back to a symlink and finally to a copy
+        if the filesystem refuses (e.g. across devices or on filesystems without link support). """
+        try:
+            os.link(src, dst)
+            return dst
+        except OSError:
+            pass
+        try:
+            os.symlink(os.path.realpath(src), dst)
+            return dst
+        except OSError:
+            pass
+        return shutil.copy2(src, dst)
+
+    def _stage_assignment_directory(self, staged_path: Path) -> None:
+        """ Mirror the assignment directory at `staged_path` without duplicating file contents,
+        so that staging costs the same regardless of how large the assignment's datasets are.
+        Staged files may share their contents with the originals, so they must be replaced, never written to. """
+        shutil.copytree(self.current_assignment_path, staged_path, symlinks=True, copy_function=self._link_or_copy)
+
+    @property
+    def _student_notebook_paths(self) -> tuple[Path, Path, Path]:
+        """ The current assignment's master notebook, student notebook and otter config. """
+        assignment = self.current_assignment
+        return (
+            self.current_assignment_path / assignment["master_notebook_path"],
+            self.current_assignment_path / assignment["student_notebook_path"],
+            self.current_assignment_path / "otter_grading_config.json"
+        )
+
+    @classmethod
+    def make_staging_directory(cls, repo_root: Path) -> Path:
+        """ A directory to generate student notebooks in (see `create_student_notebook`), inside of the repository's git directory
+        so that it's on the same filesystem as the assignments (for hardlinking into it, and moving out of it). """
+        staging_root = Path(repo_root) / ".git" / "eduhelx"
+        staging_root.mkdir(parents=True, exist_ok=True)
+        return Path(tempfile.mkdtemp(dir=staging_root))
+
+    def create_student_notebook(self, staging_path: Path, force=False) -> dict | None:
+        """ Generates the student notebook of the current assignment using otter assign, inside of `staging_path`
+        (see `make_staging_directory`). Nothing outside of it is written to, so this doesn't need the repository's lock;
+        the result is put in place with `install_student_notebook`, which does.
+        Generation is skipped (returning None) if the master notebook, otter config, and support files are unchanged since
+        the existing student notebook was generated (unless `force` is set). """
         if self.current_assignment is None:
             raise NotInAnAssignmentException()
         
         assignment = self.current_assignment
-        master_notebook_path = self.current_assignment_path / assignment["master_notebook_path"]
-        student_notebook_path = self.current_assignment_path / assignment["student_notebook_path"]
-        dist_path = self.current_assignment_path / f"{ assignment['name'] }-dist"
-        student_notebook_dist_path = dist_path / "student" / student_notebook_path.name
+        master_notebook_path, student_notebook_path, otter_config_path = self._student_notebook_paths
 
-        otter_config_path = self.current_assignment_path / "otter_grading_config.json"
-        otter_config_dist_path = dist_path / "autograder" / "otter_config.json"
+        # The otter stack is slow to import, and is only ever needed here (in the notebook generation worker).
+        from .otter_util import OtterAssignUtil
+        from otter.assign import main as otter_assign
         
         assign_util = OtterAssignUtil(master_notebook_path)
-        with tempfile.TemporaryDirectory() as dir:
-            temp_dist_path = Path(dir) / "dist"
-            processed_master_notebook_path = Path(dir) / self.current_assignment_path.name / student_notebook_path.name
-            config = assign_util.get_assign_config()
-            generate_config = config.get("generate", {})
-            generate_config.update({
-                "zips": False,
-                "pdf": True,
-                "autograder_dir": "/autograder"
-            })
-            assign_util.update_assign_config({
-                "init_cell": True,
-                "generate": generate_config,
-                "export_cell": None
-            })
-
-            shutil.copytree(self.current_assignment_path, processed_master_notebook_path.parent)
-            assign_util.save(processed_master_notebook_path)
-            otter_assign(processed_master_notebook_path, temp_dist_path, no_pdfs=True)
-            # Bug with otter where it tries to create every single directory in the relative path
-            # between the notebook and the dist. If these are in different top-level directories,
-            # it's going to try to create folders it almost certainly lacks permission to tamper with.
-            shutil.move(temp_dist_path, dist_path)
-
-        # Move default otter config for the assignment if it doesn't exist
-        if not otter_config_path.exists():
-            otter_config_dist_path.rename(otter_config_path)
-        # Process student notebook
-        shutil.move(student_notebook_dist_path, student_notebook_path)
+        temp_dist_path = staging_path / "dist"
+        processed_master_notebook_path = staging_path / self.current_assignment_path.name / student_notebook_path.name
+        config = assign_util.get_assign_config()
+
+        cache = self._read_student_notebook_cache()
+        input_hash = self._hash_student_notebook_inputs(master_notebook_path, otter_config_path, config)
+        cached = cache.get(str(assignment["id"]))
+        if (
+            not force and
+            cached is not None and
+            cached["input_hash"] == input_hash and
+            cached["output_hash"] == self._hash_file(student_notebook_path)
+        ):
+            print(f"Student notebook for { assignment['name'] } is up to date, skipping generation...")
+            return None
+
+        generate_config = config.get("generate", {})
+        generate_config.update({
+            "zips": False,
+            "pdf": True,
+            "autograder_dir": "/autograder"
+        })
+        assign_util.update_assign_config({
+            "init_cell": True,
+            "generate": generate_config,
+            "export_cell": None
+        })
+
+        self._stage_assignment_directory(processed_master_notebook_path.parent)
+        # The staged copy of the student notebook may be linked to the real one, so unlink it rather than overwriting it.
+        processed_master_notebook_path.unlink(missing_ok=True)
+        assign_util.save(processed_master_notebook_path)
+        # Bug with otter where it tries to create every single directory in the relative path
+        # between the notebook and the dist. If these are in different top-level directories,
+        # it's going to try to create folders it almost certainly lacks permission to tamper with.
+        # So the dist goes right next to the staged assignment.
+        otter_assign(processed_master_notebook_path, temp_dist_path, no_pdfs=True)
+
+        generated_student_notebook_path = temp_dist_path / "student" / student_notebook_path.name
+        # Default otter config for the assignment, if it doesn't have one.
+        generated_otter_config_path = temp_dist_path / "autograder" / "otter_config.json" if not otter_config_path.exists() else None
 
         # with open(student_notebook_path, "r") as f:
         #     student_notebook = json.load(f)
@@ -93,13 +202,38 @@ class InstructorClassRepo:
         # with open(student_notebook_path, "w") as f:
         #     json.dump(student_notebook, f)
 
-        shutil.rmtree(dist_path)
+        return {
+            "student_notebook_path": str(generated_student_notebook_path),
+            "otter_config_path": str(generated_otter_config_path) if generated_otter_config_path is not None else None,
+            # The inputs as they were read, so that if they changed during generation, the next generation isn't skipped.
+            # The default otter config is about to become part of the input.
+            "cache_entry": {
+                "input_hash": self._hash_student_notebook_inputs(master_notebook_path, otter_config_path, config, generated_otter_config_path),
+                "output_hash": self._hash_file(generated_student_notebook_path)
+            }
+        }
+
+    def install_student_notebook(self, generated: dict) -> None:
+        """ Put a student notebook generated by `create_student_notebook` (and the default otter config, if the assignment
+        still doesn't have one) in place. Only moves files within the same filesystem, so the repository's lock isn't held for long. """
+        _, student_notebook_path, otter_config_path = self._student_notebook_paths
+        if generated["otter_config_path"] is not None and not otter_config_path.exists():
+            shutil.move(generated["otter_config_path"], otter_config_path)
+        shutil.move(generated["student_notebook_path"], student_notebook_path)
 
-    def get_protected_file_paths(self, assignment) -> list[Path]:
-        files = []
-        for glob_pattern in assignment["protected_files"]:
-            files += self.get_assignment_path(assignment).glob(glob_pattern)
-        return files
+        cache = self._read_student_notebook_cache()
+        cache[str(self.current_assignment["id"])] = generated["cache_entry"]
+        self._write_student_notebook_cache(cache)
+
+    def get_protected_file_paths(self, assignment, paths: list[str]) -> list[str]:
+        """ Of `paths` (relative to the repo root), the ones that are protected files of the assignment.
+        Matched against the compiled globs, so the repository isn't walked. """
+        file_patterns = get_file_patterns(self.assignments)
+        assignment_path = PurePosixPath(assignment["directory_path"])
+        return [
+            path for path in paths
+            if PurePosixPath(path).is_relative_to(assignment_path) and file_patterns.is_protected(path)
+        ]
     
     @classmethod
     def _compute_repo_root(cls, course_name, current_path: str | None=None):
@@ -141,4 +275,10 @@ class InstructorClassRepo:
             course=course,
             assignments=assignments,
             current_path=assignment_path
-        )
\ No newline at end of file
+        )
+
+
+def generate_student_notebook(course, assignments, assignment_id: int, staging_path: Path, force=False) -> dict | None:
+    """ Entry point for generating an assignment's student notebook from a worker process (see `create_student_notebook`). """
+    instructor_repo = InstructorClassRepo.from_assignment_no_path(course, assignments, assignment_id)
+    return instructor_repo.create_student_notebook(staging_path, force=force)
@@ -0,0 +1,138 @@
+import time
+import uuid
+import asyncio
+import traceback
+from enum import Enum
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+class JobState(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+class JobFailedException(Exception):
+    def __init__(self, job: "Job"):
+        super().__init__(job.error)
+        self.job = job
+
+class Job:
+    def __init__(self, kind: str, key: str):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.key = key
+        self.state = JobState.QUEUED
+        # Human-readable description of what the job is currently doing.
+        self.progress: str | None = None
+        self.result: Any = None
+        self.error: str | None = None
+        self.created_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        # Incremented on every update, so that clients can wait for the job to change from a version they've seen.
+        self.version = 0
+        self._changed = asyncio.Event()
+        self._done = asyncio.get_event_loop().create_future()
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (JobState.DONE, JobState.FAILED)
+
+    def update(self, **fields) -> None:
+        for (field, value) in fields.items():
+            setattr(self, field, value)
+        self.version += 1
+        # Wake everyone waiting on a change, then start a fresh event for the next one.
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait_for_change(self, since_version: int, timeout: float) -> bool:
+        """ Wait (up to `timeout` seconds) until the job's version differs from `since_version`. Returns whether it did. """
+        if self.version != since_version: return True
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.version != since_version
+
+    async def wait(self) -> Any:
+        """ Wait for the job to finish, and return its result. Raises JobFailedException if the job failed. """
+        await asyncio.shield(self._done)
+        if self.state == JobState.FAILED:
+            raise JobFailedException(self)
+        return self.result
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "key": self.key,
+            "version": self.version,
+            "state": self.state.value,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+""" Tracks background jobs, deduplicated by (kind, key): submitting a job while one with the same
+kind and key is still in flight returns the in-flight job rather than starting another one.
+If the in-flight job won't do (see `submit`), the new job is queued behind it instead, so the two never overlap.
+Only the most recent `max_finished_jobs` finished jobs are kept around for status lookups. """
+class JobRegistry:
+    def __init__(self, max_finished_jobs: int = 100):
+        self.max_finished_jobs = max_finished_jobs
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        # (kind, key) -> most recent job
+        self._latest: dict[tuple[str, str], Job] = {}
+
+    def get(self, job_id: str) -> Job | None:
+        return self._jobs.get(job_id)
+
+    def get_latest(self, kind: str, key: str) -> Job | None:
+        return self._latest.get((kind, key))
+
+    def submit(self, kind: str, key: str, run: Callable[[Job], Awaitable[Any]], reuse: Callable[[Job], bool] | None = None) -> Job:
+        """ Start `run(job)` in the background, unless a job of the same kind and key is already in flight
+        (and `reuse`, if given, accepts it). An in-flight job that isn't reused is waited for before `run` starts. """
+        latest = self.get_latest(kind, key)
+        previous = None
+        if latest is not None and not latest.finished:
+            if reuse is None or reuse(latest): return latest
+            previous = latest
+
+        job = Job(kind, key)
+        self._jobs[job.id] = job
+        self._latest[(kind, key)] = job
+        self._prune()
+        asyncio.ensure_future(self._run(job, run, previous))
+        return job
+
+    async def _run(self, job: Job, run: Callable[[Job], Awaitable[Any]], previous: Job | None = None) -> None:
+        try:
+            if previous is not None:
+                job.update(progress="Waiting for the previous job")
+                # Whether or not it succeeded, it's done with whatever it was doing.
+                try: await previous.wait()
+                except JobFailedException: pass
+            result = await run(job)
+            job.update(state=JobState.DONE, result=result, progress=None, finished_at=time.time())
+        except Exception as e:
+            print(f"Job { job.kind } ({ job.key }) failed:", traceback.format_exc())
+            job.update(state=JobState.FAILED, error=str(e), progress=None, finished_at=time.time())
+        finally:
+            # Anything else (e.g. the job being cancelled at shutdown) still has to release its waiters.
+            if not job.finished:
+                job.update(state=JobState.FAILED, error="Job was cancelled", progress=None, finished_at=time.time())
+            job._done.set_result(None)
+
+    def _prune(self) -> None:
+        finished = [job for job in self._jobs.values() if job.finished]
+        for job in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[job.id]
+            if self._latest.get((job.kind, job.key)) is job:
+                del self._latest[(job.kind, job.key)]
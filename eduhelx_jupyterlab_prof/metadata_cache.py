@@ -0,0 +1,89 @@
+import time
+import copy
+import asyncio
+from typing import Any, Awaitable, Callable
+
+class CachedResource:
+    def __init__(self, fetch: Callable[[], Awaitable[Any]], ttl_seconds: float):
+        self.fetch = fetch
+        self.ttl_seconds = ttl_seconds
+        self.value = None
+        self.has_value = False
+        self.fetched_at = float("-inf")
+        self.in_flight: asyncio.Future | None = None
+        # Bumped on invalidation so that a fetch started before the invalidation isn't cached.
+        self.generation = 0
+        # Bumped whenever a fetched value is cached, so that callers can tell whether they've seen it already.
+        self.version = 0
+
+    @property
+    def is_fresh(self) -> bool:
+        return self.has_value and time.monotonic() - self.fetched_at < self.ttl_seconds
+
+
+""" Caches slow-changing grader API resources (course, assignments, settings) with a TTL per resource.
+- Concurrent requests for an expired resource share a single in-flight fetch.
+- If refreshing fails and a previous value exists, the stale value is served instead.
+- Writes that change a resource should `invalidate` it so the next read refetches.
+Values are deep-copied on the way out since handlers annotate the dicts they receive.
+"""
+class MetadataCache:
+    def __init__(self):
+        self._resources: dict[str, CachedResource] = {}
+
+    def register(self, name: str, fetch: Callable[[], Awaitable[Any]], ttl_seconds: float) -> None:
+        self._resources[name] = CachedResource(fetch, ttl_seconds)
+
+    def unregister(self, name: str) -> None:
+        self._resources.pop(name, None)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._resources
+
+    async def _ensure_fresh(self, name: str) -> CachedResource:
+        resource = self._resources[name]
+        if not resource.is_fresh:
+            if resource.in_flight is None:
+                resource.in_flight = asyncio.ensure_future(self._refresh(name, resource))
+            # Shield the shared fetch so that one caller being cancelled doesn't cancel it for everyone else.
+            await asyncio.shield(resource.in_flight)
+        return resource
+
+    async def get(self, name: str) -> Any:
+        resource = await self._ensure_fresh(name)
+        return copy.deepcopy(resource.value)
+
+    async def get_if_changed(self, name: str, since_version: int | None) -> tuple[int, Any]:
+        """ Like `get`, but returns the value's version along with it, and skips copying the value out
+        (returning None in its place) if the version is still `since_version`. """
+        resource = await self._ensure_fresh(name)
+        if resource.version == since_version: return (resource.version, None)
+        return (resource.version, copy.deepcopy(resource.value))
+
+    async def _refresh(self, name: str, resource: CachedResource) -> None:
+        generation = resource.generation
+        try:
+            value = await resource.fetch()
+            if generation == resource.generation:
+                resource.value = value
+                resource.has_value = True
+                resource.fetched_at = time.monotonic()
+                resource.version += 1
+            elif not resource.has_value:
+                # Invalidated mid-fetch: still hand the value to callers already waiting on it, but don't cache it.
+                resource.value = value
+                resource.has_value = True
+                resource.version += 1
+        except Exception as e:
+            if not resource.has_value: raise
+            print(f"Failed to refresh { name }, serving stale value:", repr(e))
+        finally:
+            if generation == resource.generation: resource.in_flight = None
+
+    def invalidate(self, *names: str) -> None:
+        for name in names:
+            resource = self._resources[name]
+            resource.fetched_at = float("-inf")
+            resource.generation += 1
+            # Reads after the invalidation shouldn't join a fetch that started before it.
+            resource.in_flight = None
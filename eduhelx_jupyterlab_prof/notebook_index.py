@@ -0,0 +1,95 @@
+import os
+import time
+import uuid
+import hashlib
+from pathlib import Path
+
+""" Caches the notebooks inside of a single assignment directory.
+A directory's mtime changes whenever an entry is added, removed, or renamed inside of it,
+so the listing is only stale if one of the directories walked to build it has a new mtime. """
+class AssignmentNotebookIndex:
+    IGNORED_DIRECTORY_NAMES = { ".ipynb_checkpoints", ".git" }
+
+    def __init__(self, assignment_path: Path):
+        self.assignment_path = assignment_path
+        self.notebooks: list[str] = []
+        # directory path -> mtime (ns) at the time it was walked
+        self.directory_mtimes: dict[str, int] = {}
+        self.built = False
+
+    def is_stale(self) -> bool:
+        if not self.built: return True
+        for directory, mtime in self.directory_mtimes.items():
+            try:
+                if os.stat(directory).st_mtime_ns != mtime: return True
+            except FileNotFoundError:
+                return True
+        return False
+
+    def rebuild(self) -> None:
+        notebooks = []
+        directory_mtimes = {}
+        directories = [str(self.assignment_path)]
+        while len(directories) > 0:
+            directory = directories.pop()
+            try:
+                directory_mtimes[directory] = os.stat(directory).st_mtime_ns
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in self.IGNORED_DIRECTORY_NAMES:
+                                directories.append(entry.path)
+                        elif entry.name.endswith(".ipynb") and not entry.name.endswith("-student.ipynb"):
+                            notebooks.append(Path(entry.path).relative_to(self.assignment_path))
+            except (FileNotFoundError, NotADirectoryError):
+                # The assignment directory may not exist (yet), in which case there's nothing to index.
+                pass
+
+        # Sort by nestedness, then alphabetically
+        notebooks.sort(key=lambda path: (len(path.parents), str(path)))
+
+        self.notebooks = [str(path) for path in notebooks]
+        self.directory_mtimes = directory_mtimes
+        self.built = True
+
+
+""" In-memory index of the notebooks inside of each assignment directory.
+Revalidation is rate-limited, so bursts of polls (e.g. from several open tabs) are answered from memory. """
+class NotebookIndex:
+    def __init__(self, revalidate_interval_seconds: float = 1.0):
+        self.revalidate_interval_seconds = revalidate_interval_seconds
+        self.version = 0
+        # Distinguishes ETags issued before and after a server restart, since the version restarts at 0.
+        self._epoch = uuid.uuid4().hex
+        self._indices: dict[Path, AssignmentNotebookIndex] = {}
+        self._last_validated: dict[Path, float] = {}
+
+    def _get_assignment_notebooks(self, assignment_path: Path) -> list[str]:
+        index = self._indices.get(assignment_path)
+        if index is None:
+            index = self._indices[assignment_path] = AssignmentNotebookIndex(assignment_path)
+
+        now = time.monotonic()
+        if now - self._last_validated.get(assignment_path, float("-inf")) >= self.revalidate_interval_seconds:
+            self._last_validated[assignment_path] = now
+            if index.is_stale():
+                previous_notebooks = index.notebooks
+                index.rebuild()
+                if index.notebooks != previous_notebooks: self.version += 1
+
+        return index.notebooks
+
+    def get_notebooks(self, repo_root: Path, assignments) -> tuple[dict, str]:
+        """ Returns a mapping of assignment id -> notebook paths and an ETag for the mapping. """
+        assignment_notebooks = {}
+        for assignment in assignments:
+            assignment_path = repo_root / assignment["directory_path"]
+            assignment_notebooks[assignment["id"]] = self._get_assignment_notebooks(assignment_path)
+
+        # The index version only identifies the listing of each directory, not which assignments were requested.
+        assignment_keys = ",".join(f"{ a['id'] }:{ a['directory_path'] }" for a in assignments)
+        etag = hashlib.sha1(f"{ self._epoch }|{ self.version }|{ assignment_keys }".encode("utf-8")).hexdigest()
+        return assignment_notebooks, etag
+
+    def invalidate(self) -> None:
+        self._last_validated.clear()
@@ -1,18 +1,32 @@
+import asyncio
+import weakref
 import subprocess
 
+# Upper bound on the number of subprocesses spawned through `execute_async` at any one time (per event loop).
+MAX_CONCURRENT_PROCESSES = 8
+# A semaphore can only be used from the loop it was first used on, so each loop gets its own.
+_process_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+class ProcessTimeoutException(TimeoutError):
+    def __init__(self, cmd, timeout):
+        super().__init__(f"Command { cmd } timed out after { timeout } seconds")
+        self.cmd = cmd
+        self.timeout = timeout
+
 def remove_trailing_newline(string: str) -> str:
     if string.endswith("\n"):
         return string[:-1]
     return string
 
-def execute(cmd, **kwargs):
+def execute(cmd, stdin_input: str | None = None, **kwargs):
     process = subprocess.Popen(
         cmd,
+        stdin=subprocess.PIPE if stdin_input is not None else None,
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
         **kwargs
     )
-    output, error = process.communicate()
+    output, error = process.communicate(stdin_input.encode("utf-8") if stdin_input is not None else None)
     output = output.decode("utf-8")
     error = error.decode("utf-8")
     exit_code = process.returncode
@@ -20,4 +34,45 @@ def execute(cmd, **kwargs):
     output = remove_trailing_newline(output)
     error = remove_trailing_newline(error)
 
-    return (output, error, exit_code)
\ No newline at end of file
+    return (output, error, exit_code)
+
+def _get_process_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    if loop not in _process_semaphores:
+        _process_semaphores[loop] = asyncio.Semaphore(MAX_CONCURRENT_PROCESSES)
+    return _process_semaphores[loop]
+
+async def _kill(process: asyncio.subprocess.Process) -> None:
+    if process.returncode is None:
+        try: process.kill()
+        except ProcessLookupError: pass
+        await process.wait()
+
+async def execute_async(cmd, stdin_input: str | None = None, timeout: float | None = None, stdout=None, **kwargs):
+    """ Non-blocking equivalent of `execute`, safe to await from the server's event loop.
+    If `timeout` elapses or the awaiting task is cancelled, the process is killed.
+    `stdout` may be a file object, in which case output is streamed to it instead of being returned. """
+    cmd = [str(arg) for arg in cmd]
+    async with _get_process_semaphore():
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.PIPE if stdin_input is not None else None,
+            stdout=stdout if stdout is not None else asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            **kwargs
+        )
+        try:
+            output, error = await asyncio.wait_for(
+                process.communicate(stdin_input.encode("utf-8") if stdin_input is not None else None),
+                timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            await _kill(process)
+            raise ProcessTimeoutException(cmd, timeout)
+        except asyncio.CancelledError:
+            await _kill(process)
+            raise
+
+    output = remove_trailing_newline(output.decode("utf-8")) if output is not None else ""
+    error = remove_trailing_newline(error.decode("utf-8"))
+    return (output, error, process.returncode)
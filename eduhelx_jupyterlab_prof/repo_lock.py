@@ -0,0 +1,134 @@
+import time
+import asyncio
+from pathlib import Path
+from collections import deque
+from contextlib import asynccontextmanager
+
+# Waits longer than this are logged, since they mean that someone sat behind a slow git operation.
+SLOW_WAIT_SECONDS = 5
+
+class LockWaitMetrics:
+    def __init__(self):
+        self.acquisitions = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.last_wait_seconds = 0.0
+
+    def record(self, wait_seconds: float) -> None:
+        self.acquisitions += 1
+        self.total_wait_seconds += wait_seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+        self.last_wait_seconds = wait_seconds
+
+    def to_dict(self) -> dict:
+        return {
+            "acquisitions": self.acquisitions,
+            "total_wait_seconds": self.total_wait_seconds,
+            "mean_wait_seconds": self.total_wait_seconds / self.acquisitions if self.acquisitions > 0 else 0.0,
+            "max_wait_seconds": self.max_wait_seconds,
+            "last_wait_seconds": self.last_wait_seconds
+        }
+
+
+""" Async read/write lock over a repository's working tree and index.
+- Operations that mutate the repository (submitting, restoring files, syncing upstream) take it for writing,
+  and run one at a time. Operations that only inspect it (e.g. `git status`) take it for reading, and may overlap.
+- Waiters are served in order, and readers queue behind a waiting writer, so writers can't be starved by polling.
+- How long each kind of operation waited for the lock is tracked in `metrics`.
+"""
+class RepoLock:
+    def __init__(self, repo_root: Path):
+        self.repo_root = repo_root
+        self._readers = 0
+        self._writing = False
+        # (is_writer, future) in arrival order
+        self._waiters: deque[tuple[bool, asyncio.Future]] = deque()
+        # operation name -> wait metrics
+        self.metrics: dict[str, LockWaitMetrics] = {}
+        # Name of the operation holding the lock for writing, if any.
+        self.writer: str | None = None
+
+    def _can_acquire(self, is_writer: bool) -> bool:
+        if is_writer: return not self._writing and self._readers == 0
+        return not self._writing
+
+    def _wake_waiters(self) -> None:
+        while len(self._waiters) > 0:
+            (is_writer, future) = self._waiters[0]
+            if future.done():
+                # Cancelled while waiting.
+                self._waiters.popleft()
+                continue
+            if not self._can_acquire(is_writer): return
+            self._waiters.popleft()
+            if is_writer: self._writing = True
+            else: self._readers += 1
+            future.set_result(None)
+            # A writer excludes everyone after it.
+            if is_writer: return
+
+    async def _acquire(self, is_writer: bool) -> None:
+        if len(self._waiters) == 0 and self._can_acquire(is_writer):
+            if is_writer: self._writing = True
+            else: self._readers += 1
+            return
+        future = asyncio.get_event_loop().create_future()
+        self._waiters.append((is_writer, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Acquired right as we were cancelled, so hand it back.
+                self._release(is_writer)
+            else:
+                self._wake_waiters()
+            raise
+
+    def _release(self, is_writer: bool) -> None:
+        if is_writer: self._writing = False
+        else: self._readers -= 1
+        self._wake_waiters()
+
+    @asynccontextmanager
+    async def _hold(self, is_writer: bool, operation: str):
+        started_at = time.monotonic()
+        await self._acquire(is_writer)
+        wait_seconds = time.monotonic() - started_at
+        self.metrics.setdefault(operation, LockWaitMetrics()).record(wait_seconds)
+        if wait_seconds > SLOW_WAIT_SECONDS:
+            print(f"{ operation } waited { wait_seconds:.1f}s for the repository lock ({ self.repo_root })")
+        if is_writer: self.writer = operation
+        try:
+            yield
+        finally:
+            if is_writer: self.writer = None
+            self._release(is_writer)
+
+    def read(self, operation: str):
+        return self._hold(False, operation)
+
+    def write(self, operation: str):
+        return self._hold(True, operation)
+
+    def to_dict(self) -> dict:
+        return {
+            "repo_root": str(self.repo_root),
+            "writer": self.writer,
+            "readers": self._readers,
+            "waiting": sum(1 for (_, future) in self._waiters if not future.done()),
+            "wait_metrics": { operation: metrics.to_dict() for operation, metrics in self.metrics.items() }
+        }
+
+
+class RepoLockRegistry:
+    def __init__(self):
+        self._locks: dict[Path, RepoLock] = {}
+
+    def get(self, repo_root) -> RepoLock:
+        repo_root = Path(repo_root).resolve()
+        if repo_root not in self._locks:
+            self._locks[repo_root] = RepoLock(repo_root)
+        return self._locks[repo_root]
+
+    def to_dict(self) -> list[dict]:
+        return [lock.to_dict() for lock in self._locks.values()]
@@ -0,0 +1,41 @@
+import copy
+from pathlib import Path, PurePosixPath
+from .git import get_modified_paths_async
+
+""" A single `git status` of the whole repository, bucketed into assignments.
+Modified paths are bucketed by walking up their parent directories against an index
+of assignment directory paths, so the cost is proportional to the number of changed files
+rather than to the number of assignments. """
+class RepoStatusSnapshot:
+    def __init__(self, repo_root: Path, modified_paths: list[dict]):
+        self.repo_root = repo_root
+        self.modified_paths = modified_paths
+
+    @classmethod
+    async def take(cls, repo_root: Path, **kwargs):
+        return cls(repo_root, await get_modified_paths_async(path=repo_root, **kwargs))
+
+    @staticmethod
+    def _normalize_directory(directory_path: str) -> PurePosixPath:
+        return PurePosixPath(*PurePosixPath(directory_path).parts)
+
+    def bucket_by_assignment(self, assignments) -> dict[int, list[dict]]:
+        """ Returns a mapping of assignment id -> the modified paths that fall under the assignment's directory. """
+        assignment_index: dict[PurePosixPath, list] = {}
+        for assignment in assignments:
+            directory = self._normalize_directory(assignment["directory_path"])
+            assignment_index.setdefault(directory, []).append(assignment)
+
+        buckets = { assignment["id"] : [] for assignment in assignments }
+        for modified_path in self.modified_paths:
+            path = PurePosixPath(modified_path["path"])
+            # A path belongs to every assignment directory that contains it (nested assignments included).
+            # The path itself is included since an untracked assignment directory is reported as a single entry.
+            for directory in (path, *path.parents):
+                for assignment in assignment_index.get(directory, []):
+                    # Each assignment gets its own copy, since `path_from_assn` differs per assignment.
+                    assignment_change = copy.copy(modified_path)
+                    assignment_change["path_from_repo"] = modified_path["path"]
+                    assignment_change["path_from_assn"] = str(path.relative_to(directory))
+                    buckets[assignment["id"]].append(assignment_change)
+        return buckets
@@ -0,0 +1,123 @@
+import uuid
+import json
+import hashlib
+
+class AssignmentSubmissions:
+    def __init__(self):
+        # Distinguishes versions issued before and after the assignment was (re)indexed, e.g. across a server restart,
+        # since versions restart at 0.
+        self.epoch = uuid.uuid4().hex
+        self.version = 0
+        # onyen -> submissions (most recent first)
+        self.submissions: dict[str, list[dict]] = {}
+        self._digests: dict[str, str] = {}
+        # onyen -> version at which the student's submissions last changed
+        self.changed_at: dict[str, int] = {}
+        # onyen -> version at which the student was removed from the listing
+        self.removed_at: dict[str, int] = {}
+
+
+""" Versioned view of each assignment's student submissions, so that clients can page through them
+and, once they have a copy, only fetch the students whose submissions changed since their version.
+Versions are opaque tokens; a token from before a server restart or the assignment being `remove`d
+(or otherwise unknown) gets a full listing. """
+class SubmissionsIndex:
+    def __init__(self):
+        self._assignments: dict[int, AssignmentSubmissions] = {}
+        # Stands in for assignments that haven't been indexed.
+        self._empty = AssignmentSubmissions()
+
+    @staticmethod
+    def _decorate(student_submissions: list[dict], commit_infos: dict[str, dict]) -> list[dict]:
+        for i, submission in enumerate(student_submissions):
+            if i == 0: submission["active"] = True
+            # Commits that couldn't be resolved (e.g. not fetched yet) get a placeholder.
+            submission["commit"] = commit_infos.get(submission["commit_id"], {
+                "id": submission["commit_id"],
+                "message": "",
+                "author_name": "",
+                "author_email": "",
+                "committer_name": "",
+                "committer_email": ""
+            })
+        return student_submissions
+
+    def update(self, assignment_id: int, submissions: dict[str, list[dict]], commit_infos: dict[str, dict] | None = None) -> None:
+        """ Record the latest submissions of an assignment (as returned by the grader API), bumping the version if anything changed.
+        `commit_infos` maps commit ids to their commit info (see `get_commit_infos_async`). """
+        if commit_infos is None: commit_infos = {}
+        index = self._assignments.setdefault(assignment_id, AssignmentSubmissions())
+        changed = []
+        digests = {}
+        for onyen, student_submissions in submissions.items():
+            # Digest the decorated submissions, so that a commit being resolved later counts as a change.
+            self._decorate(student_submissions, commit_infos)
+            digests[onyen] = hashlib.sha1(json.dumps(student_submissions, sort_keys=True).encode("utf-8")).hexdigest()
+            if index._digests.get(onyen) != digests[onyen]: changed.append(onyen)
+        removed = [onyen for onyen in index.submissions if onyen not in submissions]
+        if len(changed) == 0 and len(removed) == 0: return
+
+        index.version += 1
+        for onyen in changed:
+            index.submissions[onyen] = submissions[onyen]
+            index.changed_at[onyen] = index.version
+            index.removed_at.pop(onyen, None)
+        for onyen in removed:
+            del index.submissions[onyen]
+            del index.changed_at[onyen]
+            index.removed_at[onyen] = index.version
+        index._digests = digests
+
+    def remove(self, assignment_id: int) -> None:
+        """ Forget an assignment's submissions. Versions issued before are no longer recognized. """
+        self._assignments.pop(assignment_id, None)
+
+    @staticmethod
+    def _parse_version(index: AssignmentSubmissions, token: str | None) -> int | None:
+        if token is None: return None
+        epoch, _, version = token.partition(".")
+        if epoch != index.epoch or not version.isdigit(): return None
+        return int(version)
+
+    def get_version(self, assignment_id: int) -> str:
+        """ The current version of an assignment's submissions, as reported in its listings. """
+        index = self._assignments.get(assignment_id, self._empty)
+        return f"{ index.epoch }.{ index.version }"
+
+    def get_page(
+        self,
+        assignment_id: int,
+        since_version: str | None = None,
+        student: str | None = None,
+        cursor: str | None = None,
+        limit: int = 100
+    ) -> dict:
+        """ Get a page of (at most `limit`) students' submissions, ordered by onyen, starting after `cursor`.
+        - since_version: only include students whose submissions changed since this version (a delta).
+        - student: only include this student.
+        Clients should hold on to the version of the first page of a listing, so that changes made
+        while they were paging are included in their next delta. """
+        index = self._assignments.get(assignment_id, self._empty)
+        since = self._parse_version(index, since_version)
+        full = since is None
+
+        onyens = sorted(
+            onyen for onyen in index.submissions
+            if (student is None or onyen == student) and (full or index.changed_at[onyen] > since)
+        )
+        if cursor is not None:
+            onyens = [onyen for onyen in onyens if onyen > cursor]
+        page, rest = onyens[:limit], onyens[limit:]
+
+        removed_students = [] if full else sorted(
+            onyen for onyen, version in index.removed_at.items()
+            if version > since and (student is None or onyen == student)
+        )
+        return {
+            "version": self.get_version(assignment_id),
+            # A full listing replaces the client's copy, whereas a delta is merged into it.
+            "full": full,
+            "submissions": { onyen: index.submissions[onyen] for onyen in page },
+            "removed_students": removed_students,
+            "next_cursor": page[-1] if len(rest) > 0 else None
+        }
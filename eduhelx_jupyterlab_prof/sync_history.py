@@ -0,0 +1,133 @@
+import os
+import json
+import time
+import uuid
+from enum import Enum
+from pathlib import Path
+from collections import deque
+from contextlib import contextmanager
+
+class SyncOutcome(str, Enum):
+    # Upstream had nothing that the instructor's branch didn't already have.
+    UP_TO_DATE = "up_to_date"
+    FAST_FORWARDED = "fast_forwarded"
+    MERGED = "merged"
+    FAILED = "failed"
+    # Upstream couldn't be checked at all. Consecutive ones are collapsed into a single entry.
+    UNREACHABLE = "unreachable"
+
+class ConflictResolution(str, Enum):
+    # The file is overwritable, so the incoming version was taken as-is.
+    OVERWRITTEN = "overwritten"
+    # The instructor's version was backed up next to it before taking the incoming version.
+    BACKED_UP = "backed_up"
+    # The instructor deleted the file, so there was nothing to back up.
+    DELETED_LOCALLY = "deleted_locally"
+    # An untracked file that couldn't be moved back after the merge, left where it was preserved.
+    UNRESTORED = "unrestored"
+
+
+class SyncRun:
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.started_at = time.time()
+        self.finished_at: float | None = None
+        self.outcome: SyncOutcome | None = None
+        # See UpstreamSyncKind.
+        self.kind: str | None = None
+        self.error: str | None = None
+        self.local_head: str | None = None
+        self.tracking_head: str | None = None
+        self.phases: list[dict] = []
+        self.conflicts: list[dict] = []
+
+    def add_phase(self, name: str, duration_seconds: float) -> None:
+        self.phases.append({ "name": name, "duration_seconds": duration_seconds })
+
+    @contextmanager
+    def phase(self, name: str):
+        """ Time a phase of the sync. Phases are recorded even if they fail. """
+        started_at = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.monotonic() - started_at)
+
+    def record_conflict(self, path: str, cause: str, resolution: ConflictResolution, backup_path: str | None = None) -> None:
+        """ `cause` is what the conflict arose from: "merge" (upstream's changes), "stash" (reapplying local changes)
+        or "untracked" (an untracked file in the way of upstream's changes). Paths are relative to the repo root. """
+        self.conflicts.append({
+            "path": path,
+            "cause": cause,
+            "resolution": resolution.value,
+            "backup_path": backup_path
+        })
+
+    def finish(self, outcome: SyncOutcome, error: str | None = None) -> None:
+        self.outcome = outcome
+        self.error = error
+        self.finished_at = time.time()
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "duration_seconds": self.finished_at - self.started_at if self.finished_at is not None else None,
+            "outcome": self.outcome.value if self.outcome is not None else None,
+            "kind": self.kind,
+            "error": self.error,
+            "local_head": self.local_head,
+            "tracking_head": self.tracking_head,
+            "phases": self.phases,
+            "conflicts": self.conflicts,
+            # How many consecutive runs this entry stands for, and when the latest of them finished.
+            "occurrences": 1,
+            "last_occurred_at": self.finished_at
+        }
+
+
+""" The most recent `max_runs` upstream syncs that did something (up-to-date checks aren't kept, since they'd
+crowd out everything else), most recent first. While the remote is unreachable, every run fails the same way,
+so those are kept as one entry instead of flushing out everything before the outage. Persisted to `path` after
+every run, so that it survives restarts. """
+class SyncHistory:
+    def __init__(self, path: Path, max_runs: int = 50):
+        self.path = Path(path)
+        self._runs: deque[dict] = deque(maxlen=max_runs)
+        try:
+            self._runs.extend(json.loads(self.path.read_text())[:max_runs])
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"Couldn't load sync history from { self.path }, starting over", e)
+
+    def record(self, run: SyncRun) -> bool:
+        """ Returns whether the run was kept. """
+        if run.outcome == SyncOutcome.UP_TO_DATE: return False
+        latest = self._runs[0] if len(self._runs) > 0 else None
+        if (
+            run.outcome == SyncOutcome.UNREACHABLE and latest is not None
+            and latest["outcome"] == SyncOutcome.UNREACHABLE.value
+        ):
+            latest["occurrences"] = latest.get("occurrences", 1) + 1
+            latest["last_occurred_at"] = run.finished_at
+            # The reason may change over an outage (e.g. a timeout, then a refused connection), so show the latest.
+            latest["error"] = run.error
+        else:
+            self._runs.appendleft(run.to_dict())
+        self._persist()
+        return True
+
+    def _persist(self) -> None:
+        # Write to a temporary file and swap it in, so a crash mid-write can't leave a truncated history behind.
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(json.dumps(list(self._runs)))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Couldn't persist sync history to { self.path }", e)
+
+    def to_list(self) -> list[dict]:
+        return list(self._runs)
@@ -0,0 +1,15 @@
+import pytest
+from .git_repos import git
+
+
+@pytest.fixture
+def git_repo(tmp_path, monkeypatch):
+    """ An empty git repository on branch main, isolated from the user's global git config. """
+    monkeypatch.setenv("GIT_CONFIG_GLOBAL", str(tmp_path / "gitconfig"))
+    monkeypatch.setenv("GIT_CONFIG_NOSYSTEM", "1")
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    git(repo, "init", "-q", "-b", "main")
+    git(repo, "config", "user.name", "Instructor")
+    git(repo, "config", "user.email", "instructor@example.com")
+    return repo
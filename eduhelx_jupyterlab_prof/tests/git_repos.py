@@ -0,0 +1,19 @@
+import subprocess
+from pathlib import Path
+
+
+def git(repo: Path, *args: str) -> str:
+    """ Run a git command in `repo` (synchronously, for setting up test repositories) and return its output. """
+    return subprocess.run(["git", *args], cwd=repo, check=True, capture_output=True, text=True).stdout.strip()
+
+def commit_files(repo: Path, message: str, files: dict[str, str | None]) -> str:
+    """ Write (or, for None, delete) files in `repo`, commit them, and return the commit id. """
+    for path, content in files.items():
+        if content is None:
+            git(repo, "rm", "-q", path)
+            continue
+        (repo / path).parent.mkdir(parents=True, exist_ok=True)
+        (repo / path).write_text(content)
+        git(repo, "add", path)
+    git(repo, "commit", "-q", "-m", message)
+    return git(repo, "rev-parse", "HEAD")
@@ -0,0 +1,49 @@
+import pytest
+from eduhelx_jupyterlab_prof.git import get_commit_infos_async
+from eduhelx_jupyterlab_prof.commit_info import CommitInfoCache
+from .git_repos import git, commit_files
+
+
+@pytest.mark.asyncio
+async def test_resolves_commits_in_one_batch(git_repo):
+    first = commit_files(git_repo, "First", { "a.txt": "a" })
+    # Messages can span lines, and contain anything that isn't a NUL.
+    second = commit_files(git_repo, "Second\n\nDetails: 100% | tabs\there", { "b.txt": "b" })
+
+    infos = await get_commit_infos_async([second, first[:8], second], path=git_repo)
+
+    # Commits are keyed by the id they were requested with, abbreviated or not.
+    assert set(infos) == { second, first[:8] }
+    assert infos[first[:8]]["id"] == first[:8]
+    assert infos[first[:8]]["message"] == "First"
+    assert infos[second]["message"] == "Second\n\nDetails: 100% | tabs\there"
+    assert infos[second]["author_name"] == "Instructor"
+    assert infos[second]["committer_email"] == "instructor@example.com"
+
+
+@pytest.mark.asyncio
+async def test_unknown_commits_are_left_out(git_repo):
+    commit_id = commit_files(git_repo, "First", { "a.txt": "a" })
+    tree_id = git(git_repo, "rev-parse", "HEAD^{tree}")
+
+    infos = await get_commit_infos_async([commit_id, "0" * 40, tree_id], path=git_repo)
+
+    assert list(infos) == [commit_id]
+    assert await get_commit_infos_async([], path=git_repo) == {}
+    assert await get_commit_infos_async(["0" * 40], path=git_repo) == {}
+
+
+@pytest.mark.asyncio
+async def test_cache_remembers_misses(git_repo):
+    commit_files(git_repo, "First", { "a.txt": "a" })
+    cache = CommitInfoCache(miss_ttl_seconds=60)
+    assert await cache.get_many(["HEAD"], git_repo) != {}
+
+    # Not there yet, so it's remembered as missing for a while.
+    branch = "refs/heads/later"
+    assert await cache.get_many([branch], git_repo) == {}
+    git(git_repo, "branch", "later")
+    assert await cache.get_many([branch], git_repo) == {}
+
+    cache.miss_ttl_seconds = 0
+    assert branch in await cache.get_many([branch], git_repo)
@@ -0,0 +1,67 @@
+import time
+import asyncio
+import pytest
+from eduhelx_jupyterlab_prof.fanout import fan_out, FanOutTimeoutException
+
+
+async def respond(value, delay: float = 0):
+    await asyncio.sleep(delay)
+    return value
+
+
+@pytest.mark.asyncio
+async def test_calls_run_concurrently():
+    started_at = time.monotonic()
+
+    values = await fan_out(a=respond(1, 0.2), b=respond(2, 0.2), c=respond(3, 0.2))
+
+    assert values == { "a": 1, "b": 2, "c": 3 }
+    assert time.monotonic() - started_at < 0.5
+
+
+@pytest.mark.asyncio
+async def test_slow_call_times_out_by_name():
+    with pytest.raises(FanOutTimeoutException) as e:
+        await fan_out(fast=respond(1), slow=respond(2, 5), timeout=0.1)
+
+    assert e.value.name == "slow"
+    assert isinstance(e.value, asyncio.TimeoutError)
+
+
+@pytest.mark.asyncio
+async def test_failed_call_cancels_the_others():
+    cancelled = asyncio.Event()
+    async def never_finishes():
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+    async def fails():
+        await asyncio.sleep(0.05)
+        raise ValueError("broken")
+
+    with pytest.raises(ValueError, match="broken"):
+        await fan_out(waiting=never_finishes(), failing=fails(), timeout=5)
+
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_cancelling_the_caller_cancels_every_call():
+    cancelled = []
+    async def never_finishes(name):
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            cancelled.append(name)
+            raise
+    task = asyncio.ensure_future(fan_out(a=never_finishes("a"), b=never_finishes("b")))
+    await asyncio.sleep(0.05)
+
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    await asyncio.sleep(0)
+
+    assert sorted(cancelled) == ["a", "b"]
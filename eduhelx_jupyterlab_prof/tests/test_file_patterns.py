@@ -0,0 +1,136 @@
+import pytest
+from pathlib import Path
+from eduhelx_jupyterlab_prof.file_patterns import AssignmentFilePatterns, get_file_patterns
+
+FILES = [
+    "README.md",
+    "hw2/notebook.ipynb",
+    "hw2/data/train.csv",
+    "hw1/notebook.ipynb",
+    "hw1/.hidden.ipynb",
+    "hw1/README.md",
+    "hw1/data.csv",
+    "hw1/data/train.csv",
+    "hw1/data/nested/deep/test.csv",
+    "hw1/solutions/answers.ipynb",
+    "hw1/solutions/nested/more.ipynb",
+    "hw1/file1.txt",
+    "hw1/file2.txt",
+    "hw1/fileA.txt",
+    "hw1/file10.txt",
+    "hw1/a+b(c)$.txt",
+    "hw1/weird[1].txt",
+    "hw1/weird1.txt",
+    "hw1/star*name.txt",
+    "hw1/^caret.txt",
+    "hw1/x]y.txt",
+    "hw1/open[bracket.txt",
+    "hw1/back\\slash.txt",
+]
+
+# Each is compared against what `Path.glob` expands it to on disk, which is how patterns used to be matched.
+PATTERNS = [
+    "*.ipynb",
+    "*",
+    ".*",
+    "[!.]*",
+    # `*` and `?` never cross a slash.
+    "*.csv",
+    "*/*.csv",
+    "data/*",
+    "data/*.csv",
+    "file?.txt",
+    # `**` leading, in the middle, and with nothing in between.
+    "**/*.ipynb",
+    "**/*.csv",
+    "data/**/*.csv",
+    "data/**/deep/*.csv",
+    "**/nested/**/*.csv",
+    "solutions/**/*",
+    "./solutions/*.ipynb",
+    # Character classes.
+    "file[0-9].txt",
+    "file[!0-9].txt",
+    "file[0-9]*.txt",
+    "file[12A].txt",
+    "[]x]*",
+    "x]y.txt",
+    "[^]caret.txt",
+    # Characters that mean something in a regex, or are escaped with a class.
+    "a+b(c)$.txt",
+    "weird[[]1].txt",
+    "weird[1].txt",
+    "star[*]name.txt",
+    "open[bracket.txt",
+    "back\\slash.txt",
+    "back[\\]slash.txt",
+    "nonexistent/*",
+]
+
+
+@pytest.fixture
+def repo(tmp_path):
+    for file in FILES:
+        (tmp_path / file).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / file).write_text("")
+    return tmp_path
+
+def make_patterns(directory_path: str, overwritable_files: list[str], protected_files: list[str] = []):
+    return AssignmentFilePatterns([{
+        "directory_path": directory_path,
+        "overwritable_files": overwritable_files,
+        "protected_files": protected_files
+    }])
+
+
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_matches_like_path_glob(repo, pattern):
+    expanded = { str(path.relative_to(repo)) for path in (repo / "hw1").glob(pattern) if path.is_file() }
+
+    patterns = make_patterns("hw1", [pattern])
+    matched = { file for file in FILES if patterns.is_overwritable(file) }
+
+    assert matched == expanded
+
+
+@pytest.mark.parametrize("pattern,matches", [
+    # Unlike `Path.glob`, which only expands a trailing `**` to directories, it matches everything beneath them.
+    ("solutions/**", ["hw1/solutions/answers.ipynb", "hw1/solutions/nested/more.ipynb"]),
+    ("**", [file for file in FILES if file.startswith("hw1/")]),
+])
+def test_trailing_double_star_matches_everything_beneath(pattern, matches):
+    patterns = make_patterns("hw1", [pattern])
+    assert sorted(file for file in FILES if patterns.is_overwritable(file)) == sorted(matches)
+
+
+def test_patterns_are_relative_to_assignment_directory():
+    patterns = make_patterns("hw1/", ["*.ipynb"], protected_files=["solutions/**/*.ipynb"])
+
+    assert patterns.is_overwritable("hw1/notebook.ipynb")
+    assert not patterns.is_overwritable("hw2/notebook.ipynb")
+    # A directory that merely shares a prefix with the assignment's.
+    assert not patterns.is_overwritable("hw10/notebook.ipynb")
+    assert patterns.is_protected("hw1/solutions/nested/more.ipynb")
+    assert not patterns.is_protected("hw1/notebook.ipynb")
+    assert not patterns.is_overwritable(Path("hw1") / "solutions" / "answers.ipynb")
+
+
+def test_assignment_at_repo_root():
+    patterns = make_patterns(".", ["*.md"])
+    assert patterns.is_overwritable("README.md")
+    assert not patterns.is_overwritable("hw1/README.md")
+
+
+def test_empty_patterns_match_nothing():
+    patterns = make_patterns("hw1", [], protected_files=[""])
+    assert not any(patterns.is_overwritable(file) or patterns.is_protected(file) for file in FILES)
+
+
+def test_compiled_patterns_are_reused_until_globs_change():
+    assignments = [{ "directory_path": "hw1", "overwritable_files": ["*.csv"], "protected_files": [] }]
+    patterns = get_file_patterns(assignments)
+    assert get_file_patterns([dict(assignment) for assignment in assignments]) is patterns
+
+    assignments[0]["overwritable_files"] = ["*.ipynb"]
+    assert get_file_patterns(assignments) is not patterns
+    assert get_file_patterns(assignments).is_overwritable("hw1/notebook.ipynb")
@@ -0,0 +1,103 @@
+import os
+import pytest
+from eduhelx_jupyterlab_prof.git import GitException, apply_config_async, read_config_file_async
+from .git_repos import git
+
+
+@pytest.mark.asyncio
+async def test_creates_config(tmp_path):
+    config_path = tmp_path / "repo" / ".git" / "config"
+
+    assert await apply_config_async(config_path, { "user.name": ["Instructor"], "core.sshcommand": [] })
+
+    assert await read_config_file_async(config_path) == [("user.name", "Instructor")]
+    assert not os.path.exists(f"{ config_path }.lock")
+
+
+@pytest.mark.asyncio
+async def test_only_desired_keys_change(git_repo):
+    config_path = git_repo / ".git" / "config"
+    git(git_repo, "remote", "add", "origin", "ssh://git@example.com/course.git")
+    git(git_repo, "config", "--add", "credential.helper", "cache")
+    git(git_repo, "config", "core.sshCommand", "ssh -i key")
+
+    changed = await apply_config_async(config_path, {
+        "user.name": ["Someone Else"],
+        # Multiple values, replacing the existing one.
+        "credential.helper": ["", "store"],
+        "core.sshcommand": []
+    })
+
+    assert changed
+    assert git(git_repo, "config", "user.name") == "Someone Else"
+    entries = await read_config_file_async(config_path)
+    assert [value for (key, value) in entries if key == "credential.helper"] == ["", "store"]
+    assert git(git_repo, "config", "--get-all", "remote.origin.url") == "ssh://git@example.com/course.git"
+    assert git(git_repo, "config", "user.email") == "instructor@example.com"
+    with pytest.raises(Exception):
+        git(git_repo, "config", "core.sshcommand")
+
+
+@pytest.mark.asyncio
+async def test_unchanged_config_is_not_rewritten(git_repo):
+    config_path = git_repo / ".git" / "config"
+    desired = { "user.name": ["Instructor"], "user.email": ["instructor@example.com"], "core.sshcommand": [] }
+    inode = os.stat(config_path).st_ino
+
+    assert not await apply_config_async(config_path, desired)
+    assert os.stat(config_path).st_ino == inode
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("value", [
+    "",
+    "  leading and trailing whitespace  ",
+    "ssh -F /path with spaces/config # not a comment",
+    'quotes " and \\ backslashes',
+    "semicolons; too",
+    "tabs\tand\nnewlines",
+])
+async def test_values_round_trip(git_repo, value):
+    config_path = git_repo / ".git" / "config"
+
+    await apply_config_async(config_path, { "core.sshcommand": [value] })
+
+    assert ("core.sshcommand", value) in await read_config_file_async(config_path)
+    # Applying the same value again is a no-op.
+    assert not await apply_config_async(config_path, { "core.sshcommand": [value] })
+
+
+@pytest.mark.asyncio
+async def test_locked_config_is_left_alone(git_repo):
+    config_path = git_repo / ".git" / "config"
+    with open(config_path) as f: before = f.read()
+    # e.g. git itself is in the middle of writing the config.
+    open(f"{ config_path }.lock", "w").close()
+
+    with pytest.raises(GitException):
+        await apply_config_async(config_path, { "user.name": ["Someone Else"] })
+
+    with open(config_path) as f: assert f.read() == before
+    assert os.path.exists(f"{ config_path }.lock")
+
+
+@pytest.mark.asyncio
+async def test_rest_of_the_file_is_left_as_it_was(git_repo):
+    config_path = git_repo / ".git" / "config"
+    with open(config_path, "a") as f:
+        f.write(
+            "# Added by the instructor\n"
+            "[alias]\n"
+            "    lg = log --graph   ; keep it short\n"
+            "[credential]\n"
+            "\thelper = cache\n"
+        )
+    with open(config_path) as f: before = f.read()
+
+    await apply_config_async(config_path, {
+        "user.name": ["Instructor"],
+        "credential.helper": ["store"]
+    })
+
+    with open(config_path) as f: after = f.read()
+    assert after == before.replace("\thelper = cache\n", "\thelper = store\n")
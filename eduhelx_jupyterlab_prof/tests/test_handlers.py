@@ -1,4 +1,13 @@
 import json
+import asyncio
+import pytest
+from types import SimpleNamespace
+from tornado.httpclient import HTTPClientError
+from eduhelx_utils.api import APIException
+from eduhelx_jupyterlab_prof import handlers
+from eduhelx_jupyterlab_prof.handlers import AppContext, BaseHandler, BootstrapStage, setup_backend
+from eduhelx_jupyterlab_prof.fanout import FanOutTimeoutException
+from eduhelx_jupyterlab_prof.upstream_sync import UpstreamSyncScheduler
 
 
 async def test_get_example(jp_fetch):
@@ -10,4 +19,135 @@ async def test_get_example(jp_fetch):
     payload = json.loads(response.body)
     assert payload == {
         "data": "This is /eduhelx-jupyterlab-prof/get-example endpoint!"
-    }
\ No newline at end of file
+    }
+
+async def test_job_status_rejects_non_integer_since_version(jp_fetch):
+    async def run(job):
+        pass
+    job = BaseHandler.context.jobs.submit("test", "key", run)
+    await job.wait()
+
+    with pytest.raises(HTTPClientError) as e:
+        await jp_fetch("eduhelx-jupyterlab-prof", "jobs", params={ "job_id": job.id, "since_version": "latest" })
+    assert e.value.code == 400
+
+
+async def test_unchanged_response_is_not_modified(jp_fetch):
+    response = await jp_fetch("eduhelx-jupyterlab-prof", "repo_lock_metrics")
+    etag = response.headers["Etag"]
+
+    with pytest.raises(HTTPClientError) as e:
+        await jp_fetch("eduhelx-jupyterlab-prof", "repo_lock_metrics", headers={ "If-None-Match": etag })
+    assert e.value.code == 304
+
+
+@pytest.mark.parametrize("params", [
+    { "assignment_id": "first" },
+    { "assignment_id": "1", "limit": "all" },
+    { "assignment_id": "1", "limit": "0" },
+    { "assignment_id": "1", "limit": "-5" },
+])
+async def test_student_submissions_rejects_invalid_arguments(jp_fetch, params):
+    with pytest.raises(HTTPClientError) as e:
+        await jp_fetch("eduhelx-jupyterlab-prof", "student_submissions", params=params)
+    assert e.value.code == 400
+
+
+@pytest.fixture
+def submissions_api(jp_serverapp, monkeypatch, tmp_path):
+    """ Serves every assignment's submissions from `submissions` (assignment id -> onyen -> submissions) instead of the grader API. """
+    context = BaseHandler.context
+    submissions = {}
+    async def get_submissions(assignment_id):
+        return submissions.get(assignment_id, {})
+    async def get_repo_root():
+        return tmp_path
+    async def get_many(commit_ids, repo_root):
+        return { commit_id: { "id": commit_id } for commit_id in commit_ids }
+    monkeypatch.setattr(context.api, "get_submissions", get_submissions)
+    monkeypatch.setattr(context, "get_repo_root", get_repo_root)
+    monkeypatch.setattr(context.commit_infos, "get_many", get_many)
+    return submissions
+
+
+async def test_unchanged_submissions_are_not_reindexed(submissions_api, monkeypatch):
+    context = BaseHandler.context
+    updates = []
+    update = context.submissions_index.update
+    monkeypatch.setattr(context.submissions_index, "update", lambda *args: updates.append(args[0]) or update(*args))
+    submissions_api[1] = { "alice": [{ "commit_id": "a1" }] }
+
+    await context.refresh_submissions(1)
+    # Still cached from the grader API, so there's nothing new to index.
+    await context.refresh_submissions(1)
+    assert updates == [1]
+
+    submissions_api[1] = { "alice": [{ "commit_id": "a2" }, { "commit_id": "a1" }] }
+    context.metadata.invalidate("submissions/1")
+    await context.refresh_submissions(1)
+    assert updates == [1, 1]
+    assert list(context.submissions_index.get_page(1)["submissions"]["alice"][0]["commit"]) == ["id"]
+
+
+async def test_submissions_of_least_recently_requested_assignments_are_evicted(submissions_api, monkeypatch):
+    context = BaseHandler.context
+    monkeypatch.setattr(context, "config", context.config.replace(SUBMISSIONS_MAX_CACHED_ASSIGNMENTS=2))
+    for assignment_id in (1, 2, 3):
+        submissions_api[assignment_id] = { "alice": [{ "commit_id": f"a{ assignment_id }" }] }
+
+    await context.refresh_submissions(1)
+    version = context.submissions_index.get_version(1)
+    await context.refresh_submissions(2)
+    await context.refresh_submissions(1)
+    await context.refresh_submissions(3)
+
+    assert "submissions/1" in context.metadata and "submissions/3" in context.metadata
+    assert "submissions/2" not in context.metadata
+    assert context.submissions_index.get_page(2)["submissions"] == {}
+    # Still cached, so its version carries on.
+    assert context.submissions_index.get_version(1) == version
+
+
+@pytest.fixture
+def bootstrap(jp_serverapp, monkeypatch):
+    """ A fresh context whose repository bootstrap fails with each of `failures` in turn, recording the stages it goes through. """
+    context = AppContext(jp_serverapp)
+    monkeypatch.setattr(context, "config", context.config.replace(BOOTSTRAP_RETRY_INTERVAL_SECONDS=0))
+    failures = []
+    stages = []
+    set_bootstrap_stage = context.set_bootstrap_stage
+    def record_stage(stage, error=None):
+        stages.append(stage)
+        set_bootstrap_stage(stage, error)
+    async def bootstrap_repository(context):
+        if len(failures) > 0: raise failures.pop(0)
+        return { "name": "Course" }
+    async def run(self):
+        pass
+    monkeypatch.setattr(context, "set_bootstrap_stage", record_stage)
+    monkeypatch.setattr(handlers, "bootstrap_repository", bootstrap_repository)
+    monkeypatch.setattr(UpstreamSyncScheduler, "run", run)
+    return context, failures, stages
+
+
+async def test_failed_bootstrap_is_retried(bootstrap):
+    context, failures, stages = bootstrap
+    failures.extend([FanOutTimeoutException("course", 30), ConnectionError("offline")])
+
+    await asyncio.wait_for(setup_backend(context), timeout=5)
+
+    assert stages == [BootstrapStage.RETRYING, BootstrapStage.RETRYING, BootstrapStage.READY]
+    assert context.get_readiness()["ready"]
+    assert context.upstream_sync is not None
+
+
+async def test_refused_bootstrap_is_not_retried(bootstrap):
+    context, failures, stages = bootstrap
+    refused = APIException.__new__(APIException)
+    refused.response = SimpleNamespace(status_code=401, text="Unauthorized")
+    failures.append(refused)
+
+    await asyncio.wait_for(setup_backend(context), timeout=5)
+
+    assert stages == [BootstrapStage.FAILED]
+    assert context.upstream_sync is None
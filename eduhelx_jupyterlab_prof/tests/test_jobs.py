@@ -0,0 +1,171 @@
+import asyncio
+import pytest
+from eduhelx_jupyterlab_prof.jobs import JobRegistry, JobState, JobFailedException
+
+
+@pytest.mark.asyncio
+async def test_job_result():
+    jobs = JobRegistry()
+
+    async def run(job):
+        return "result"
+    job = jobs.submit("kind", "key", run)
+
+    assert await job.wait() == "result"
+    assert job.state == JobState.DONE
+
+
+@pytest.mark.asyncio
+async def test_failed_job_raises_on_wait():
+    jobs = JobRegistry()
+
+    async def run(job):
+        raise ValueError("broken")
+    job = jobs.submit("kind", "key", run)
+
+    with pytest.raises(JobFailedException):
+        await job.wait()
+    assert job.state == JobState.FAILED
+    assert job.error == "broken"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_job_releases_waiters():
+    jobs = JobRegistry()
+
+    async def run(job):
+        raise asyncio.CancelledError()
+    job = jobs.submit("kind", "key", run)
+
+    with pytest.raises(JobFailedException):
+        await asyncio.wait_for(job.wait(), timeout=1)
+    assert job.state == JobState.FAILED
+    assert job.finished_at is not None
+
+
+@pytest.mark.asyncio
+async def test_in_flight_job_is_deduplicated():
+    jobs = JobRegistry()
+    release = asyncio.Event()
+    runs = 0
+
+    async def run(job):
+        nonlocal runs
+        runs += 1
+        await release.wait()
+    first = jobs.submit("kind", "key", run)
+    second = jobs.submit("kind", "key", run)
+    other_key = jobs.submit("kind", "other", run)
+
+    assert second is first
+    assert other_key is not first
+    assert jobs.get_latest("kind", "key") is first
+
+    release.set()
+    await first.wait()
+    await other_key.wait()
+    assert runs == 2
+
+    # Once finished, submitting again starts a new job.
+    third = jobs.submit("kind", "key", run)
+    assert third is not first
+    await third.wait()
+
+
+@pytest.mark.asyncio
+async def test_wait_for_change():
+    jobs = JobRegistry()
+    release = asyncio.Event()
+
+    async def run(job):
+        await release.wait()
+    job = jobs.submit("kind", "key", run)
+    version = job.version
+
+    # Nothing changes, so the wait times out.
+    assert not await job.wait_for_change(version, timeout=0.01)
+
+    waiter = asyncio.ensure_future(job.wait_for_change(version, timeout=1))
+    await asyncio.sleep(0)
+    job.update(progress="Halfway there")
+    assert await waiter
+    assert job.version == version + 1
+
+    # A version that's already out of date returns immediately.
+    assert await job.wait_for_change(version, timeout=0)
+
+    release.set()
+    await job.wait()
+
+
+@pytest.mark.asyncio
+async def test_finished_jobs_are_pruned():
+    jobs = JobRegistry(max_finished_jobs=2)
+
+    async def run(job):
+        pass
+    finished = []
+    for i in range(4):
+        job = jobs.submit("kind", str(i), run)
+        await job.wait()
+        finished.append(job)
+
+    release = asyncio.Event()
+    async def run_until_released(job):
+        await release.wait()
+    in_flight = jobs.submit("kind", "in_flight", run_until_released)
+
+    # Only the two most recent finished jobs are kept, along with anything in flight.
+    assert [jobs.get(job.id) for job in finished] == [None, None, finished[2], finished[3]]
+    assert jobs.get_latest("kind", "0") is None
+    assert jobs.get(in_flight.id) is in_flight
+
+    release.set()
+    await in_flight.wait()
+
+
+@pytest.mark.asyncio
+async def test_rejected_in_flight_job_is_followed_by_a_fresh_one():
+    jobs = JobRegistry()
+    release = asyncio.Event()
+    events = []
+
+    async def run(job):
+        events.append(f"start { job.id }")
+        await release.wait()
+        events.append(f"end { job.id }")
+    first = jobs.submit("kind", "key", run)
+    await asyncio.sleep(0)
+
+    second = jobs.submit("kind", "key", run, reuse=lambda job: False)
+    assert second is not first
+    assert jobs.get_latest("kind", "key") is second
+    # Later submissions are deduplicated against the fresh job.
+    assert jobs.submit("kind", "key", run) is second
+    assert jobs.submit("kind", "key", run, reuse=lambda job: job is second) is second
+
+    await asyncio.sleep(0.01)
+    assert second.state == JobState.QUEUED
+    release.set()
+    await second.wait()
+
+    # The fresh job only started once the one it replaced had finished.
+    assert events == [f"start { first.id }", f"end { first.id }", f"start { second.id }", f"end { second.id }"]
+
+
+@pytest.mark.asyncio
+async def test_fresh_job_runs_after_a_failed_one():
+    jobs = JobRegistry()
+    release = asyncio.Event()
+
+    async def fail(job):
+        await release.wait()
+        raise ValueError("broken")
+    async def succeed(job):
+        return "result"
+    first = jobs.submit("kind", "key", fail)
+    second = jobs.submit("kind", "key", succeed, reuse=lambda job: False)
+
+    release.set()
+    assert await second.wait() == "result"
+    assert first.state == JobState.FAILED
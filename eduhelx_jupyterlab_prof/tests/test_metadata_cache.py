@@ -0,0 +1,146 @@
+import asyncio
+import pytest
+from eduhelx_jupyterlab_prof.metadata_cache import MetadataCache
+
+
+class Source:
+    """ A fetch whose calls are counted, and which can be held open (by clearing `release`) or made to fail. """
+    def __init__(self):
+        self.calls = 0
+        self.value = "first"
+        self.error: Exception | None = None
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def fetch(self):
+        self.calls += 1
+        value, error = self.value, self.error
+        await self.release.wait()
+        if error is not None: raise error
+        return { "value": value }
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_fetch():
+    source = Source()
+    cache = MetadataCache()
+    cache.register("course", source.fetch, ttl_seconds=60)
+    source.release.clear()
+
+    callers = [asyncio.ensure_future(cache.get("course")) for _ in range(5)]
+    await asyncio.sleep(0.01)
+    source.release.set()
+
+    assert await asyncio.gather(*callers) == [{ "value": "first" }] * 5
+    assert source.calls == 1
+    # Fresh, so not fetched again.
+    await cache.get("course")
+    assert source.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_doesnt_cancel_the_shared_fetch():
+    source = Source()
+    cache = MetadataCache()
+    cache.register("course", source.fetch, ttl_seconds=60)
+    source.release.clear()
+
+    cancelled = asyncio.ensure_future(cache.get("course"))
+    waiting = asyncio.ensure_future(cache.get("course"))
+    await asyncio.sleep(0.01)
+    cancelled.cancel()
+    source.release.set()
+
+    assert await waiting == { "value": "first" }
+    assert source.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_serves_the_stale_value():
+    source = Source()
+    cache = MetadataCache()
+    cache.register("course", source.fetch, ttl_seconds=0)
+    assert await cache.get("course") == { "value": "first" }
+
+    source.value, source.error = "second", ConnectionError("offline")
+
+    assert await cache.get("course") == { "value": "first" }
+    assert source.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_first_fetch_raises():
+    source = Source()
+    source.error = ConnectionError("offline")
+    cache = MetadataCache()
+    cache.register("course", source.fetch, ttl_seconds=60)
+
+    with pytest.raises(ConnectionError):
+        await cache.get("course")
+
+    # The failure isn't cached.
+    source.error = None
+    assert await cache.get("course") == { "value": "first" }
+
+
+@pytest.mark.asyncio
+async def test_invalidating_during_a_fetch_discards_its_result():
+    source = Source()
+    cache = MetadataCache()
+    cache.register("course", source.fetch, ttl_seconds=60)
+    assert await cache.get("course") == { "value": "first" }
+    cache.invalidate("course")
+
+    # A fetch starts, then the resource changes (and is invalidated again) before the fetch returns.
+    source.value = "outdated"
+    source.release.clear()
+    before = asyncio.ensure_future(cache.get("course"))
+    await asyncio.sleep(0.01)
+    source.value = "second"
+    cache.invalidate("course")
+    source.release.set()
+    await before
+
+    assert await cache.get("course") == { "value": "second" }
+    assert source.calls == 3
+    # The fetch that started after the invalidation is the one that was cached.
+    assert await cache.get("course") == { "value": "second" }
+    assert source.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_values_are_copied():
+    source = Source()
+    cache = MetadataCache()
+    cache.register("course", source.fetch, ttl_seconds=60)
+
+    (await cache.get("course"))["value"] = "annotated by a handler"
+
+    assert await cache.get("course") == { "value": "first" }
+
+
+@pytest.mark.asyncio
+async def test_get_if_changed_skips_values_already_seen():
+    source = Source()
+    cache = MetadataCache()
+    cache.register("course", source.fetch, ttl_seconds=60)
+
+    (version, value) = await cache.get_if_changed("course", None)
+    assert value == { "value": "first" }
+    assert await cache.get_if_changed("course", version) == (version, None)
+
+    source.value = "second"
+    cache.invalidate("course")
+    assert await cache.get_if_changed("course", version) == (version + 1, { "value": "second" })
+
+
+@pytest.mark.asyncio
+async def test_stale_value_keeps_its_version():
+    source = Source()
+    cache = MetadataCache()
+    cache.register("course", source.fetch, ttl_seconds=0)
+    (version, _) = await cache.get_if_changed("course", None)
+
+    source.error = ConnectionError("offline")
+
+    assert await cache.get_if_changed("course", version) == (version, None)
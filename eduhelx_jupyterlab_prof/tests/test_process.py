@@ -0,0 +1,81 @@
+import os
+import asyncio
+import pytest
+from eduhelx_jupyterlab_prof import process
+from eduhelx_jupyterlab_prof.process import execute_async, ProcessTimeoutException
+
+
+def sleeper(pid_file) -> list[str]:
+    """ A command that records its pid in `pid_file` and then sleeps well past any test's timeout. """
+    return ["sh", "-c", f'echo $$ > "{ pid_file }"; exec sleep 30']
+
+async def read_pid(pid_file) -> int:
+    while not os.path.exists(pid_file) or os.path.getsize(pid_file) == 0:
+        await asyncio.sleep(0.01)
+    with open(pid_file) as f: return int(f.read())
+
+def is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+@pytest.fixture
+def one_process_slot(monkeypatch):
+    monkeypatch.setattr(process, "MAX_CONCURRENT_PROCESSES", 1)
+
+
+@pytest.mark.asyncio
+async def test_execute():
+    assert await execute_async(["sh", "-c", "cat; echo err >&2; exit 3"], stdin_input="in\n") == ("in", "err", 3)
+
+
+@pytest.mark.asyncio
+async def test_timed_out_command_is_killed_and_frees_its_slot(tmp_path, one_process_slot):
+    pid_file = tmp_path / "pid"
+
+    with pytest.raises(ProcessTimeoutException):
+        await execute_async(sleeper(pid_file), timeout=0.5)
+
+    assert not is_running(await read_pid(pid_file))
+    assert await asyncio.wait_for(execute_async(["true"]), timeout=5) == ("", "", 0)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_command_is_killed_and_frees_its_slot(tmp_path, one_process_slot):
+    pid_file = tmp_path / "pid"
+    task = asyncio.ensure_future(execute_async(sleeper(pid_file)))
+    pid = await read_pid(pid_file)
+
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert not is_running(pid)
+    assert await asyncio.wait_for(execute_async(["true"]), timeout=5) == ("", "", 0)
+
+
+@pytest.mark.asyncio
+async def test_commands_beyond_the_limit_wait_for_a_slot(tmp_path, one_process_slot):
+    pid_file = tmp_path / "pid"
+    running = asyncio.ensure_future(execute_async(sleeper(pid_file)))
+    await read_pid(pid_file)
+
+    waiting = asyncio.ensure_future(execute_async(["true"]))
+    await asyncio.sleep(0.2)
+    assert not waiting.done()
+
+    running.cancel()
+    assert await asyncio.wait_for(waiting, timeout=5) == ("", "", 0)
+
+
+def test_each_event_loop_gets_its_own_semaphore():
+    async def saturate():
+        # More commands than there are slots, so that some of them wait on the semaphore.
+        await asyncio.gather(*(execute_async(["true"]) for _ in range(process.MAX_CONCURRENT_PROCESSES + 2)))
+
+    # A semaphore that was waited on from one loop can't be waited on from another.
+    for _ in range(2):
+        asyncio.run(saturate())
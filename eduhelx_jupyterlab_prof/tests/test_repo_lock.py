@@ -0,0 +1,171 @@
+import asyncio
+import pytest
+from eduhelx_jupyterlab_prof.repo_lock import RepoLock, RepoLockRegistry
+
+
+async def settle():
+    """ Let every task that can make progress do so. """
+    for _ in range(10): await asyncio.sleep(0)
+
+
+class Holder:
+    """ Holds the lock (for reading or writing) from a task until released, recording when it got it in `order`. """
+    def __init__(self, lock: RepoLock, write: bool, name: str, order: list[str]):
+        self.name = name
+        self.acquired = asyncio.Event()
+        self._release = asyncio.Event()
+        async def hold():
+            async with (lock.write(name) if write else lock.read(name)):
+                order.append(name)
+                self.acquired.set()
+                await self._release.wait()
+        self.task = asyncio.ensure_future(hold())
+
+    async def release(self):
+        self._release.set()
+        await self.task
+
+
+@pytest.mark.asyncio
+async def test_readers_hold_the_lock_together(tmp_path):
+    lock = RepoLock(tmp_path)
+    order = []
+
+    readers = [Holder(lock, False, f"read{ i }", order) for i in range(3)]
+    await settle()
+
+    assert all(reader.acquired.is_set() for reader in readers)
+    assert lock.to_dict()["readers"] == 3
+    for reader in readers: await reader.release()
+    assert lock.to_dict()["readers"] == 0
+
+
+@pytest.mark.asyncio
+async def test_writer_excludes_readers_and_writers(tmp_path):
+    lock = RepoLock(tmp_path)
+    order = []
+
+    writer = Holder(lock, True, "write", order)
+    await settle()
+    reader = Holder(lock, False, "read", order)
+    other_writer = Holder(lock, True, "other_write", order)
+    await settle()
+
+    assert lock.to_dict()["writer"] == "write"
+    assert not reader.acquired.is_set() and not other_writer.acquired.is_set()
+    assert lock.to_dict()["waiting"] == 2
+
+    await writer.release()
+    await settle()
+    assert reader.acquired.is_set() and not other_writer.acquired.is_set()
+    await reader.release()
+    await settle()
+    assert other_writer.acquired.is_set()
+    await other_writer.release()
+
+
+@pytest.mark.asyncio
+async def test_waiters_are_served_in_order(tmp_path):
+    lock = RepoLock(tmp_path)
+    order = []
+
+    reader = Holder(lock, False, "read", order)
+    await settle()
+    # Queued behind the reader: a writer, then readers that would otherwise be let in alongside the first one.
+    writer = Holder(lock, True, "write", order)
+    await settle()
+    late_readers = [Holder(lock, False, f"late_read{ i }", order) for i in range(2)]
+    last_writer = Holder(lock, True, "last_write", order)
+    await settle()
+    assert order == ["read"]
+
+    await reader.release()
+    await settle()
+    assert order == ["read", "write"]
+    await writer.release()
+    await settle()
+    # Consecutive readers are let in together.
+    assert order == ["read", "write", "late_read0", "late_read1"]
+    for late_reader in late_readers: await late_reader.release()
+    await settle()
+    assert order == ["read", "write", "late_read0", "late_read1", "last_write"]
+    await last_writer.release()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_doesnt_wedge_the_queue(tmp_path):
+    lock = RepoLock(tmp_path)
+    order = []
+
+    reader = Holder(lock, False, "read", order)
+    await settle()
+    writer = Holder(lock, True, "write", order)
+    await settle()
+    # Queued behind the writer, which excludes it.
+    late_reader = Holder(lock, False, "late_read", order)
+    await settle()
+
+    writer.task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await writer.task
+    await settle()
+
+    # With the writer gone, nothing excludes the reader behind it anymore.
+    assert late_reader.acquired.is_set()
+    assert lock.to_dict()["waiting"] == 0
+    await reader.release()
+    await late_reader.release()
+
+    # And the lock is free again.
+    last_writer = Holder(lock, True, "last_write", order)
+    await settle()
+    assert last_writer.acquired.is_set()
+    await last_writer.release()
+
+
+@pytest.mark.asyncio
+async def test_waiter_cancelled_as_it_acquires_hands_the_lock_back(tmp_path):
+    lock = RepoLock(tmp_path)
+    order = []
+
+    async with lock.write("write"):
+        waiter = Holder(lock, True, "cancelled_write", order)
+        await settle()
+    # The waiter was just handed the lock, but is cancelled before it gets to run.
+    waiter.task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter.task
+
+    assert order == []
+    assert lock.to_dict()["writer"] is None
+    last_writer = Holder(lock, True, "last_write", order)
+    await settle()
+    assert last_writer.acquired.is_set()
+    await last_writer.release()
+
+
+@pytest.mark.asyncio
+async def test_waits_are_measured_per_operation(tmp_path):
+    lock = RepoLock(tmp_path)
+    order = []
+
+    writer = Holder(lock, True, "write", order)
+    await settle()
+    reader = Holder(lock, False, "read", order)
+    await asyncio.sleep(0.1)
+    await writer.release()
+    await reader.release()
+
+    metrics = lock.to_dict()["wait_metrics"]
+    assert metrics["write"]["acquisitions"] == 1
+    assert metrics["write"]["max_wait_seconds"] < 0.1
+    assert metrics["read"]["acquisitions"] == 1
+    assert metrics["read"]["last_wait_seconds"] >= 0.1
+
+
+def test_registry_shares_a_lock_per_repository(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    locks = RepoLockRegistry()
+
+    assert locks.get("repo") is locks.get(tmp_path / "repo")
+    assert locks.get("repo") is not locks.get("other")
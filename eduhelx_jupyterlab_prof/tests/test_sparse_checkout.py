@@ -0,0 +1,45 @@
+import pytest
+from types import SimpleNamespace
+from eduhelx_jupyterlab_prof.git import get_sparse_checkout_async
+from eduhelx_jupyterlab_prof.handlers import update_sparse_checkout
+from .git_repos import commit_files
+
+
+def make_context(sparse_checkout: bool, assignment_directories: list[str]):
+    async def get_assignments():
+        return [{ "directory_path": directory } for directory in assignment_directories]
+    return SimpleNamespace(config=SimpleNamespace(SPARSE_CHECKOUT=sparse_checkout), get_assignments=get_assignments)
+
+
+@pytest.mark.asyncio
+async def test_sparse_checkout_follows_setting(git_repo):
+    commit_files(git_repo, "Assignments", {
+        "README.md": "course",
+        "hw1/notebook.ipynb": "{}",
+        "hw2/notebook.ipynb": "{}",
+        "solutions/hw1.ipynb": "{}"
+    })
+
+    await update_sparse_checkout(make_context(True, ["hw1"]), git_repo)
+    assert await get_sparse_checkout_async(path=git_repo) == ["hw1"]
+    assert (git_repo / "README.md").exists() and (git_repo / "hw1" / "notebook.ipynb").exists()
+    assert not (git_repo / "hw2").exists() and not (git_repo / "solutions").exists()
+
+    # Upstream added an assignment.
+    await update_sparse_checkout(make_context(True, ["hw2", "hw1"]), git_repo)
+    assert await get_sparse_checkout_async(path=git_repo) == ["hw1", "hw2"]
+    assert (git_repo / "hw2" / "notebook.ipynb").exists()
+
+    # Turned off after the repository was already checked out sparsely.
+    await update_sparse_checkout(make_context(False, ["hw1", "hw2"]), git_repo)
+    assert await get_sparse_checkout_async(path=git_repo) is None
+    assert (git_repo / "solutions" / "hw1.ipynb").exists()
+
+
+@pytest.mark.asyncio
+async def test_full_checkout_is_left_alone(git_repo):
+    commit_files(git_repo, "Assignments", { "hw1/notebook.ipynb": "{}" })
+
+    await update_sparse_checkout(make_context(False, ["hw1"]), git_repo)
+
+    assert await get_sparse_checkout_async(path=git_repo) is None
@@ -0,0 +1,75 @@
+import nbformat
+import pytest
+from pathlib import Path
+from eduhelx_jupyterlab_prof.instructor_repo import InstructorClassRepo, generate_student_notebook
+from .git_repos import git
+
+COURSE = { "name": "Course" }
+ASSIGNMENTS = [{
+    "id": 1,
+    "name": "hw1",
+    "directory_path": "hw1",
+    "master_notebook_path": "hw1-master.ipynb",
+    "student_notebook_path": "hw1.ipynb"
+}]
+
+
+def write_master_notebook(path: Path, source: str) -> None:
+    notebook = nbformat.v4.new_notebook()
+    notebook.cells = [
+        nbformat.v4.new_raw_cell("# ASSIGNMENT CONFIG\nname: hw1\nrun_tests: false\n"),
+        nbformat.v4.new_code_cell(source)
+    ]
+    notebook.metadata["kernelspec"] = { "name": "python3", "display_name": "Python 3", "language": "python" }
+    nbformat.write(notebook, path)
+
+def list_working_tree(repo_root: Path) -> dict[str, bytes]:
+    return {
+        str(path.relative_to(repo_root)): path.read_bytes()
+        for path in repo_root.rglob("*")
+        if path.is_file() and ".git" not in path.relative_to(repo_root).parts
+    }
+
+
+@pytest.fixture
+def repo_root(tmp_path, monkeypatch):
+    # The repository lives at a fixed path relative to the server's working directory.
+    monkeypatch.chdir(tmp_path)
+    repo_root = InstructorClassRepo._compute_repo_root(COURSE["name"])
+    (repo_root / "hw1").mkdir(parents=True)
+    git(repo_root, "init", "-q")
+    write_master_notebook(repo_root / "hw1" / "hw1-master.ipynb", "x = 1")
+    return repo_root
+
+def generate(repo_root: Path) -> dict | None:
+    return generate_student_notebook(COURSE, ASSIGNMENTS, 1, InstructorClassRepo.make_staging_directory(repo_root))
+
+def install(generated: dict) -> None:
+    InstructorClassRepo.from_assignment_no_path(COURSE, ASSIGNMENTS, 1).install_student_notebook(generated)
+
+
+def test_generation_only_writes_to_the_staging_directory(repo_root):
+    before = list_working_tree(repo_root)
+
+    generated = generate(repo_root)
+
+    assert list_working_tree(repo_root) == before
+    install(generated)
+    assert sorted(list_working_tree(repo_root)) == ["hw1/hw1-master.ipynb", "hw1/hw1.ipynb", "hw1/otter_grading_config.json"]
+    # Nothing changed since, so there's nothing to generate.
+    assert generate(repo_root) is None
+
+
+def test_inputs_changed_during_generation_are_generated_again(repo_root):
+    generated = generate(repo_root)
+    # e.g. the instructor saved while otter was running.
+    write_master_notebook(repo_root / "hw1" / "hw1-master.ipynb", "x = 2")
+    install(generated)
+
+    generated = generate(repo_root)
+
+    assert generated is not None
+    # The assignment has an otter config by now, so it's left alone.
+    assert generated["otter_config_path"] is None
+    install(generated)
+    assert "x = 2" in (repo_root / "hw1" / "hw1.ipynb").read_text()
@@ -0,0 +1,110 @@
+from eduhelx_jupyterlab_prof.submissions import SubmissionsIndex
+
+
+def submission(commit_id):
+    return { "commit_id": commit_id }
+
+def make_submissions(**students):
+    return { onyen: [submission(commit_id) for commit_id in commit_ids] for onyen, commit_ids in students.items() }
+
+
+def test_full_listing_is_paginated_by_onyen():
+    index = SubmissionsIndex()
+    index.update(1, make_submissions(carol=["c1"], alice=["a1"], bob=["b1"]))
+
+    first = index.get_page(1, limit=2)
+    assert first["full"]
+    assert list(first["submissions"]) == ["alice", "bob"]
+    assert first["next_cursor"] == "bob"
+
+    second = index.get_page(1, cursor=first["next_cursor"], limit=2)
+    assert list(second["submissions"]) == ["carol"]
+    assert second["next_cursor"] is None
+    assert second["version"] == first["version"]
+
+
+def test_submissions_are_decorated():
+    index = SubmissionsIndex()
+    commit_info = { "id": "a2", "message": "Resubmit" }
+    index.update(1, make_submissions(alice=["a2", "a1"]), { "a2": commit_info })
+
+    [latest, previous] = index.get_page(1)["submissions"]["alice"]
+    assert latest["active"] and latest["commit"] == commit_info
+    assert "active" not in previous
+    # Unresolved commits get a placeholder.
+    assert previous["commit"]["id"] == "a1" and previous["commit"]["message"] == ""
+
+
+def test_delta_only_includes_changes_since_version():
+    index = SubmissionsIndex()
+    index.update(1, make_submissions(alice=["a1"], bob=["b1"], carol=["c1"]))
+    version = index.get_page(1)["version"]
+
+    index.update(1, make_submissions(alice=["a2", "a1"], bob=["b1"]))
+    delta = index.get_page(1, since_version=version)
+    assert not delta["full"]
+    assert list(delta["submissions"]) == ["alice"]
+    assert delta["removed_students"] == ["carol"]
+    assert delta["version"] != version
+
+    # Nothing changed since the latest version.
+    empty = index.get_page(1, since_version=delta["version"])
+    assert empty["submissions"] == {} and empty["removed_students"] == []
+
+
+def test_unchanged_update_keeps_version():
+    index = SubmissionsIndex()
+    index.update(1, make_submissions(alice=["a1"]))
+    version = index.get_version(1)
+    index.update(1, make_submissions(alice=["a1"]))
+    assert index.get_version(1) == version
+
+    # A commit being resolved later counts as a change.
+    index.update(1, make_submissions(alice=["a1"]), { "a1": { "id": "a1", "message": "Submit" } })
+    assert index.get_version(1) != version
+
+
+def test_student_reappearing_after_removal():
+    index = SubmissionsIndex()
+    index.update(1, make_submissions(alice=["a1"], bob=["b1"]))
+    version = index.get_version(1)
+    index.update(1, make_submissions(alice=["a1"]))
+    index.update(1, make_submissions(alice=["a1"], bob=["b2", "b1"]))
+
+    delta = index.get_page(1, since_version=version)
+    assert list(delta["submissions"]) == ["bob"]
+    assert delta["removed_students"] == []
+
+
+def test_unknown_version_gets_full_listing():
+    index = SubmissionsIndex()
+    index.update(1, make_submissions(alice=["a1"], bob=["b1"]))
+    # e.g. a version issued before the server restarted.
+    stale_version = SubmissionsIndex().get_version(1)
+
+    for since_version in [stale_version, "garbage", None]:
+        page = index.get_page(1, since_version=since_version)
+        assert page["full"]
+        assert list(page["submissions"]) == ["alice", "bob"]
+
+
+def test_student_filter():
+    index = SubmissionsIndex()
+    index.update(1, make_submissions(alice=["a1"], bob=["b1"]))
+    page = index.get_page(1, student="bob")
+    assert list(page["submissions"]) == ["bob"]
+    assert index.get_page(2)["submissions"] == {}
+
+
+def test_removed_assignment_forgets_its_versions():
+    index = SubmissionsIndex()
+    index.update(1, make_submissions(alice=["a1"], bob=["b1"]))
+    version = index.get_version(1)
+
+    index.remove(1)
+    index.update(1, make_submissions(alice=["a1"]))
+
+    # Bob's removal wasn't tracked across the removal, so a client with an older version gets a full listing.
+    page = index.get_page(1, since_version=version)
+    assert page["full"]
+    assert list(page["submissions"]) == ["alice"]
@@ -0,0 +1,68 @@
+from eduhelx_jupyterlab_prof.sync_history import SyncHistory, SyncRun, SyncOutcome
+
+
+def finished_run(outcome: SyncOutcome, error: str | None = None) -> SyncRun:
+    run = SyncRun()
+    run.finish(outcome, error)
+    return run
+
+
+def test_up_to_date_runs_arent_kept(tmp_path):
+    history = SyncHistory(tmp_path / "sync_history.json")
+
+    assert not history.record(finished_run(SyncOutcome.UP_TO_DATE))
+    assert history.to_list() == []
+
+
+def test_unreachable_runs_are_collapsed(tmp_path):
+    history = SyncHistory(tmp_path / "sync_history.json", max_runs=3)
+    merged = finished_run(SyncOutcome.MERGED)
+    history.record(merged)
+
+    first = finished_run(SyncOutcome.UNREACHABLE, "Couldn't reach remote: timed out")
+    assert history.record(first)
+    for _ in range(10):
+        last = finished_run(SyncOutcome.UNREACHABLE, "Couldn't reach remote: connection refused")
+        assert history.record(last)
+
+    [unreachable, kept] = history.to_list()
+    # The run before the outage isn't flushed out.
+    assert kept["id"] == merged.id
+    assert unreachable["id"] == first.id
+    assert unreachable["occurrences"] == 11
+    assert unreachable["last_occurred_at"] == last.finished_at
+    assert unreachable["error"] == "Couldn't reach remote: connection refused"
+
+
+def test_unreachable_runs_apart_arent_collapsed(tmp_path):
+    history = SyncHistory(tmp_path / "sync_history.json")
+    history.record(finished_run(SyncOutcome.UNREACHABLE, "Couldn't reach remote"))
+    history.record(finished_run(SyncOutcome.FAILED, "Can't merge remote changes"))
+    history.record(finished_run(SyncOutcome.UNREACHABLE, "Couldn't reach remote"))
+
+    assert [run["outcome"] for run in history.to_list()] == ["unreachable", "failed", "unreachable"]
+    assert all(run["occurrences"] == 1 for run in history.to_list())
+
+
+def test_history_survives_restarts(tmp_path):
+    path = tmp_path / "sync_history.json"
+    history = SyncHistory(path)
+    history.record(finished_run(SyncOutcome.FAST_FORWARDED))
+    history.record(finished_run(SyncOutcome.UNREACHABLE, "Couldn't reach remote"))
+
+    restarted = SyncHistory(path)
+    assert restarted.to_list() == history.to_list()
+    # Still collapsed into the entry from before the restart.
+    restarted.record(finished_run(SyncOutcome.UNREACHABLE, "Couldn't reach remote"))
+    assert [run["occurrences"] for run in SyncHistory(path).to_list()] == [2, 1]
+
+
+def test_corrupt_history_starts_over(tmp_path):
+    path = tmp_path / "sync_history.json"
+    path.write_text("{ not json")
+
+    history = SyncHistory(path)
+
+    assert history.to_list() == []
+    history.record(finished_run(SyncOutcome.MERGED))
+    assert len(SyncHistory(path).to_list()) == 1
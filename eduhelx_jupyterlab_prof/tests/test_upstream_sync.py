@@ -0,0 +1,233 @@
+import pytest
+from types import SimpleNamespace
+from eduhelx_jupyterlab_prof.git import hash_files_async
+from eduhelx_jupyterlab_prof.upstream_sync import IncomingPaths, UpstreamSyncKind, classify_upstream_sync
+from eduhelx_jupyterlab_prof.repo_lock import RepoLockRegistry
+from eduhelx_jupyterlab_prof.sync_history import SyncRun, SyncOutcome, ConflictResolution
+from eduhelx_jupyterlab_prof.handlers import run_upstream_sync
+from .git_repos import git, commit_files
+
+
+@pytest.mark.parametrize("incoming_paths,file,in_the_way", [
+    # Upstream changed the same path.
+    (["hw1/notebook.ipynb"], "hw1/notebook.ipynb", True),
+    # Unrelated paths, including ones that merely share a prefix.
+    (["hw1/notebook.ipynb"], "hw1/data.csv", False),
+    (["hw1/notebook.ipynb"], "hw10/notebook.ipynb", False),
+    (["hw1/data"], "hw1/data.csv", False),
+    # A local file where upstream adds a directory.
+    (["hw1/data/train.csv"], "hw1/data", True),
+    (["hw1/data/train.csv"], "hw1", True),
+    # A local file inside of what upstream adds as a file.
+    (["hw1/data"], "hw1/data/train.csv", True),
+    (["hw1"], "hw1/data/train.csv", True),
+    (["README.md"], "hw1/README.md", False),
+    ([], "hw1/notebook.ipynb", False),
+    # Without knowing what upstream changed, everything is in the way.
+    (None, "hw1/notebook.ipynb", True),
+])
+def test_in_the_way(incoming_paths, file, in_the_way):
+    assert IncomingPaths(incoming_paths).in_the_way(file) == in_the_way
+
+
+@pytest.mark.asyncio
+async def test_file_digests_compare_content(git_repo):
+    (git_repo / "a.txt").write_text("same")
+    (git_repo / "b.txt").write_text("same")
+    (git_repo / "c.txt").write_text("different")
+    (git_repo / "dir with spaces").mkdir()
+    (git_repo / "dir with spaces" / "d.txt").write_text("same")
+
+    digests = await hash_files_async(["a.txt", "c.txt", "b.txt", "dir with spaces/d.txt"], path=git_repo)
+
+    # In the order requested.
+    [a, c, b, d] = digests
+    assert a == b == d
+    assert a != c
+    assert await hash_files_async([], path=git_repo) == []
+
+
+def modified(*paths):
+    return [{ "path": path, "modification_type": " M" } for path in paths]
+
+@pytest.mark.parametrize("is_fast_forward,local_changes,incoming_paths,kind", [
+    (True, [], ["hw1/notebook.ipynb"], UpstreamSyncKind.CLEAN_FAST_FORWARD),
+    (True, modified("hw2/notebook.ipynb"), ["hw1/notebook.ipynb"], UpstreamSyncKind.DISJOINT_FAST_FORWARD),
+    (True, modified("hw2/notebook.ipynb", "hw1/notebook.ipynb"), ["hw1/notebook.ipynb"], UpstreamSyncKind.DIVERGED),
+    (True, modified("hw2/notebook.ipynb"), None, UpstreamSyncKind.DIVERGED),
+    (False, [], ["hw1/notebook.ipynb"], UpstreamSyncKind.DIVERGED),
+    (False, modified("hw2/notebook.ipynb"), ["hw1/notebook.ipynb"], UpstreamSyncKind.DIVERGED),
+])
+def test_classify_upstream_sync(is_fast_forward, local_changes, incoming_paths, kind):
+    assert classify_upstream_sync(is_fast_forward, local_changes, IncomingPaths(incoming_paths)) == kind
+
+
+@pytest.fixture
+def repos(git_repo, tmp_path):
+    """ An upstream repository, and the instructor's clone of it. """
+    upstream = git_repo
+    commit_files(upstream, "Initial commit", {
+        "README.md": "Course\n",
+        "hw1/notebook.ipynb": "hw1 v1\n",
+        "hw2/notebook.ipynb": "hw2 v1\n"
+    })
+    instructor = tmp_path / "instructor"
+    git(tmp_path, "clone", "-q", str(upstream), str(instructor))
+    git(instructor, "config", "user.name", "Instructor")
+    git(instructor, "config", "user.email", "instructor@example.com")
+    return upstream, instructor
+
+def make_context(overwritable_files=[]):
+    async def get_assignments():
+        return [
+            { "directory_path": directory, "overwritable_files": overwritable_files, "protected_files": [] }
+            for directory in ("hw1", "hw2")
+        ]
+    locks = RepoLockRegistry()
+    return SimpleNamespace(
+        config=SimpleNamespace(GIT_NETWORK_TIMEOUT_SECONDS=30, SPARSE_CHECKOUT=False),
+        get_assignments=get_assignments,
+        repo_lock=locks.get
+    )
+
+async def sync(repo) -> SyncRun:
+    run = SyncRun()
+    await run_upstream_sync(make_context(), repo, run)
+    return run
+
+def read(repo, path):
+    return (repo / path).read_text()
+
+def backups(repo):
+    return sorted(str(path.relative_to(repo)) for path in repo.rglob("*~backup"))
+
+
+@pytest.mark.asyncio
+async def test_up_to_date(repos):
+    upstream, instructor = repos
+    head = git(instructor, "rev-parse", "HEAD")
+    (instructor / "hw1" / "notebook.ipynb").write_text("local edit\n")
+
+    run = await sync(instructor)
+
+    assert run.outcome == SyncOutcome.UP_TO_DATE
+    assert git(instructor, "rev-parse", "HEAD") == head
+    assert read(instructor, "hw1/notebook.ipynb") == "local edit\n"
+
+
+@pytest.mark.asyncio
+async def test_clean_fast_forward(repos):
+    upstream, instructor = repos
+    upstream_head = commit_files(upstream, "Update hw1", { "hw1/notebook.ipynb": "hw1 v2\n" })
+
+    run = await sync(instructor)
+
+    assert run.outcome == SyncOutcome.FAST_FORWARDED
+    assert run.kind == UpstreamSyncKind.CLEAN_FAST_FORWARD
+    assert git(instructor, "rev-parse", "HEAD") == upstream_head
+    assert read(instructor, "hw1/notebook.ipynb") == "hw1 v2\n"
+    assert git(instructor, "status", "--porcelain") == ""
+
+    # Syncing again has nothing to do.
+    assert (await sync(instructor)).outcome == SyncOutcome.UP_TO_DATE
+
+
+@pytest.mark.asyncio
+async def test_disjoint_fast_forward_keeps_local_changes(repos):
+    upstream, instructor = repos
+    upstream_head = commit_files(upstream, "Update hw1", { "hw1/notebook.ipynb": "hw1 v2\n" })
+    (instructor / "hw2" / "notebook.ipynb").write_text("hw2 local edit\n")
+    (instructor / "hw2" / "scratch.py").write_text("untracked\n")
+
+    run = await sync(instructor)
+
+    assert run.outcome == SyncOutcome.FAST_FORWARDED
+    assert run.kind == UpstreamSyncKind.DISJOINT_FAST_FORWARD
+    assert git(instructor, "rev-parse", "HEAD") == upstream_head
+    assert read(instructor, "hw1/notebook.ipynb") == "hw1 v2\n"
+    assert read(instructor, "hw2/notebook.ipynb") == "hw2 local edit\n"
+    assert read(instructor, "hw2/scratch.py") == "untracked\n"
+    # Nothing needed to be stashed.
+    assert git(instructor, "stash", "list") == ""
+
+
+@pytest.mark.asyncio
+async def test_diverged_with_local_changes(repos):
+    upstream, instructor = repos
+    local_commit = commit_files(instructor, "Local work", { "hw2/extra.py": "local commit\n" })
+    # An older stash of the instructor's own, which the sync mustn't touch.
+    (instructor / "hw2" / "notebook.ipynb").write_text("stashed by the instructor\n")
+    git(instructor, "stash", "push", "-q", "-m", "instructor stash")
+    upstream_head = commit_files(upstream, "Update notebooks", {
+        "hw1/notebook.ipynb": "hw1 v2\n",
+        "hw2/notebook.ipynb": "hw2 v2\n"
+    })
+    # Overlaps upstream's change.
+    (instructor / "hw1" / "notebook.ipynb").write_text("hw1 local edit\n")
+    # Doesn't.
+    (instructor / "README.md").write_text("Local readme\n")
+
+    run = await sync(instructor)
+
+    assert run.outcome == SyncOutcome.MERGED, run.error
+    assert run.kind == UpstreamSyncKind.DIVERGED
+    parents = git(instructor, "rev-list", "--parents", "-n", "1", "HEAD").split()[1:]
+    assert sorted(parents) == sorted([local_commit, upstream_head])
+    assert git(instructor, "rev-parse", "--abbrev-ref", "HEAD") == "main"
+
+    # Upstream's version wins, and the instructor's is backed up next to it.
+    assert read(instructor, "hw1/notebook.ipynb") == "hw1 v2\n"
+    [backup] = backups(instructor)
+    assert backup.startswith("hw1/notebook.ipynb~")
+    assert read(instructor, backup) == "hw1 local edit\n"
+    assert [(c["path"], c["resolution"]) for c in run.conflicts] == [("hw1/notebook.ipynb", ConflictResolution.BACKED_UP.value)]
+
+    # Everything else is kept as it was.
+    assert read(instructor, "hw2/notebook.ipynb") == "hw2 v2\n"
+    assert read(instructor, "hw2/extra.py") == "local commit\n"
+    assert read(instructor, "README.md") == "Local readme\n"
+    [stash] = git(instructor, "stash", "list").split("\n")
+    assert stash.endswith("instructor stash")
+    assert "__temp__" not in git(instructor, "branch", "--list")
+
+
+@pytest.mark.asyncio
+async def test_untracked_files_in_the_way(repos):
+    upstream, instructor = repos
+    commit_files(upstream, "Add data", {
+        "hw1/data.csv": "upstream data\n",
+        "hw1/same.csv": "same\n"
+    })
+    # Collides with what upstream adds, with different content.
+    (instructor / "hw1" / "data.csv").write_text("local data\n")
+    # Collides with what upstream adds, with the same content.
+    (instructor / "hw1" / "same.csv").write_text("same\n")
+    # Not in the way.
+    (instructor / "hw1" / "scratch.py").write_text("untracked\n")
+
+    run = await sync(instructor)
+
+    assert run.outcome == SyncOutcome.MERGED, run.error
+    assert run.kind == UpstreamSyncKind.DIVERGED
+    assert read(instructor, "hw1/data.csv") == "upstream data\n"
+    [backup] = backups(instructor)
+    assert backup.startswith("hw1/data.csv~")
+    assert read(instructor, backup) == "local data\n"
+    # Identical content doesn't need a backup.
+    assert read(instructor, "hw1/same.csv") == "same\n"
+    assert read(instructor, "hw1/scratch.py") == "untracked\n"
+    # The directory untracked files were preserved in is cleaned up.
+    assert not any(path.name.startswith(".untracked-") for path in instructor.iterdir())
+
+
+@pytest.mark.asyncio
+async def test_unreachable_remote(repos, tmp_path):
+    upstream, instructor = repos
+    head = git(instructor, "rev-parse", "HEAD")
+    git(instructor, "remote", "set-url", "origin", str(tmp_path / "missing"))
+
+    run = await sync(instructor)
+
+    assert run.outcome == SyncOutcome.UNREACHABLE
+    assert run.error.startswith("Couldn't reach remote")
+    assert git(instructor, "rev-parse", "HEAD") == head
@@ -0,0 +1,100 @@
+import asyncio
+import traceback
+from enum import Enum
+from pathlib import PurePosixPath
+from typing import Awaitable, Callable, Iterable
+
+""" Runs the upstream sync in the background, and on demand.
+- The sync callable returns whether upstream had actually moved.
+- While upstream is idle, the interval between syncs doubles, up to `max_interval` seconds.
+  As soon as upstream moves (or a sync is requested), it resets to `min_interval`.
+- `sync_now` wakes the loop immediately. Requests made while a sync is pending share that sync.
+"""
+class UpstreamSyncScheduler:
+    def __init__(self, sync: Callable[[], Awaitable[bool]], min_interval: float, max_interval: float):
+        self.sync = sync
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self._wakeup = asyncio.Event()
+        # Resolved once the next sync to start has completed.
+        self._next_sync: asyncio.Future | None = None
+
+    def set_intervals(self, min_interval: float, max_interval: float) -> None:
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min(max(self.interval, min_interval), max_interval)
+
+    async def _run_sync(self) -> bool:
+        waiters, self._next_sync = self._next_sync, None
+        try:
+            changed = await self.sync()
+        except Exception as e:
+            print(traceback.format_exc())
+            if waiters is not None and not waiters.done(): waiters.set_exception(e)
+            return False
+        if waiters is not None and not waiters.done(): waiters.set_result(changed)
+        return changed
+
+    async def run(self) -> None:
+        while True:
+            print("Pulling in upstream changes...")
+            changed = await self._run_sync()
+            if changed or self._wakeup.is_set():
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.interval * 2, self.max_interval)
+
+            # A sync may have been requested while this one was running, in which case don't sleep at all.
+            if self._next_sync is not None: continue
+
+            self._wakeup.clear()
+            print(f"Sleeping for { self.interval }...")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def sync_now(self) -> bool:
+        """ Wake the sync loop and wait for the resulting sync. Returns whether upstream had moved. """
+        if self._next_sync is None:
+            self._next_sync = asyncio.get_event_loop().create_future()
+        next_sync = self._next_sync
+        self._wakeup.set()
+        return await asyncio.shield(next_sync)
+
+
+""" The paths that upstream changed (relative to the repo root), for finding the local changes
+that are in the way of merging them. Unknown paths (None) mean that upstream may have changed anything. """
+class IncomingPaths:
+    def __init__(self, paths: Iterable[str] | None):
+        self.paths = set(paths) if paths is not None else None
+        self._dirs = set()
+        for path in self.paths or []:
+            self._dirs.update(str(parent) for parent in PurePosixPath(path).parents)
+
+    def in_the_way(self, file: str) -> bool:
+        """ Whether upstream changed the path, or a path that collides with it as a directory
+        (a file `a` vs. an incoming `a/b`, or a file `a/b` vs. an incoming `a`). """
+        if self.paths is None: return True
+        return (
+            file in self.paths
+            or file in self._dirs
+            or any(str(parent) in self.paths for parent in PurePosixPath(file).parents)
+        )
+
+
+class UpstreamSyncKind(str, Enum):
+    # The instructor's branch is behind upstream, and has no local changes.
+    CLEAN_FAST_FORWARD = "clean_fast_forward"
+    # The instructor's branch is behind upstream, and its local changes don't touch anything upstream changed.
+    DISJOINT_FAST_FORWARD = "disjoint_fast_forward"
+    # The instructor's branch has commits that upstream doesn't, or local changes that overlap upstream's.
+    DIVERGED = "diverged"
+
+def classify_upstream_sync(is_fast_forward: bool, local_changes: list[dict], incoming: IncomingPaths) -> UpstreamSyncKind:
+    """ `local_changes` are the instructor's uncommitted changes (see `get_modified_paths_async`), including untracked files. """
+    if not is_fast_forward: return UpstreamSyncKind.DIVERGED
+    if len(local_changes) == 0: return UpstreamSyncKind.CLEAN_FAST_FORWARD
+    if not any(incoming.in_the_way(change["path"]) for change in local_changes): return UpstreamSyncKind.DISJOINT_FAST_FORWARD
+    return UpstreamSyncKind.DIVERGED
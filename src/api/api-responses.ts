@@ -54,6 +54,14 @@ export interface SubmissionResponse {
     graded: boolean
 }
 
+export interface StudentSubmissionsResponse {
+    version: string
+    full: boolean
+    submissions: { [onyen: string]: SubmissionResponse[] }
+    removed_students: string[]
+    next_cursor: string | null
+}
+
 export interface AssignmentResponse {
     id: number
     name: string
@@ -77,7 +85,6 @@ export interface AssignmentResponse {
     is_available: boolean
     is_closed: boolean
 
-    student_submissions?: { [onyen: string]: SubmissionResponse[] }
     ignored_files?: string[]
 }
 
@@ -93,4 +100,66 @@ export interface ServerSettingsResponse {
     serverVersion: string
     repoRoot: string
     documentationUrl: string | null
-}
\ No newline at end of file
+}
+export enum JobState {
+    QUEUED  = 'queued',
+    RUNNING = 'running',
+    DONE    = 'done',
+    FAILED  = 'failed'
+}
+
+export enum SyncOutcome {
+    FAST_FORWARDED = 'fast_forwarded',
+    MERGED = 'merged',
+    FAILED = 'failed',
+    UNREACHABLE = 'unreachable'
+}
+
+export enum ConflictResolution {
+    OVERWRITTEN = 'overwritten',
+    BACKED_UP = 'backed_up',
+    DELETED_LOCALLY = 'deleted_locally',
+    UNRESTORED = 'unrestored'
+}
+
+export interface SyncPhaseResponse {
+    name: string
+    duration_seconds: number
+}
+
+export interface SyncConflictResponse {
+    path: string
+    cause: 'merge' | 'stash' | 'untracked'
+    resolution: ConflictResolution
+    backup_path: string | null
+}
+
+export interface SyncRunResponse {
+    id: string
+    started_at: number
+    finished_at: number
+    duration_seconds: number
+    outcome: SyncOutcome
+    kind: 'clean_fast_forward' | 'disjoint_fast_forward' | 'diverged' | null
+    error: string | null
+    local_head: string | null
+    tracking_head: string | null
+    phases: SyncPhaseResponse[]
+    conflicts: SyncConflictResponse[]
+    occurrences: number
+    last_occurred_at: number
+}
+
+export interface JobResponse {
+    id: string
+    kind: string
+    key: string
+    version: number
+    state: JobState
+    progress: string | null
+    result: any
+    error: string | null
+    created_at: number
+    started_at: number | null
+    finished_at: number | null
+}
@@ -1,10 +1,11 @@
 import qs from 'qs'
 import p from 'path'
+import { URLExt } from '@jupyterlab/coreutils'
 import { ServerConnection } from '@jupyterlab/services'
 import { requestAPI } from '../handler'
 import { IAssignment, Assignment, ICurrentAssignment } from './assignment'
 import { IStudent, Student } from './student'
-import { ISubmission, Submission } from './submission'
+import { ISubmission, Submission, StudentSubmissions } from './submission'
 import { ICourse, Course } from './course'
 import { IServerSettings, ServerSettings } from './server-settings'
 import {
@@ -14,8 +15,14 @@ import {
     SubmissionResponse,
     ServerSettingsResponse,
     InstructorResponse,
+    JobResponse,
+    JobState,
+    StudentSubmissionsResponse,
+    SyncRunResponse,
 } from './api-responses'
 import { IInstructor, Instructor } from './instructor'
+import { IJob, Job, JobFailedError } from './job'
+import { ISyncRun, SyncRun } from './sync-run'
 import { IStagedChange } from './staged-change'
 
 export interface UpdateAssignmentData {
@@ -38,6 +45,35 @@ export interface GetInstructorAndStudentsAndCourseResponse {
     course: ICourse
 }
 
+export interface SyncUpstreamResponse {
+    upstreamMoved: boolean
+}
+
+export interface GetStudentSubmissionsResponse {
+    // Pass back to `getStudentSubmissions` to only fetch what changed.
+    version: string
+    submissions: StudentSubmissions
+}
+
+export enum BootstrapStage {
+    STARTING = 'starting',
+    CONFIGURING = 'configuring',
+    CLONING = 'cloning',
+    READY = 'ready',
+    // Setup failed, and the server is going to try again.
+    RETRYING = 'retrying',
+    // Setup failed, and trying again won't help.
+    FAILED = 'failed'
+}
+
+export interface ReadinessResponse {
+    stage: BootstrapStage
+    ready: boolean
+    // Whether the repository is usable, even if the rest of setup isn't done.
+    cloned: boolean
+    error: string | null
+}
+
 export interface NotebookFilesResponse {
     notebooks: { [assignmentId: string]: string[] }
 }
@@ -88,6 +124,44 @@ export async function getAssignments(path: string): Promise<GetAssignmentsRespon
     }
 }
 
+/**
+ * Get the submissions of every student for an assignment, paging through the listing.
+ * If `previous` is given, only the students whose submissions changed since it are fetched and merged into a copy of it.
+ */
+export async function getStudentSubmissions(
+    assignmentId: number,
+    previous?: GetStudentSubmissionsResponse,
+    student?: string
+): Promise<GetStudentSubmissionsResponse> {
+    let submissions: StudentSubmissions = previous ? { ...previous.submissions } : {}
+    let version: string | undefined = undefined
+    let cursor: string | null = null
+    do {
+        const queryString = qs.stringify({
+            assignment_id: assignmentId,
+            since_version: previous?.version,
+            student,
+            cursor: cursor ?? undefined
+        })
+        const data: StudentSubmissionsResponse = await requestAPI<StudentSubmissionsResponse>(`/student_submissions?${ queryString }`, {
+            method: 'GET'
+        })
+        // Changes made while paging will show up in the next delta, as long as we use the version of the first page.
+        if (version === undefined) {
+            version = data.version
+            if (data.full) submissions = {}
+        }
+        data.removed_students.forEach((onyen) => delete submissions[onyen])
+        Object.keys(data.submissions).forEach((onyen) => {
+            submissions[onyen] = data.submissions[onyen].map((res) => Submission.fromResponse(res))
+        })
+        cursor = data.next_cursor
+    } while (cursor !== null)
+    // Nothing changed, so keep the same object (and avoid rerendering anything derived from it).
+    if (previous && version === previous.version) return previous
+    return { version: version!, submissions }
+}
+
 export async function updateAssignment(assignmentName: string, data: UpdateAssignmentData): Promise<void> {
     const queryString = qs.stringify({ name: assignmentName })
     await requestAPI<void>(`/assignments?${ queryString }`, {
@@ -96,13 +170,31 @@ export async function updateAssignment(assignmentName: string, data: UpdateAssig
     })
 }
 
-export async function gradeAssignment(currentPath: string): Promise<void> {
-    await requestAPI<void>(`/grade_assignment`, {
+/** Dispatch grading for the assignment at `currentPath`, and wait for the grading job to finish. */
+export async function gradeAssignment(currentPath: string, onProgress?: (job: IJob) => void): Promise<IJob> {
+    const data = await requestAPI<JobResponse>(`/grade_assignment`, {
         method: 'POST',
         body: JSON.stringify({
             current_path: currentPath
         })
     })
+    return await waitForJob(Job.fromResponse(data), onProgress)
+}
+
+/** Get the most recent grading job of an assignment, if there is one. */
+export async function getGradingJob(assignmentId: number): Promise<IJob | null> {
+    const queryString = qs.stringify({ assignment_id: assignmentId })
+    const data = await requestAPI<JobResponse | null>(`/grade_assignment?${ queryString }`, {
+        method: 'GET'
+    })
+    return data ? Job.fromResponse(data) : null
+}
+
+/** Get how far along the server is in setting up the instructor's repository. */
+export async function getReadiness(): Promise<ReadinessResponse> {
+    return await requestAPI<ReadinessResponse>(`/readiness`, {
+        method: 'GET'
+    })
 }
 
 export async function getServerSettings(): Promise<IServerSettings> {
@@ -150,6 +242,67 @@ export async function syncToLMS(): Promise<void> {
     })
 }
 
+export async function syncUpstream(): Promise<SyncUpstreamResponse> {
+    const { upstream_moved } = await requestAPI<{ upstream_moved: boolean }>(`/sync_upstream`, {
+        method: 'POST'
+    })
+    return {
+        upstreamMoved: upstream_moved
+    }
+}
+
+/** Get the most recent upstream syncs (most recent first), with their timings and how conflicts were resolved. */
+export async function getSyncHistory(): Promise<ISyncRun[]> {
+    const data = await requestAPI<SyncRunResponse[]>(`/sync_history`, {
+        method: 'GET'
+    })
+    return data.map((run) => SyncRun.fromResponse(run))
+}
+
+export type ChangeEventTopic = 'connected' | 'assignments' | 'course' | 'notebook_files' | 'upstream_sync' | 'readiness' | 'sync_history'
+
+/**
+ * Subscribe to the server's change events until `signal` is aborted or the connection drops.
+ * Resolves when the stream ends, and rejects if the connection fails.
+ */
+export async function subscribeToEvents(
+    onEvent: (topic: ChangeEventTopic, data: any) => void,
+    signal: AbortSignal
+): Promise<void> {
+    const settings = ServerConnection.makeSettings()
+    const requestUrl = URLExt.join(settings.baseUrl, 'eduhelx-jupyterlab-prof', 'events')
+    const response = await ServerConnection.makeRequest(requestUrl, { method: 'GET', signal }, settings)
+    if (!response.ok || !response.body) throw new ServerConnection.ResponseError(response)
+
+    const reader = response.body.getReader()
+    const decoder = new TextDecoder()
+    let buffer = ''
+    try {
+        while (true) {
+            const { done, value } = await reader.read()
+            if (done) return
+            buffer += decoder.decode(value, { stream: true })
+            // Events are separated by a blank line.
+            let boundary
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const block = buffer.slice(0, boundary)
+                buffer = buffer.slice(boundary + 2)
+                let topic: string | undefined = undefined
+                let data = ''
+                for (const line of block.split('\n')) {
+                    if (line.startsWith('event:')) topic = line.slice('event:'.length).trim()
+                    else if (line.startsWith('data:')) data += line.slice('data:'.length).trim()
+                }
+                // Comment-only blocks are keepalives.
+                if (topic === undefined) continue
+                onEvent(topic as ChangeEventTopic, data ? JSON.parse(data) : null)
+            }
+        }
+    } finally {
+        reader.releaseLock()
+    }
+}
+
 export async function createFile(path: string, content: string): Promise<void> {
     const directoryPath = p.dirname(path)
     const ext = p.extname(path)
@@ -181,11 +334,35 @@ export async function createFile(path: string, content: string): Promise<void> {
 
 }
 
-export async function createStudentNotebook(assignmentId: number): Promise<void> {
-    await requestAPI<void>(`/create_student_notebook`, {
+/**
+ * Get the status of a background job. If `sinceVersion` is given, the server long-polls
+ * until the job has changed from that version (or the long-polling timeout elapses).
+ */
+export async function getJob(jobId: string, sinceVersion?: number): Promise<IJob> {
+    const queryString = qs.stringify({ job_id: jobId, since_version: sinceVersion })
+    const data = await requestAPI<JobResponse>(`/jobs?${ queryString }`, {
+        method: 'GET'
+    })
+    return Job.fromResponse(data)
+}
+
+/** Wait for a background job to finish. Throws a JobFailedError if the job fails. */
+export async function waitForJob(job: IJob, onProgress?: (job: IJob) => void): Promise<IJob> {
+    while (!job.finished) {
+        const updatedJob = await getJob(job.id, job.version)
+        if (updatedJob.version !== job.version) onProgress?.(updatedJob)
+        job = updatedJob
+    }
+    if (job.state === JobState.FAILED) throw new JobFailedError(job)
+    return job
+}
+
+export async function createStudentNotebook(assignmentId: number, onProgress?: (job: IJob) => void): Promise<IJob> {
+    const data = await requestAPI<JobResponse>(`/create_student_notebook`, {
         method: 'POST',
         body: JSON.stringify({
             assignment_id: assignmentId
         })
     })
+    return await waitForJob(Job.fromResponse(data), onProgress)
 }
\ No newline at end of file
@@ -1,12 +1,7 @@
 import { IStudent, Student } from './student'
-import { ISubmission, Submission } from './submission'
 import { AssignmentResponse, AssignmentStatus } from './api-responses'
 import { IStagedChange, StagedChange } from './staged-change'
 
-interface StudentSubmissions {
-    [onyen: string]: ISubmission[]
-}
-
 export interface IAssignment {
     readonly id: number
     readonly name: string
@@ -38,9 +33,8 @@ export interface IAssignment {
     readonly isClosed: boolean
 }
 
-// Submissions and staged changes are definitely defined in an ICurrentAssignment
+// Ignored files are definitely defined in an ICurrentAssignment
 export interface ICurrentAssignment extends IAssignment {
-    readonly studentSubmissions: StudentSubmissions
     readonly ignoredFiles: string[]
 }
 
@@ -70,10 +64,8 @@ export class Assignment implements IAssignment {
         private _isClosed: boolean,
 
         /** Current assignment */
-        private _studentSubmissions: StudentSubmissions | undefined,
         private _ignoredFiles: string[] | undefined
     ) {}
-    get studentSubmissions() { return this._studentSubmissions }
     get ignoredFiles() { return this._ignoredFiles }
     
     get id() { return this._id }
@@ -101,10 +93,6 @@ export class Assignment implements IAssignment {
     
 
     static fromResponse(data: AssignmentResponse): IAssignment {
-        let studentSubmissions: any = data.student_submissions ? {} : undefined
-        if (data.student_submissions) Object.keys(data.student_submissions).forEach((onyen) => {
-            studentSubmissions[onyen] = data.student_submissions![onyen].map((res) => Submission.fromResponse(res))
-        })
         return new Assignment(
             data.id,
             data.name,
@@ -129,7 +117,6 @@ export class Assignment implements IAssignment {
             data.is_available,
             data.is_closed,
 
-            studentSubmissions,
             data.ignored_files
         )
     }
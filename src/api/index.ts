@@ -4,4 +4,6 @@ export * from './student'
 export * from './instructor'
 export * from './submission'
 export * from './assignment'
-export * from './course'
\ No newline at end of file
+export * from './course'
+export * from './job'
+export * from './sync-run'
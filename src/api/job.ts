@@ -0,0 +1,73 @@
+import { JobResponse, JobState } from './api-responses'
+
+export interface IJob {
+    readonly id: string
+    readonly kind: string
+    readonly key: string
+    // Incremented whenever the job changes.
+    readonly version: number
+    readonly state: JobState
+    // Describes what the job is currently doing, if running.
+    readonly progress: string | null
+    readonly result: any
+    readonly error: string | null
+    readonly createdDate: Date
+    readonly startedDate: Date | null
+    readonly finishedDate: Date | null
+
+    readonly finished: boolean
+}
+
+export class Job implements IJob {
+    constructor(
+        private _id: string,
+        private _kind: string,
+        private _key: string,
+        private _version: number,
+        private _state: JobState,
+        private _progress: string | null,
+        private _result: any,
+        private _error: string | null,
+        private _createdDate: Date,
+        private _startedDate: Date | null,
+        private _finishedDate: Date | null
+    ) {}
+
+    get id() { return this._id }
+    get kind() { return this._kind }
+    get key() { return this._key }
+    get version() { return this._version }
+    get state() { return this._state }
+    get progress() { return this._progress }
+    get result() { return this._result }
+    get error() { return this._error }
+    get createdDate() { return this._createdDate }
+    get startedDate() { return this._startedDate }
+    get finishedDate() { return this._finishedDate }
+
+    get finished() { return this._state === JobState.DONE || this._state === JobState.FAILED }
+
+    static fromResponse(data: JobResponse): IJob {
+        return new Job(
+            data.id,
+            data.kind,
+            data.key,
+            data.version,
+            data.state,
+            data.progress,
+            data.result,
+            data.error,
+            new Date(data.created_at * 1000),
+            data.started_at !== null ? new Date(data.started_at * 1000) : null,
+            data.finished_at !== null ? new Date(data.finished_at * 1000) : null
+        )
+    }
+}
+
+/** Thrown when awaiting a background job that failed. */
+export class JobFailedError extends Error {
+    constructor(public readonly job: IJob) {
+        super(job.error ?? 'Job failed')
+    }
+    get error() { return this.job.error }
+}
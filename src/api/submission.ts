@@ -3,6 +3,10 @@ import { IStudent, Student } from './student'
 import { ICommit, Commit } from './commit'
 import { SubmissionResponse } from './api-responses'
 
+export interface StudentSubmissions {
+    [onyen: string]: ISubmission[]
+}
+
 export interface ISubmission {
     readonly id: number
     readonly active: boolean
@@ -0,0 +1,90 @@
+import { SyncRunResponse, SyncOutcome, ConflictResolution } from './api-responses'
+
+export interface ISyncPhase {
+    readonly name: string
+    readonly durationSeconds: number
+}
+
+export interface ISyncConflict {
+    readonly path: string
+    // What the conflict arose from: upstream's changes, reapplying local changes, or an untracked file in the way.
+    readonly cause: 'merge' | 'stash' | 'untracked'
+    readonly resolution: ConflictResolution
+    // Relative to the repository root, if the instructor's version was kept somewhere.
+    readonly backupPath: string | null
+}
+
+export interface ISyncRun {
+    readonly id: string
+    readonly startedDate: Date
+    readonly finishedDate: Date
+    readonly durationSeconds: number
+    readonly outcome: SyncOutcome
+    readonly kind: string | null
+    readonly error: string | null
+    readonly localHead: string | null
+    readonly trackingHead: string | null
+    readonly phases: ISyncPhase[]
+    readonly conflicts: ISyncConflict[]
+    // Consecutive unreachable runs are collapsed into one entry.
+    readonly occurrences: number
+    readonly lastOccurredDate: Date
+}
+
+export class SyncRun implements ISyncRun {
+    constructor(
+        private _id: string,
+        private _startedDate: Date,
+        private _finishedDate: Date,
+        private _durationSeconds: number,
+        private _outcome: SyncOutcome,
+        private _kind: string | null,
+        private _error: string | null,
+        private _localHead: string | null,
+        private _trackingHead: string | null,
+        private _phases: ISyncPhase[],
+        private _conflicts: ISyncConflict[],
+        private _occurrences: number,
+        private _lastOccurredDate: Date
+    ) {}
+
+    get id() { return this._id }
+    get startedDate() { return this._startedDate }
+    get finishedDate() { return this._finishedDate }
+    get durationSeconds() { return this._durationSeconds }
+    get outcome() { return this._outcome }
+    get kind() { return this._kind }
+    get error() { return this._error }
+    get localHead() { return this._localHead }
+    get trackingHead() { return this._trackingHead }
+    get phases() { return this._phases }
+    get conflicts() { return this._conflicts }
+    get occurrences() { return this._occurrences }
+    get lastOccurredDate() { return this._lastOccurredDate }
+
+    static fromResponse(data: SyncRunResponse): ISyncRun {
+        return new SyncRun(
+            data.id,
+            new Date(data.started_at * 1000),
+            new Date(data.finished_at * 1000),
+            data.duration_seconds,
+            data.outcome,
+            data.kind,
+            data.error,
+            data.local_head,
+            data.tracking_head,
+            data.phases.map((phase) => ({
+                name: phase.name,
+                durationSeconds: phase.duration_seconds
+            })),
+            data.conflicts.map((conflict) => ({
+                path: conflict.path,
+                cause: conflict.cause,
+                resolution: conflict.resolution,
+                backupPath: conflict.backup_path
+            })),
+            data.occurrences ?? 1,
+            new Date((data.last_occurred_at ?? data.finished_at) * 1000)
+        )
+    }
+}
@@ -7,17 +7,37 @@ import { AssignmentSubmitForm } from '../assignment-submit-form'
 import { AssignmentStagedChanges } from '../assignment-staged-changes'
 import { AssignmentSubmissionInfo } from '../assignment-submission-info'
 import { useAssignment } from '../../../contexts'
+import { BootstrapStage } from '../../../api'
 import { Tabs } from '../../tabs'
 
+const BOOTSTRAP_STAGE_MESSAGES: { [stage in BootstrapStage]?: string } = {
+    [BootstrapStage.STARTING]: 'Starting up...',
+    [BootstrapStage.CONFIGURING]: 'Setting up credentials...',
+    [BootstrapStage.CLONING]: 'Downloading the class repository...',
+    [BootstrapStage.RETRYING]: 'Setting up the class repository failed, trying again...'
+}
+
 export const AssignmentContent = () => {
-    const { loading, path, assignment, instructor, assignments } = useAssignment()!
+    const { loading, readiness, path, assignment, instructor, assignments } = useAssignment()!
     
     return (
         <div className={ containerClass }>
             {
-                loading ? (
-                    <div className={ loadingContainerClass }>
+                // Past setup, whatever went wrong doesn't stop the repository from being used.
+                readiness?.stage === BootstrapStage.FAILED && !readiness.cloned ? (
+                    <div className={ loadingContainerClass } style={{ flexDirection: 'column', color: 'var(--jp-error-color1)' }}>
+                        Failed to set up the class repository.
+                        { readiness.error && <span style={{ fontSize: 12, marginTop: 4 }}>{ readiness.error }</span> }
+                    </div>
+                ) : loading ? (
+                    <div className={ loadingContainerClass } style={{ flexDirection: 'column' }}>
                         <CircularProgress color="inherit" />
+                        { readiness && !readiness.ready && (
+                            <span style={{ fontSize: 13, marginTop: 12 }}>{ BOOTSTRAP_STAGE_MESSAGES[readiness.stage] }</span>
+                        ) }
+                        { readiness?.stage === BootstrapStage.RETRYING && readiness.error && (
+                            <span style={{ fontSize: 12, marginTop: 4 }}>{ readiness.error }</span>
+                        ) }
                     </div>
                 ) : assignments === null || assignment === null ? (
                     <NoAssignmentWarning noRepository={ assignments === null } />
@@ -11,7 +11,7 @@ import { InfoTooltip } from '../../info-tooltip'
 import { disabledButtonClass } from '../../style'
 import { useAssignment, useCommands, useSnackbar } from '../../../contexts'
 import { addLocalTimezone, getLocalTimezoneAbbr } from '../../../utils'
-import { createFile, updateAssignment, createStudentNotebook as apiCreateStudentNotebook } from '../../../api'
+import { createFile, updateAssignment, createStudentNotebook as apiCreateStudentNotebook, JobFailedError } from '../../../api'
 import { openFileBrowserButtonClass } from '../no-assignment-warning/style'
 import { AssignmentStatus } from '../../../api/api-responses'
 
@@ -229,11 +229,11 @@ export const AssignmentInfo = ({  }: AssignmentInfoProps) => {
             await apiCreateStudentNotebook(assignment.id)
             await commands.execute('docmanager:open', { path: assignment.absoluteDirectoryPath + "/" + assignment.studentNotebookPath })
         } catch (e: any) {
-            const data = await e.response?.json()
+            const error = e instanceof JobFailedError ? e.error : (await e.response?.json())?.error
             showErrorMessage(
                 'Failed to generate student notebook',
                 {
-                    message: <pre>{ data.error }</pre>
+                    message: <pre>{ error }</pre>
                 },
                 [Dialog.warnButton({ label: 'Dismiss' })]
             )
@@ -9,7 +9,7 @@ import {
 } from './style'
 import { AssignmentContent } from './assignment-content'
 import { useAssignment, useCommands, useSettings, useSnackbar } from '../../contexts'
-import { syncToLMS } from '../../api'
+import { syncToLMS, syncUpstream } from '../../api'
 
 interface IAssignmentPanelProps {
 }
@@ -36,20 +36,33 @@ export const AssignmentPanel = ({}: IAssignmentPanelProps) => {
 
     const doSync = useCallback(async () => {
         setSyncLoading(true)
+        // Pull in upstream changes to the repository immediately, rather than waiting on the next background sync.
+        // The two are independent, so one failing (e.g. upstream while the repository is still being set up)
+        // shouldn't fail the other. Each resolves to its error, if any (equivalent to Promise.allSettled).
+        const settle = (promise: Promise<any>) => promise.then(() => null, (e: any) => e)
+        const [lmsError, upstreamError] = await Promise.all([settle(syncToLMS()), settle(syncUpstream())])
+        if (lmsError) snackbar.open({
+            type: 'error',
+            message: 'Failed to sync with LMS!'
+        })
+        if (upstreamError) snackbar.open({
+            type: 'error',
+            message: `Failed to sync with upstream repository${ upstreamError.message ? `: ${ upstreamError.message }` : '' }`
+        })
         try {
-            await syncToLMS()
-            await triggerImmediateUpdate()
-            snackbar.open({
+            if (!lmsError || !upstreamError) await triggerImmediateUpdate()
+            if (!lmsError && !upstreamError) snackbar.open({
                 type: 'success',
                 message: 'Successfully synced with LMS'
             })
         } catch (e: any) {
             snackbar.open({
                 type: 'error',
-                message: 'Failed to sync with LMS!'
+                message: 'Failed to refresh after syncing!'
             })
+        } finally {
+            setSyncLoading(false)
         }
-        setSyncLoading(false)
     }, [triggerImmediateUpdate, snackbar])
 
     const openDocumentation = useCallback(() => {
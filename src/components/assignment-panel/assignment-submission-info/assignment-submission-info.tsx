@@ -9,7 +9,7 @@ import { assignmentSubmitButton } from '../assignment-submit-form/assignment-sub
 import { TextDivider } from '../../text-divider'
 import { disabledButtonClass } from '../../style'
 import { useAssignment, useSnackbar } from '../../../contexts'
-import { gradeAssignment, IStudent, ISubmission } from '../../../api'
+import { gradeAssignment, getGradingJob, waitForJob, IStudent, ISubmission } from '../../../api'
 import { AssignmentStatus } from '../../../api/api-responses'
 
 interface SubmissionLegendProps {
@@ -78,20 +78,38 @@ const SubmissionLegend = ({ graded, submitted, unsubmitted, resubmitted }: Submi
 }
 
 export const AssignmentSubmissionInfo = ({ }: AssignmentSubmissionInfoProps) => {
-    const { assignment, students, path, gradedNotebookExists } = useAssignment()!
+    const { assignment, students, studentSubmissions, path, gradedNotebookExists } = useAssignment()!
     const snackbar = useSnackbar()!
 
     const [gradingActive, setGradingActive] = useState<boolean>(false)
 
+    /** If grading is already in flight for the assignment (e.g. started from another tab), follow it. */
+    useEffect(() => {
+        if (!assignment) return
+        let cancelled = false
+        void async function() {
+            try {
+                const job = await getGradingJob(assignment.id)
+                if (cancelled || !job || job.finished) return
+                setGradingActive(true)
+                await waitForJob(job)
+            } catch {}
+            if (!cancelled) setGradingActive(false)
+        }()
+        return () => {
+            cancelled = true
+        }
+    }, [assignment?.id])
+
     const [graded, submitted, unsubmitted, resubmitted, total] = useMemo(() => {
-        if (!assignment || !students) return [[], [], [], [], 0]
+        if (!assignment || !students || !studentSubmissions) return [[], [], [], [], 0]
         let graded: IStudent[] = []
         let submitted: IStudent[] = []
         let unsubmitted: IStudent[] = []
         let resubmitted: IStudent[] = []
 
-        Object.keys(assignment.studentSubmissions).forEach((onyen) => {
-            const submissions = assignment.studentSubmissions[onyen]
+        Object.keys(studentSubmissions).forEach((onyen) => {
+            const submissions = studentSubmissions[onyen]
 
             const student = students.find((s) => s.onyen === onyen)!
             // If they student has no submissions, they are unsubmitted.
@@ -115,7 +133,7 @@ export const AssignmentSubmissionInfo = ({ }: AssignmentSubmissionInfoProps) =>
             }
         })
         return [graded, submitted, unsubmitted, resubmitted, graded.length + submitted.length + unsubmitted.length]
-    }, [assignment?.studentSubmissions, students])
+    }, [assignment?.id, studentSubmissions, students])
 
     const gradingDisabledReason = useMemo<string|undefined>(() => (
         gradingActive ? undefined :
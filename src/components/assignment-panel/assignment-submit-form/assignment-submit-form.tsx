@@ -26,7 +26,11 @@ export const AssignmentSubmitForm = ({ }: AssignmentSubmitFormProps) => {
     const [submitting, setSubmitting] = useState<boolean>(false)
 
     const masterNotebookIgnoredForManualAssignment = useMemo<boolean>(() => (
-        !!assignment && assignment.manualGrading && assignment.ignoredFiles.includes(assignment.masterNotebookPath)
+        !!assignment && assignment.manualGrading && assignment.ignoredFiles.some((ignoredPath) => (
+            // Ignored directories are listed once, with a trailing slash, rather than file-by-file.
+            ignoredPath === assignment.masterNotebookPath ||
+            (ignoredPath.endsWith('/') && assignment.masterNotebookPath.startsWith(ignoredPath))
+        ))
     ), [assignment])
 
     const disabled = (
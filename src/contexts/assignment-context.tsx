@@ -1,9 +1,9 @@
-import React, { createContext, useContext, ReactNode, useState, useMemo, useEffect, useCallback } from 'react'
+import React, { createContext, useContext, ReactNode, useState, useMemo, useEffect, useCallback, useRef } from 'react'
 import { IChangedArgs } from '@jupyterlab/coreutils'
 import { FileBrowserModel, IDefaultFileBrowser } from '@jupyterlab/filebrowser'
 import { useSnackbar } from './snackbar-context'
 import { IEduhelxSubmissionModel } from '../tokens'
-import { IAssignment, IInstructor, ICurrentAssignment, ICourse, getAssignments, GetAssignmentsResponse, GetInstructorAndStudentsAndCourseResponse, IStudent, getInstructorAndStudentsAndCourse, listNotebookFiles } from '../api'
+import { IAssignment, IInstructor, ICurrentAssignment, ICourse, getAssignments, GetAssignmentsResponse, GetInstructorAndStudentsAndCourseResponse, IStudent, getInstructorAndStudentsAndCourse, listNotebookFiles, subscribeToEvents, StudentSubmissions, getStudentSubmissions, GetStudentSubmissionsResponse, getReadiness, ReadinessResponse, BootstrapStage } from '../api'
 
 interface GradedNotebookExists {
     (assignment: IAssignment, directoryPath?: string | undefined): boolean
@@ -16,7 +16,11 @@ interface IAssignmentContext {
     students: IStudent[] | undefined
     course: ICourse | undefined
     notebookFiles: { [assignmentId: string]: string[] } | undefined
+    // Submissions of the current assignment
+    studentSubmissions: StudentSubmissions | undefined
     path: string | null
+    // Whether the server has finished setting up the repository (and how far along it is if not)
+    readiness: ReadinessResponse | undefined
     loading: boolean
     gradedNotebookExists: GradedNotebookExists
     triggerImmediateUpdate: () => Promise<void>
@@ -29,6 +33,13 @@ interface IAssignmentProviderProps {
 
 const POLL_DELAY = 15000
 const POLL_RETRY_DELAY = 1000
+// While subscribed to server events, polling is only a fallback in case an event is missed.
+const EVENTS_FALLBACK_POLL_DELAY = 60000
+const EVENTS_RECONNECT_DELAY = 1000
+const EVENTS_MAX_RECONNECT_DELAY = 30000
+const READINESS_FAILED_MAX_POLL_DELAY = 60000
+
+type PollNow = () => void
 
 export const AssignmentContext = createContext<IAssignmentContext|undefined>(undefined)
 
@@ -41,15 +52,27 @@ export const AssignmentProvider = ({ fileBrowser, children }: IAssignmentProvide
     const [students, setStudents] = useState<IStudent[]|undefined>(undefined)
     const [course, setCourse] = useState<ICourse|undefined>(undefined)
     const [notebookFiles, setNotebookFiles] = useState<{ [key: string]: string[] }|undefined>(undefined)
+    const [studentSubmissions, setStudentSubmissions] = useState<StudentSubmissions|undefined>(undefined)
+    const [readiness, setReadiness] = useState<ReadinessResponse|undefined>(undefined)
+    const currentAssignmentId = currentAssignment?.id
+
+    const eventsConnected = useRef<boolean>(false)
+    const pollAssignmentsNow = useRef<PollNow|undefined>(undefined)
+    const pollCourseNow = useRef<PollNow|undefined>(undefined)
+    const pollNotebookFilesNow = useRef<PollNow|undefined>(undefined)
+    const pollDelay = (delay: number) => eventsConnected.current ? EVENTS_FALLBACK_POLL_DELAY : delay
 
+    // Once the repository is cloned, it's usable even while the server is still retrying the rest of setup.
+    const repositoryUsable = readiness?.ready || readiness?.cloned
     const loading = useMemo(() => (
+        !repositoryUsable ||
         currentAssignment === undefined ||
         assignments === undefined ||
         instructor === undefined ||
         students === undefined ||
         course === undefined ||
         notebookFiles === undefined
-    ), [currentAssignment, assignments, instructor, students, course, notebookFiles])
+    ), [repositoryUsable, currentAssignment, assignments, instructor, students, course, notebookFiles])
 
     const gradedNotebookExists = useCallback((assignment: IAssignment, gradedNotebookPath?: string | undefined) => {
         if (!notebookFiles) return false
@@ -96,14 +119,18 @@ export const AssignmentProvider = ({ fileBrowser, children }: IAssignmentProvide
         
         let cancelled = false
         let timeoutId: number | undefined = undefined
+        let polling = false
+        // Set when asked to poll while a poll is in flight, whose response may predate whatever changed.
+        let pollPending = false
         async function timeout() {
             if (currentPath !== null) {
+                polling = true
                 try {
                     const data = await getAssignments(currentPath)
                     if (!cancelled) {
                         setAssignments(data.assignments)
                         setCurrentAssignment(data.currentAssignment)
-                        timeoutId = window.setTimeout(timeout, POLL_DELAY)
+                        timeoutId = window.setTimeout(timeout, pollDelay(POLL_DELAY))
                     }
                 } catch (e: any) {
                     // If the request fails, just maintain whatever state we already have
@@ -113,13 +140,30 @@ export const AssignmentProvider = ({ fileBrowser, children }: IAssignmentProvide
                         message: 'Failed to pull assignments...'
                     })
                     if (!cancelled) timeoutId = window.setTimeout(timeout, POLL_RETRY_DELAY)
+                } finally {
+                    polling = false
+                    if (pollPending && !cancelled) {
+                        pollPending = false
+                        window.clearTimeout(timeoutId)
+                        timeout()
+                    }
                 }
             }
         }
+        pollAssignmentsNow.current = () => {
+            // Poll again as soon as the in-flight poll finishes.
+            if (polling) {
+                pollPending = true
+                return
+            }
+            window.clearTimeout(timeoutId)
+            timeout()
+        }
         timeout()
         return () => {
             cancelled = true
             window.clearTimeout(timeoutId)
+            pollAssignmentsNow.current = undefined
         }
 
     }, [currentPath])
@@ -131,14 +175,17 @@ export const AssignmentProvider = ({ fileBrowser, children }: IAssignmentProvide
 
         let cancelled = false
         let timeoutId: number | undefined = undefined
+        let polling = false
+        let pollPending = false
         async function timeout() {
+            polling = true
             try {
                 const data = await getInstructorAndStudentsAndCourse()
                 if (!cancelled) {
                     setCourse(data.course)
                     setInstructor(data.instructor)
                     setStudents(data.students)
-                    timeoutId = window.setTimeout(timeout, POLL_DELAY)
+                    timeoutId = window.setTimeout(timeout, pollDelay(POLL_DELAY))
                 }
             } catch (e: any) {
                 // If the request fails, just maintain whatever state we already have
@@ -148,12 +195,28 @@ export const AssignmentProvider = ({ fileBrowser, children }: IAssignmentProvide
                     message: 'Failed to pull course data...'
                 })
                 if (!cancelled) timeoutId = window.setTimeout(timeout, POLL_RETRY_DELAY)
+            } finally {
+                polling = false
+                if (pollPending && !cancelled) {
+                    pollPending = false
+                    window.clearTimeout(timeoutId)
+                    timeout()
+                }
+            }
+        }
+        pollCourseNow.current = () => {
+            if (polling) {
+                pollPending = true
+                return
             }
+            window.clearTimeout(timeoutId)
+            timeout()
         }
         timeout()
         return () => {
             cancelled = true
             window.clearTimeout(timeoutId)
+            pollCourseNow.current = undefined
         }
     }, [])
 
@@ -162,14 +225,17 @@ export const AssignmentProvider = ({ fileBrowser, children }: IAssignmentProvide
 
         let cancelled = false
         let timeoutId: number | undefined = undefined
+        let polling = false
+        let pollPending = false
         async function timeout() {
+            polling = true
             try {
                 const { notebooks } = await listNotebookFiles()
                 if (!cancelled) {
                     setNotebookFiles(notebooks)
                     // We don't use POLL_DELAY for fetching notebook files, since this needs to be reflected more rapidly
                     // to the user and also doesn't involve any API calls, only scanning the directory for ipynb files.
-                    timeoutId = window.setTimeout(timeout, 2500)
+                    timeoutId = window.setTimeout(timeout, pollDelay(2500))
                 }
             } catch (e: any) {
                 // If the request fails, just maintain whatever state we already have
@@ -179,12 +245,160 @@ export const AssignmentProvider = ({ fileBrowser, children }: IAssignmentProvide
                     message: 'Failed to pull notebook files for assignments...'
                 })
                 if (!cancelled) timeoutId = window.setTimeout(timeout, POLL_RETRY_DELAY)
+            } finally {
+                polling = false
+                if (pollPending && !cancelled) {
+                    pollPending = false
+                    window.clearTimeout(timeoutId)
+                    timeout()
+                }
             }
         }
+        pollNotebookFilesNow.current = () => {
+            if (polling) {
+                pollPending = true
+                return
+            }
+            window.clearTimeout(timeoutId)
+            timeout()
+        }
         timeout()
         return () => {
             cancelled = true
             window.clearTimeout(timeoutId)
+            pollNotebookFilesNow.current = undefined
+        }
+    }, [])
+
+    useEffect(() => {
+        setStudentSubmissions(undefined)
+        if (currentAssignmentId === undefined) return
+
+        let cancelled = false
+        let timeoutId: number | undefined = undefined
+        // After the first listing, we only fetch the students whose submissions changed.
+        let previous: GetStudentSubmissionsResponse | undefined = undefined
+        async function timeout() {
+            try {
+                const data = await getStudentSubmissions(currentAssignmentId!, previous)
+                if (!cancelled) {
+                    previous = data
+                    setStudentSubmissions(data.submissions)
+                    timeoutId = window.setTimeout(timeout, POLL_DELAY)
+                }
+            } catch (e: any) {
+                // If the request fails, just maintain whatever state we already have
+                console.error(e)
+                snackbar.open({
+                    type: 'warning',
+                    message: 'Failed to pull student submissions...'
+                })
+                if (!cancelled) timeoutId = window.setTimeout(timeout, POLL_RETRY_DELAY)
+            }
+        }
+        timeout()
+        return () => {
+            cancelled = true
+            window.clearTimeout(timeoutId)
+        }
+    }, [currentAssignmentId])
+
+    useEffect(() => {
+        // Once the server is ready, readiness can't change, so this only polls during setup.
+        // When events are connected, we'll also hear about each stage as it happens.
+        // While setup is failing, the server backs off retrying it (or gives up, if it can't recover), so we back off too.
+        let cancelled = false
+        let timeoutId: number | undefined = undefined
+        let retryDelay = POLL_RETRY_DELAY
+        async function timeout() {
+            try {
+                const data = await getReadiness()
+                if (cancelled) return
+                setReadiness(data)
+                if (data.ready) return
+                retryDelay = data.stage === BootstrapStage.FAILED || data.stage === BootstrapStage.RETRYING
+                    ? Math.min(retryDelay * 2, READINESS_FAILED_MAX_POLL_DELAY)
+                    : POLL_RETRY_DELAY
+            } catch (e: any) {
+                console.error(e)
+            }
+            if (!cancelled) timeoutId = window.setTimeout(timeout, retryDelay)
+        }
+        timeout()
+        return () => {
+            cancelled = true
+            window.clearTimeout(timeoutId)
+        }
+    }, [])
+
+    useEffect(() => {
+        // Anything fetched before the repository was set up is out of date.
+        if (!repositoryUsable) return
+        pollAssignmentsNow.current?.()
+        pollNotebookFilesNow.current?.()
+    }, [repositoryUsable])
+
+    useEffect(() => {
+        // The server pushes the name of whatever changed, and we refetch just that.
+        const controller = new AbortController()
+        let reconnectDelay = EVENTS_RECONNECT_DELAY
+        let timeoutId: number | undefined = undefined
+        async function connect() {
+            try {
+                await subscribeToEvents((topic, data) => {
+                    switch (topic) {
+                        case 'readiness': {
+                            setReadiness(data as ReadinessResponse)
+                            break
+                        }
+                        case 'connected': {
+                            eventsConnected.current = true
+                            reconnectDelay = EVENTS_RECONNECT_DELAY
+                            // Catch up on anything that changed while we weren't connected.
+                            pollAssignmentsNow.current?.()
+                            pollCourseNow.current?.()
+                            pollNotebookFilesNow.current?.()
+                            break
+                        }
+                        case 'assignments': {
+                            pollAssignmentsNow.current?.()
+                            break
+                        }
+                        case 'course': {
+                            pollCourseNow.current?.()
+                            break
+                        }
+                        case 'notebook_files': {
+                            pollNotebookFilesNow.current?.()
+                            break
+                        }
+                        case 'upstream_sync': {
+                            pollAssignmentsNow.current?.()
+                            pollNotebookFilesNow.current?.()
+                            break
+                        }
+                    }
+                }, controller.signal)
+            } catch (e: any) {
+                if (controller.signal.aborted) return
+                console.error(e)
+            }
+            if (controller.signal.aborted) return
+            // Fall back to regular polling until we manage to reconnect.
+            if (eventsConnected.current) {
+                eventsConnected.current = false
+                pollAssignmentsNow.current?.()
+                pollCourseNow.current?.()
+                pollNotebookFilesNow.current?.()
+            }
+            timeoutId = window.setTimeout(connect, reconnectDelay)
+            reconnectDelay = Math.min(reconnectDelay * 2, EVENTS_MAX_RECONNECT_DELAY)
+        }
+        connect()
+        return () => {
+            controller.abort()
+            window.clearTimeout(timeoutId)
+            eventsConnected.current = false
         }
     }, [])
 
@@ -196,6 +410,8 @@ export const AssignmentProvider = ({ fileBrowser, children }: IAssignmentProvide
             students,
             course,
             notebookFiles,
+            studentSubmissions,
+            readiness,
             path: currentPath,
             loading,
             gradedNotebookExists,
@@ -1,6 +1,30 @@
 import { URLExt } from '@jupyterlab/coreutils'
 import { ServerConnection } from '@jupyterlab/services'
 
+// Validators and bodies of GET responses, used to revalidate polls with the server (If-None-Match).
+// Least recently used first (Map iteration follows insertion order), capped at ETAG_CACHE_MAX_ENTRIES.
+const ETAG_CACHE_MAX_ENTRIES = 64
+const etagCache = new Map<string, { etag: string, data: any }>()
+
+function getCachedResponse(url: string) {
+  const cached = etagCache.get(url)
+  if (cached) {
+    // Mark as most recently used.
+    etagCache.delete(url)
+    etagCache.set(url, cached)
+  }
+  return cached
+}
+
+function setCachedResponse(url: string, etag: string, data: any) {
+  etagCache.delete(url)
+  // Keep our own copy, so that callers mutating the data they're given can't corrupt it.
+  etagCache.set(url, { etag, data: structuredClone(data) })
+  while (etagCache.size > ETAG_CACHE_MAX_ENTRIES) {
+    etagCache.delete(etagCache.keys().next().value)
+  }
+}
+
 /**
  * Call the API extension
  *
@@ -21,6 +45,14 @@ export async function requestAPI<T>(
     endPoint
   )
 
+  const method = (init.method ?? 'GET').toUpperCase()
+  const cached = method === 'GET' ? getCachedResponse(requestUrl) : undefined
+  if (cached) {
+    const headers = new Headers(init.headers)
+    headers.set('If-None-Match', cached.etag)
+    init = { ...init, headers }
+  }
+
   let response: Response
   try {
     response = await ServerConnection.makeRequest(requestUrl, init, settings)
@@ -28,6 +60,9 @@ export async function requestAPI<T>(
     throw new ServerConnection.NetworkError(error as any)
   }
 
+  // Nothing has changed since the cached response. Every caller gets its own copy of it.
+  if (response.status === 304 && cached) return structuredClone(cached.data)
+
   let data
   try {
     // Clone so we don't read the response body in the event of an error (we return the response). 
@@ -40,5 +75,8 @@ export async function requestAPI<T>(
     throw new ServerConnection.ResponseError(response, data?.message || data)
   }
 
+  const etag = response.headers.get('Etag')
+  if (method === 'GET' && etag) setCachedResponse(requestUrl, etag, data)
+
   return data
 }